@@ -0,0 +1,135 @@
+from datetime import date, datetime, timedelta
+
+
+def duration_ms(it) -> int:
+    # Enteros en milisegundos: sumar y restar nunca acumula error de float
+    return int(float(it.get("duration_sec", 0.0) or 0.0) * 1000 + 0.5)
+
+
+def day_of(ts) -> int:
+    """Día local (ordinal) de un timestamp."""
+    return datetime.fromtimestamp(int(ts or 0)).toordinal()
+
+
+# -------------------------
+# Fenwick / prefix sums por día
+# -------------------------
+class DayIndex:
+    """
+    Suma de milisegundos por día con prefix sums (Fenwick): sumar/restar y
+    consultar un rango de días cuestan O(log D). El rango cubierto crece
+    duplicando la capacidad cuando aparece un día fuera de él.
+    """
+
+    def __init__(self):
+        self.base = 0
+        self.size = 0
+        self.tree = [0]
+        self.days = {}  # día -> ms (para reconstruir al crecer)
+
+    def add(self, day: int, ms: int):
+        if not ms:
+            return
+        self.days[day] = self.days.get(day, 0) + ms
+        if not self.days[day]:
+            del self.days[day]
+        if not (self.base <= day < self.base + self.size):
+            self._rebuild(day)
+            return
+        i = day - self.base + 1
+        while i <= self.size:
+            self.tree[i] += ms
+            i += i & -i
+
+    def _rebuild(self, day: int):
+        lo = min(min(self.days, default=day), day)
+        hi = max(max(self.days, default=day), day)
+        # margen hacia adelante: los días nuevos llegan casi siempre al final
+        self.size = max(64, 2 * (hi - lo + 1))
+        self.base = lo
+        self.tree = [0] * (self.size + 1)
+        for d, ms in self.days.items():
+            self.tree[d - self.base + 1] += ms
+        for i in range(1, self.size + 1):
+            j = i + (i & -i)
+            if j <= self.size:
+                self.tree[j] += self.tree[i]
+
+    def _prefix(self, day: int) -> int:
+        """Suma de los días < day."""
+        i = min(max(day - self.base, 0), self.size)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def range_ms(self, first_day: int, last_day: int) -> int:
+        """Suma de los días en [first_day, last_day]."""
+        if last_day < first_day or not self.size:
+            return 0
+        return self._prefix(last_day + 1) - self._prefix(first_day)
+
+
+# -------------------------
+# Aggregates
+# -------------------------
+class Aggregates:
+    """Totales de las cards mantenidos en O(1) por alta/baja, más el índice por día."""
+
+    def __init__(self):
+        self.total_ms = 0
+        self.videos = 0
+        self.manual = 0
+        self.by_day = DayIndex()
+
+    @classmethod
+    def from_items(cls, items):
+        agg = cls()
+        for it in items:
+            agg.add(it)
+        return agg
+
+    @classmethod
+    def from_store(cls, store):
+        """Arranca desde los agregados del store (SQL en SQLite) sin recorrer items."""
+        agg = cls()
+        total_ms, agg.videos, agg.manual = store.totals_ms()
+        agg.total_ms = total_ms
+        for day, ms in store.daily_ms().items():
+            agg.by_day.add(day, ms)
+        return agg
+
+    @property
+    def total_sec(self) -> float:
+        return self.total_ms / 1000
+
+    def add(self, it, sign: int = 1):
+        ms = duration_ms(it) * sign
+        self.total_ms += ms
+        if it.get("type", "video") == "video":
+            self.videos += sign
+        else:
+            self.manual += sign
+        self.by_day.add(day_of(it.get("added_at", 0)), ms)
+
+    def remove(self, it):
+        self.add(it, -1)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def range_sec(self, first: date, last: date) -> float:
+        return self.by_day.range_ms(first.toordinal(), last.toordinal()) / 1000
+
+    def today_sec(self, today: date | None = None) -> float:
+        today = today or date.today()
+        return self.range_sec(today, today)
+
+    def week_sec(self, today: date | None = None) -> float:
+        today = today or date.today()
+        return self.range_sec(today - timedelta(days=today.weekday()), today)
+
+    def month_sec(self, today: date | None = None) -> float:
+        today = today or date.today()
+        return self.range_sec(today.replace(day=1), today)
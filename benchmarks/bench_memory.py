@@ -0,0 +1,77 @@
+"""
+Memoria del historial cargado: lista de dicts (json.load tal cual) contra
+los Item compactos que deja JournalStore.load().
+
+    python benchmarks/bench_memory.py --history 100k,1m
+
+Por tamaño imprime la memoria retenida (bytes por item), el pico durante la
+carga (tracemalloc), el tiempo de carga y lo que tarda un gc.collect() con el
+historial vivo. Los tiempos se miden en otra pasada sin tracemalloc, que
+los infla varias veces.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from storage import JournalStore, load_data  # noqa: E402
+from corpus import write_history  # noqa: E402
+from bench_suite import parse_count  # noqa: E402
+
+LOADERS = {
+    "dicts": lambda path: load_data(path)["items"],
+    "items": lambda path: JournalStore(path).load(readonly=True)["items"],
+}
+
+
+def measure_memory(load, path: str):
+    gc.collect()
+    tracemalloc.start()
+    items = load(path)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.unfreeze()
+    return len(items), current, peak
+
+
+def measure_time(load, path: str):
+    gc.collect()
+    start = time.perf_counter()
+    items = load(path)
+    load_secs = time.perf_counter() - start
+    start = time.perf_counter()
+    gc.collect()
+    gc_secs = time.perf_counter() - start
+    del items
+    gc.unfreeze()
+    return load_secs, gc_secs
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--history", default="100k", help="data.json sizes, e.g. 100k,1m")
+    args = ap.parse_args()
+
+    print(f"{'case':<8} {'n':>9}  {'retained':>11}  {'bytes/item':>10}  {'peak':>11}  {'load':>9}  {'gc.collect':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (parse_count(s) for s in args.history.split(",") if s.strip()):
+            path = os.path.join(tmp, f"data-{n}.json")
+            write_history(path, n)
+            base = None
+            for case, load in LOADERS.items():
+                count, current, peak = measure_memory(load, path)
+                load_secs, gc_secs = measure_time(load, path)
+                ratio = f"  x{current / base:.2f}" if base else ""
+                base = base or current
+                print(f"{case:<8} {count:>9}  {current / 2**20:8.1f} MB  {current / max(count, 1):10.0f}"
+                      f"  {peak / 2**20:8.1f} MB  {load_secs:7.2f} s  {gc_secs * 1000:7.1f} ms{ratio}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
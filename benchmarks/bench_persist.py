@@ -0,0 +1,122 @@
+"""
+Costo de una edición en la ventana y pérdida ante un kill -9.
+
+    python benchmarks/bench_persist.py --history 1k,100k --edits 200
+    python benchmarks/bench_persist.py --crash --seconds 3
+
+Sin --crash, por tamaño de historial mide cuánto tarda store.add() de un item
+manual en el hilo que llama, con el JournalStore directo (append + fsync en
+cada edición) y detrás de WriteBehindStore (solo encola). "close" es lo que
+tarda en escribir lo pendiente al salir.
+
+Con --crash, un proceso hijo agrega items uno por uno y avisa cada add() que
+volvió; el padre lo mata con SIGKILL, recarga el store y verifica que esté
+todo lo avisado antes de la última ventana de debounce.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from core import make_manual_item  # noqa: E402
+from storage import WRITE_DEBOUNCE_SECS, JournalStore, WriteBehindStore  # noqa: E402
+from corpus import write_history  # noqa: E402
+from bench_suite import parse_count  # noqa: E402
+
+STORES = {
+    "sync": JournalStore,
+    "write-behind": lambda path: WriteBehindStore(JournalStore(path)),
+}
+
+
+def measure_edits(make_store, path: str, edits: int):
+    store = make_store(path)
+    data = store.load()
+    samples = []
+    for i in range(edits):
+        item = make_manual_item(60.0, f"bench {i}", len(data["items"]))
+        data["items"].append(item)
+        start = time.perf_counter()
+        store.add([item])
+        samples.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    store.close()
+    close_secs = time.perf_counter() - start
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)], samples[-1], close_secs
+
+
+# -------------------------
+# kill -9
+# -------------------------
+def child(path: str):
+    """Agrega items sin parar; por cada add() que vuelve imprime "índice monotonic"."""
+    store = WriteBehindStore(JournalStore(path))
+    data = store.load()
+    i = 0
+    while True:
+        item = make_manual_item(60.0, f"crash {i}", i)
+        item.update(id=f"crash-{i}")
+        data["items"].append(item)
+        store.add([item])
+        print(i, time.monotonic(), flush=True)
+        i += 1
+        time.sleep(0.002)
+
+
+def crash_test(seconds: float) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.json")
+        proc = subprocess.Popen([sys.executable, __file__, "--child", path], stdout=subprocess.PIPE, text=True)
+        time.sleep(seconds)
+        proc.send_signal(signal.SIGKILL)
+        killed_at = time.monotonic()
+        acked = [line.split() for line in proc.stdout.read().splitlines()]
+        proc.wait()
+
+        saved = {it["id"] for it in JournalStore(path).load(readonly=True)["items"]}
+        # Lo avisado antes de la última ventana (más un margen para el fsync) tiene que estar
+        cutoff = killed_at - WRITE_DEBOUNCE_SECS - 0.25
+        must = [int(i) for i, ts in acked if float(ts) < cutoff]
+        lost = [i for i in must if f"crash-{i}" not in saved]
+        window = sum(1 for _, ts in acked if float(ts) >= cutoff)
+        print(f"acked {len(acked)}, saved {len(saved)}, acked before the last window {len(must)}, "
+              f"lost of those {len(lost)} (last window: {window} edits)")
+        return 1 if lost else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--history", default="1k,100k", help="data.json sizes, e.g. 1k,100k,1m")
+    ap.add_argument("--edits", type=int, default=200)
+    ap.add_argument("--crash", action="store_true", help="kill -9 test instead of timings")
+    ap.add_argument("--seconds", type=float, default=3.0, help="with --crash: how long the child runs")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child)
+        return 0
+    if args.crash:
+        return crash_test(args.seconds)
+
+    print(f"{'store':<13} {'n':>9}  {'add p50':>9}  {'add p95':>9}  {'add max':>9}  {'close':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (parse_count(s) for s in args.history.split(",") if s.strip()):
+            for case, make_store in STORES.items():
+                path = os.path.join(tmp, f"data-{n}-{case}.json")
+                write_history(path, n)
+                p50, p95, worst, close_secs = measure_edits(make_store, path, args.edits)
+                print(f"{case:<13} {n:>9}  {p50 * 1000:6.3f} ms  {p95 * 1000:6.3f} ms  {worst * 1000:6.2f} ms"
+                      f"  {close_secs * 1000:6.1f} ms", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Compara el probe por cabecera (probe.py) contra VideoFileClip de moviepy.
+
+    python benchmarks/bench_probe.py --files 300
+
+Con ffmpeg disponible genera clips reales (copiados N veces) para que ambos
+caminos midan lo mismo; si no, usa contenedores sintéticos y moviepy queda
+como "n/a".
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from probe import header_duration_seconds  # noqa: E402
+from corpus import make_real_corpus, make_synthetic_corpus  # noqa: E402
+
+
+def moviepy_duration(path: str) -> float:
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+    with VideoFileClip(path) as clip:
+        return float(clip.duration or 0)
+
+
+def run(label: str, fn, paths: list[str]):
+    failures = 0
+    start = time.perf_counter()
+    for p in paths:
+        try:
+            if not fn(p):
+                failures += 1
+        except Exception:
+            failures += 1
+    elapsed = time.perf_counter() - start
+    rate = len(paths) / elapsed if elapsed else float("inf")
+    print(f"{label:<10} {len(paths):>6} files  {elapsed:8.3f}s  {rate:10.1f} files/s  failures={failures}")
+    return rate
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=int, default=300)
+    ap.add_argument("--synthetic", action="store_true", help="no intentar generar clips reales con ffmpeg")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = None if args.synthetic else make_real_corpus(tmp, args.files)
+        kind = "real"
+        if paths is None:
+            paths = make_synthetic_corpus(tmp, args.files, padding=1 << 20)
+            kind = "synthetic"
+        print(f"corpus: {len(paths)} {kind} files")
+
+        header_rate = run("header", header_duration_seconds, paths)
+        try:
+            import moviepy  # noqa: F401
+        except ImportError:
+            print("moviepy    n/a (not installed)")
+            return
+        if kind == "synthetic":
+            print("moviepy    n/a (synthetic corpus has no frames to decode)")
+            return
+        moviepy_rate = run("moviepy", moviepy_duration, paths)
+        print(f"speedup    x{header_rate / moviepy_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Prueba de carga del servicio HTTP (main.py serve): pedidos/s y latencia.
+
+    python benchmarks/bench_server.py --clients 16 --seconds 10 --batch 20
+    python benchmarks/bench_server.py --history 100k --storage binary --mix add:50,delete:10,totals:40
+    python benchmarks/bench_server.py --url http://127.0.0.1:8765 --token SECRET
+
+Sin --url levanta una instancia propia sobre una carpeta temporal (con un
+historial de --history items) y la cierra con Ctrl+C al terminar. Cada
+cliente es un hilo con su propia conexión keep-alive que elige la operación
+según --mix: add (un POST de --batch items de 60 s), delete (un DELETE de
+ids que ese mismo cliente agregó) o totals (GET /totals). Al final compara
+el total del servidor con lo que los clientes agregaron y borraron.
+
+Los clientes corren en este proceso: en una máquina con pocos núcleos
+compiten por CPU con el servidor, así que el resultado es un piso.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from storage import STORE_FILES, convert_snapshot  # noqa: E402
+from corpus import write_history  # noqa: E402
+from bench_suite import parse_count  # noqa: E402
+
+OPS = ("add", "delete", "totals")
+ITEM_SEC = 60
+
+
+def parse_mix(s: str) -> dict:
+    mix = {}
+    for part in s.split(","):
+        op, _, weight = part.partition(":")
+        if op.strip() not in OPS:
+            raise argparse.ArgumentTypeError(f"invalid op {op!r}, expected add, delete or totals")
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(samples: list, p: float) -> float:
+    return samples[min(int(len(samples) * p), len(samples) - 1)]
+
+
+# -------------------------
+# Servidor local
+# -------------------------
+def start_server(tmp: str, n: int, storage: str):
+    if n:
+        json_path = os.path.join(tmp, STORE_FILES["json"])
+        write_history(json_path, n)
+        if storage == "binary":
+            convert_snapshot(json_path, os.path.join(tmp, STORE_FILES["binary"]))
+    with open(os.path.join(tmp, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump({"storage": storage}, f)
+    proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "main.py"), "--data-dir", tmp, "serve", "--port", "0"],
+                            stderr=subprocess.PIPE, text=True)
+    for line in proc.stderr:
+        m = re.search(r"Serving on (http://\S+)", line)
+        if m:
+            return proc, m.group(1)
+        sys.stderr.write(line)
+    raise RuntimeError(f"server exited with {proc.wait()}")
+
+
+def stop_server(proc):
+    # Ctrl+C: escribe lo pendiente y cierra (lo ya respondido está en disco de todos modos)
+    if os.name == "nt":
+        proc.terminate()
+    else:
+        proc.send_signal(signal.SIGINT)
+    try:
+        proc.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+# -------------------------
+# Clientes
+# -------------------------
+class Client(threading.Thread):
+    def __init__(self, n: int, url: str, token: str, mix: dict, batch: int, deadline: float):
+        super().__init__(daemon=True)
+        parts = urlsplit(url)
+        self.conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self.rng = random.Random(n)
+        self.prefix = f"bench-{os.getpid()}-{n}-"
+        self.mix = mix
+        self.batch = batch
+        self.deadline = deadline
+        self.ids = []        # agregados por este cliente y todavía no borrados
+        self.next_id = 0
+        self.samples = {op: [] for op in OPS}
+        self.errors = 0
+        self.added = 0
+        self.deleted = 0
+
+    def _request(self, method: str, path: str, body=None):
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        self.conn.request(method, path, payload, self.headers)
+        resp = self.conn.getresponse()
+        data = resp.read()
+        if resp.status != 200:
+            raise RuntimeError(f"{method} {path}: {resp.status} {data[:200]!r}")
+        return json.loads(data)
+
+    def _add(self):
+        now = int(time.time())
+        items = []
+        for _ in range(self.batch):
+            items.append({"id": f"{self.prefix}{self.next_id}", "type": "manual", "label": "load test",
+                          "duration_sec": ITEM_SEC, "added_at": now})
+            self.next_id += 1
+        result = self._request("POST", "/items", {"items": items})
+        self.added += result["added"]
+        self.ids += result["ids"]
+
+    def _delete(self):
+        if not self.ids:
+            return self._add()
+        take = min(len(self.ids), self.batch)
+        ids, self.ids = self.ids[-take:], self.ids[:-take]
+        self.deleted += self._request("DELETE", "/items", {"ids": ids})["deleted"]
+
+    def _totals(self):
+        self._request("GET", "/totals")
+
+    def run(self):
+        ops, weights = list(self.mix), list(self.mix.values())
+        while time.monotonic() < self.deadline:
+            op = self.rng.choices(ops, weights)[0]
+            start = time.perf_counter()
+            try:
+                getattr(self, "_" + op)()
+            except (OSError, RuntimeError, http.client.HTTPException) as e:
+                self.errors += 1
+                if self.errors == 1:
+                    print(f"error: {e}", file=sys.stderr)
+                self.conn.close()
+                continue
+            self.samples[op].append(time.perf_counter() - start)
+        self.conn.close()
+
+
+def total_sec(url: str, token: str) -> float:
+    client = Client(0, url, token, {"totals": 1}, 0, 0)
+    try:
+        return client._request("GET", "/totals")["total_sec"]
+    finally:
+        client.conn.close()
+
+
+def load_test(url: str, token: str, clients: int, seconds: float, mix: dict, batch: int) -> int:
+    before = total_sec(url, token)
+    deadline = time.monotonic() + seconds
+    workers = [Client(i, url, token, mix, batch, deadline) for i in range(clients)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+
+    print(f"{'op':<8} {'requests':>9} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    count = 0
+    for op in OPS:
+        samples = sorted(s for w in workers for s in w.samples[op])
+        if not samples:
+            continue
+        count += len(samples)
+        print(f"{op:<8} {len(samples):>9} {len(samples) / elapsed:>9.1f}"
+              + "".join(f" {percentile(samples, p) * 1000:>6.1f} ms" for p in (0.5, 0.95, 0.99))
+              + f" {samples[-1] * 1000:>6.1f} ms")
+    added = sum(w.added for w in workers)
+    deleted = sum(w.deleted for w in workers)
+    errors = sum(w.errors for w in workers)
+    print(f"total    {count:>9} {count / elapsed:>9.1f}   ({clients} clients, {elapsed:.1f} s, {errors} errors)")
+    print(f"items added {added} ({added / elapsed:.0f}/s), deleted {deleted}")
+
+    after = total_sec(url, token)
+    expected = before + (added - deleted) * ITEM_SEC
+    print(f"server total {after:.0f} s, expected {expected:.0f} s: {'ok' if after == expected else 'MISMATCH'}")
+    return 1 if errors or after != expected else 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--batch", type=int, default=20, help="items per add / ids per delete")
+    ap.add_argument("--mix", type=parse_mix, default=parse_mix("add:60,delete:10,totals:30"))
+    ap.add_argument("--history", default="0", help="items already saved in the local instance, e.g. 100k")
+    ap.add_argument("--storage", choices=sorted(STORE_FILES), default="json")
+    ap.add_argument("--url", default=None, help="test a running instance instead of starting one")
+    ap.add_argument("--token", default=os.environ.get("WHT_TOKEN", ""))
+    args = ap.parse_args()
+
+    if args.url:
+        return load_test(args.url, args.token, args.clients, args.seconds, args.mix, args.batch)
+    with tempfile.TemporaryDirectory() as tmp:
+        proc, url = start_server(tmp, parse_count(args.history), args.storage)
+        try:
+            return load_test(url, args.token, args.clients, args.seconds, args.mix, args.batch)
+        finally:
+            stop_server(proc)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
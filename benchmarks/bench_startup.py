@@ -0,0 +1,92 @@
+"""
+Mide el arranque en frío de cada camino (mediana de N procesos nuevos):
+
+    python benchmarks/bench_startup.py --runs 10
+    python benchmarks/bench_startup.py --runs 5 --history 1m
+
+  cli total     python main.py total (sobre una carpeta de datos vacía)
+  gui import    import gui (todo lo que se carga antes de crear la ventana)
+  gui window    App() + primer update (solo si hay DISPLAY, ej. bajo Xvfb)
+  moviepy       import de VideoFileClip, como referencia de lo que se evita
+
+Con --history N, cli total y gui window corren además sobre un historial de
+N items, una vez por store: json (data.json) y binary (data.snap, ya
+convertido: la conversión única no cuenta).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from storage import STORE_FILES, convert_snapshot  # noqa: E402
+from corpus import write_history  # noqa: E402
+from bench_suite import parse_count  # noqa: E402
+
+GUI_WINDOW = "from gui import App; app = App(); app.update(); app.destroy()"
+
+
+def timed(cmd, cwd, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        samples.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            return None, proc.stderr.decode(errors="replace").strip().splitlines()[-1:]
+    return statistics.median(samples), None
+
+
+def data_cases(data_dir: str, suffix: str = ""):
+    cases = [(f"cli total{suffix}", [sys.executable, os.path.join(ROOT, "main.py"), "--data-dir", data_dir, "total"])]
+    if os.environ.get("DISPLAY") or os.name == "nt":
+        cases.append((f"gui window{suffix}", [sys.executable, "-c", f"import os; os.chdir({data_dir!r}); "
+                                                                  f"import sys; sys.path.insert(0, {ROOT!r}); "
+                                                                  + GUI_WINDOW]))
+    return cases
+
+
+def history_dir(tmp: str, n: int, storage: str) -> str:
+    folder = os.path.join(tmp, f"{storage}-{n}")
+    os.makedirs(folder)
+    json_path = os.path.join(folder, STORE_FILES["json"])
+    write_history(json_path, n)
+    with open(os.path.join(folder, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump({"storage": storage}, f)
+    if storage == "binary":
+        convert_snapshot(json_path, os.path.join(folder, STORE_FILES["binary"]))
+    return folder
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--history", default="", help="also time startup with this many items, e.g. 1m")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        cases = data_cases(data_dir)
+        cases[1:1] = [("gui import", [sys.executable, "-c", "import gui"])]
+        cases.append(("moviepy", [sys.executable, "-c", "from moviepy.video.io.VideoFileClip import VideoFileClip"]))
+        if args.history:
+            n = parse_count(args.history)
+            for storage in ("json", "binary"):
+                cases += data_cases(history_dir(data_dir, n, storage), f" {storage} {args.history}")
+
+        width = max(len(label) for label, _ in cases)
+        for label, cmd in cases:
+            median, err = timed(cmd, ROOT, args.runs)
+            if median is None:
+                print(f"{label:<{width}} n/a ({err[0] if err else 'failed'})")
+            else:
+                print(f"{label:<{width}} {median * 1000:8.1f} ms  (median of {args.runs})", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Suite reproducible: escaneo, storage y refresh de la UI sobre corpus sintéticos.
+
+    python benchmarks/bench_suite.py --files 2000 --history 1k,100k --json run.json
+    python benchmarks/bench_suite.py --history 1k,100k,1m --compare run.json
+
+Cada caso es la mediana de --repeat corridas:
+
+  list_videos cold      listado del árbol sin snapshots (scandir + stat)
+  list_videos rescan    mismo árbol con DirSnapshots ya cargados
+  fingerprint           stat + id de cada archivo
+  probe                 safe_video_duration_seconds (camino por cabecera)
+  load_data             json.load de un data.json de N items
+  save_data             atomic_write_json del mismo snapshot
+  store load            store.load() (JournalStore o SQLite, según --storage)
+  store add             store.add() de un item (un append al journal / una transacción)
+  refresh model         recent_items() + Aggregates.from_store(), sin Tk
+  refresh tk            App.refresh_table_and_totals() + update_idletasks()
+
+"refresh tk" necesita una pantalla (DISPLAY, por ejemplo bajo xvfb-run); sin
+ella se omite y queda solo la parte de modelo. Con --json se guardan los
+resultados y los metadatos de la corrida (commit, python, plataforma); con
+--compare se imprime el cociente contra una corrida anterior.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from aggregates import Aggregates  # noqa: E402
+from core import safe_video_duration_seconds  # noqa: E402
+from scanner import DirSnapshots, fingerprint, list_videos  # noqa: E402
+from storage import STORE_FILES, atomic_write_json, load_data, open_store  # noqa: E402
+from corpus import make_synthetic_corpus, write_history  # noqa: E402
+
+RESULTS_FORMAT = 1
+
+
+def parse_count(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s.rstrip("km")) * mult)
+
+
+def median_time(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+class Report:
+    def __init__(self):
+        self.results = []
+
+    def add(self, case: str, n: int, seconds: float, **extra):
+        self.results.append({"case": case, "n": n, "seconds": seconds, **extra})
+        rate = f"{n / seconds:12.0f} /s" if seconds > 0 else " " * 14
+        print(f"{case:<20} {n:>9}  {seconds * 1000:10.2f} ms  {rate}", flush=True)
+
+    def skip(self, case: str, n: int, reason: str):
+        self.results.append({"case": case, "n": n, "seconds": None, "skipped": reason})
+        print(f"{case:<20} {n:>9}  n/a ({reason})", flush=True)
+
+
+# -------------------------
+# Scan
+# -------------------------
+def _backdate_dirs(root: str, secs: int = 60):
+    # Carpetas recién escritas caen en la regla de mtime "racy" y no se reutilizarían
+    past = time.time() - secs
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (past, past))
+
+
+def bench_scan(report: Report, tmp: str, n_files: int, repeat: int):
+    root = os.path.join(tmp, "tree")
+    make_synthetic_corpus(root, n_files, exts=(".mp4", ".mkv"), padding=1024, per_dir=100)
+    _backdate_dirs(root)
+
+    listing = list_videos(root, True)
+    paths = [p for p, _, _ in listing]
+    report.add("list_videos cold", len(paths), median_time(lambda: list_videos(root, True), repeat))
+
+    snapshots = DirSnapshots(path="")
+    list_videos(root, True, snapshots)
+    report.add("list_videos rescan", len(paths),
+               median_time(lambda: list_videos(root, True, snapshots), repeat))
+
+    def fingerprint_all():
+        for p in paths:
+            fingerprint(p)
+
+    def probe_all():
+        for p in paths:
+            safe_video_duration_seconds(p)
+
+    report.add("fingerprint", len(paths), median_time(fingerprint_all, repeat))
+    report.add("probe", len(paths), median_time(probe_all, repeat))
+
+
+# -------------------------
+# Storage / refresh
+# -------------------------
+def bench_history(report: Report, tmp: str, n: int, storage: str, repeat: int, use_tk: bool):
+    folder = os.path.join(tmp, f"history-{n}")
+    os.makedirs(folder)
+    json_path = os.path.join(folder, STORE_FILES["json"])
+    size = write_history(json_path, n)
+
+    data = load_data(json_path)
+    report.add("load_data", n, median_time(lambda: load_data(json_path), repeat), bytes=size)
+    out_path = os.path.join(folder, "save.json")
+    report.add("save_data", n, median_time(lambda: atomic_write_json(out_path, data), repeat), bytes=size)
+    os.remove(out_path)
+    data = None  # no retener N items durante los casos siguientes
+
+    open_store(storage, folder).close()  # SQLite: la importación inicial no cuenta
+
+    def store_load():
+        store = open_store(storage, folder)
+        store.load()
+        store.close()
+
+    report.add(f"store load ({storage})", n, median_time(store_load, repeat))
+
+    store = open_store(storage, folder)
+    store.load()
+    extra = iter(range(repeat))
+
+    def store_add():
+        i = next(extra)
+        store.add([{"id": f"bench-{i}", "type": "manual", "label": "bench", "duration_sec": 1.0,
+                    "added_at": int(time.time()), "path": ""}])
+
+    report.add(f"store add ({storage})", 1, median_time(store_add, repeat))
+
+    def refresh_model():
+        store.recent_items()
+        Aggregates.from_store(store)
+
+    report.add("refresh model", n, median_time(refresh_model, repeat))
+    store.close()
+
+    if not use_tk:
+        report.skip("refresh tk", n, "no display")
+        return
+    cwd = os.getcwd()
+    os.chdir(folder)
+    try:
+        from gui import App
+        app = App()
+        app.update()
+
+        def refresh_tk():
+            app.refresh_table_and_totals()
+            app.update_idletasks()
+
+        report.add("refresh tk", n, median_time(refresh_tk, repeat))
+        app.on_close()
+    finally:
+        os.chdir(cwd)
+
+
+def tk_available() -> bool:
+    if os.name != "nt" and not os.environ.get("DISPLAY"):
+        return False
+    try:
+        import tkinter
+        root = tkinter.Tk()
+        root.destroy()
+        return True
+    except Exception:
+        return False
+
+
+# -------------------------
+# Results
+# -------------------------
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(results, old_path: str):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    before = {(r["case"], r["n"]): r["seconds"] for r in old.get("results", []) if r.get("seconds")}
+    print(f"\nvs {old_path} (commit {old.get('meta', {}).get('commit')}); < 1.00 is faster")
+    for r in results:
+        prev = before.get((r["case"], r["n"]))
+        if prev and r.get("seconds"):
+            print(f"{r['case']:<20} {r['n']:>9}  x{r['seconds'] / prev:.2f}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=parse_count, default=2000, help="videos in the synthetic tree (0 = skip scan)")
+    ap.add_argument("--history", default="1k,100k", help="data.json sizes, e.g. 1k,100k,1m")
+    ap.add_argument("--storage", choices=sorted(STORE_FILES), default="json")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", dest="json_out", default=None, help="write results here")
+    ap.add_argument("--compare", default=None, help="previous --json output to compare against")
+    args = ap.parse_args()
+
+    sizes = [parse_count(s) for s in args.history.split(",") if s.strip()]
+    has_tk = tk_available()
+    meta = {
+        "format": RESULTS_FORMAT,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "tk": has_tk,
+        "args": vars(args),
+    }
+    print(f"commit {meta['commit']}  python {meta['python']}  {meta['platform']}  tk={'yes' if has_tk else 'no'}")
+
+    report = Report()
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.files:
+            bench_scan(report, tmp, args.files, args.repeat)
+        for n in sizes:
+            bench_history(report, tmp, n, args.storage, args.repeat, has_tk)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": report.results}, f, indent=2)
+    if args.compare:
+        compare(report.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Generadores de corpus sintéticos para los benchmarks.
+
+Los archivos son contenedores mínimos pero válidos (cabecera + datos de
+relleno): alcanzan para que probe.py lea la duración. Si hay un ffmpeg a mano
+(imageio-ffmpeg, que viene con moviepy) también se puede generar un clip real
+para que el camino de moviepy tenga algo que decodificar.
+"""
+import os
+import json
+import shutil
+import struct
+import subprocess
+
+
+# -------------------------
+# MP4
+# -------------------------
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mp4_bytes(duration_sec: float, timescale: int = 1000, padding: int = 0, moov_last: bool = False) -> bytes:
+    ftyp = _box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isomiso2mp41")
+    mvhd_body = (
+        struct.pack(">B3x", 0)
+        + struct.pack(">IIII", 0, 0, timescale, int(round(duration_sec * timescale)))
+        + struct.pack(">IH10x", 0x00010000, 0x0100)
+        + struct.pack(">9I", 0x00010000, 0, 0, 0, 0x00010000, 0, 0, 0, 0x40000000)
+        + bytes(24)
+        + struct.pack(">I", 2)
+    )
+    moov = _box(b"moov", _box(b"mvhd", mvhd_body))
+    mdat = _box(b"mdat", bytes(padding))
+    return ftyp + (mdat + moov if moov_last else moov + mdat)
+
+
+# -------------------------
+# Matroska / WebM
+# -------------------------
+def _ebml_size(n: int) -> bytes:
+    # Siempre 8 bytes: simple y válido
+    return bytes([0x01]) + n.to_bytes(7, "big")
+
+
+def _ebml(eid: int, payload: bytes) -> bytes:
+    return eid.to_bytes((eid.bit_length() + 7) // 8, "big") + _ebml_size(len(payload)) + payload
+
+
+def mkv_bytes(duration_sec: float, doc_type: str = "matroska", padding: int = 0) -> bytes:
+    header = _ebml(0x1A45DFA3, _ebml(0x4282, doc_type.encode()) + _ebml(0x4287, b"\x04"))
+    info = _ebml(0x1549A966,
+                 _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big"))
+                 + _ebml(0x4489, struct.pack(">d", duration_sec * 1000.0)))
+    void = _ebml(0xEC, bytes(padding))
+    return header + _ebml(0x18538067, info + void)
+
+
+# -------------------------
+# AVI
+# -------------------------
+def _chunk(cid: bytes, payload: bytes) -> bytes:
+    pad = b"\x00" if len(payload) & 1 else b""
+    return cid + struct.pack("<I", len(payload)) + payload + pad
+
+
+def avi_bytes(duration_sec: float, fps: int = 30, padding: int = 0) -> bytes:
+    frames = int(round(duration_sec * fps))
+    avih = struct.pack("<14I", 1_000_000 // fps, 0, 0, 0, frames, 0, 1, 0, 320, 240, 0, 0, 0, 0)
+    hdrl = _chunk(b"LIST", b"hdrl" + _chunk(b"avih", avih))
+    movi = _chunk(b"LIST", b"movi" + bytes(padding))
+    body = b"AVI " + hdrl + movi
+    return b"RIFF" + struct.pack("<I", len(body)) + body
+
+
+WRITERS = {
+    ".mp4": lambda d, pad: mp4_bytes(d, padding=pad),
+    ".mov": lambda d, pad: mp4_bytes(d, padding=pad, moov_last=True),
+    ".m4v": lambda d, pad: mp4_bytes(d, padding=pad),
+    ".mkv": lambda d, pad: mkv_bytes(d, padding=pad),
+    ".webm": lambda d, pad: mkv_bytes(d, doc_type="webm", padding=pad),
+    ".avi": lambda d, pad: avi_bytes(d, padding=pad),
+}
+
+
+def make_synthetic_corpus(root: str, n: int, exts=(".mp4", ".mkv", ".avi"), padding: int = 4096,
+                          per_dir: int = 0) -> list[str]:
+    """Escribe n archivos (rotando extensiones); si per_dir > 0 los reparte en subcarpetas."""
+    os.makedirs(root, exist_ok=True)
+    paths = []
+    for i in range(n):
+        ext = exts[i % len(exts)]
+        folder = os.path.join(root, f"d{i // per_dir:04d}") if per_dir else root
+        os.makedirs(folder, exist_ok=True)
+        p = os.path.join(folder, f"clip{i:06d}{ext}")
+        with open(p, "wb") as f:
+            f.write(WRITERS[ext](60.0 + i % 600, padding))
+        paths.append(p)
+    return paths
+
+
+# -------------------------
+# Clips reales (opcional)
+# -------------------------
+def find_ffmpeg() -> str | None:
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return shutil.which("ffmpeg")
+
+
+def make_real_corpus(root: str, n: int, exts=(".mp4", ".mkv", ".avi"), seconds: int = 3) -> list[str] | None:
+    """Codifica un clip corto por contenedor y lo copia n veces. None si no hay ffmpeg."""
+    ffmpeg = find_ffmpeg()
+    if not ffmpeg:
+        return None
+    os.makedirs(root, exist_ok=True)
+    templates = {}
+    for ext in exts:
+        out = os.path.join(root, f"_template{ext}")
+        cmd = [ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=30:duration={seconds}",
+               "-pix_fmt", "yuv420p", out]
+        if subprocess.run(cmd).returncode != 0:
+            return None
+        templates[ext] = out
+
+    paths = []
+    for i in range(n):
+        ext = exts[i % len(exts)]
+        p = os.path.join(root, f"clip{i:06d}{ext}")
+        shutil.copyfile(templates[ext], p)
+        paths.append(p)
+    for t in templates.values():
+        os.remove(t)
+    return paths
+
+
+# -------------------------
+# Historiales (data.json)
+# -------------------------
+def make_history(n: int, days: int = 730, start_ts: int = 1_700_000_000) -> list[dict]:
+    """n items con la forma de core.make_*_item: 4 de cada 5 videos, repartidos en `days` días."""
+    items = []
+    step = max(days * 86400 // max(n, 1), 1)
+    for i in range(n):
+        ts = start_ts + i * step
+        if i % 5:
+            path = f"/videos/d{i // 500:05d}/clip{i:07d}.mp4"
+            items.append({"id": f"{path}|{4096 + i}|{ts}", "type": "video", "label": os.path.basename(path),
+                          "duration_sec": 60.0 + i % 600, "added_at": ts, "path": path})
+        else:
+            items.append({"id": f"manual-{ts}-{i}", "type": "manual", "label": "Manual input",
+                          "duration_sec": float(60 * (1 + i % 90)), "added_at": ts, "path": ""})
+    return items
+
+
+def write_history(path: str, n: int) -> int:
+    """Escribe un snapshot formato 2 (como lo deja JournalStore) y devuelve su tamaño en bytes."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"format": 2, "seq": n, "items": make_history(n)}, f, separators=(",", ":"))
+    return os.path.getsize(path)
@@ -0,0 +1,102 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+from storage import atomic_write_json
+
+APP_CACHE_FILE = "probe_cache.json"
+CACHE_MAX_ENTRIES = 50_000
+SAMPLE_BYTES = 64 * 1024
+
+
+def sampled_hash(path: str, size: int, block: int = SAMPLE_BYTES) -> str:
+    """Hash de los primeros y últimos `block` bytes: barato y suficiente para reconocer un archivo movido."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(block))
+        if size > 2 * block:
+            f.seek(size - block)
+            h.update(f.read(block))
+    return h.hexdigest()
+
+
+def _inode_sig(st) -> str:
+    return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
+class ProbeCache:
+    """
+    Cache persistente de duraciones por identidad de contenido
+    (tamaño + hash de bloques de cabeza/cola). Un archivo renombrado o movido
+    de carpeta cae en la misma entrada y no se vuelve a decodificar.
+
+    Antes de hashear se mira el inode (dev/ino/size/mtime): si coincide con
+    una entrada conocida no hace falta leer nada. LRU con tope de entradas.
+    """
+
+    def __init__(self, path: str = APP_CACHE_FILE, max_entries: int = CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.by_inode = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+                for key, entry in raw.get("entries", []):
+                    self.entries[key] = entry
+                    if entry.get("inode"):
+                        self.by_inode[entry["inode"]] = key
+            except Exception:
+                self.entries.clear()
+                self.by_inode.clear()
+        return self
+
+    def save(self):
+        if not self.dirty:
+            return
+        with self.lock:
+            snapshot = {"version": 1, "entries": list(self.entries.items())}
+            self.dirty = False
+        atomic_write_json(self.path, snapshot)
+
+    def content_key(self, path: str, st=None) -> str:
+        st = st or os.stat(path)
+        key = self.by_inode.get(_inode_sig(st))
+        if key is not None:
+            return key
+        return f"{st.st_size}:{sampled_hash(path, st.st_size)}"
+
+    def get(self, key: str):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, path: str, item_id: str, duration_sec: float, st=None):
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old and old.get("inode"):
+                self.by_inode.pop(old["inode"], None)
+            entry = {"duration_sec": duration_sec, "path": path, "id": item_id}
+            if st is not None:
+                entry["inode"] = _inode_sig(st)
+                self.by_inode[entry["inode"]] = key
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                _, evicted = self.entries.popitem(last=False)
+                if evicted.get("inode"):
+                    self.by_inode.pop(evicted["inode"], None)
+            self.dirty = True
@@ -0,0 +1,613 @@
+"""
+Uso sin ventana (cron, equipos remotos):
+
+    python main.py scan <carpeta> [--recursive] [--workers N] [--profile out.prof]
+    python main.py scan-all <perfil>
+    python main.py profiles [<perfil> [--add DIR [--no-recursive] [--exts .mp4,.mts] [--workers N] | --remove DIR | --delete]]
+    python main.py add 2:34 "descripción"
+    python main.py import registros.csv|registros.jsonl [--format csv|jsonl] [--dry-run]
+    python main.py total [--from YYYY-MM-DD] [--to YYYY-MM-DD]
+    python main.py list [--since YYYY-MM-DD] [--limit N] [--search TEXT] [--type video|manual] [--folder DIR]
+    python main.py report [--period month] [--by folder,type,label] [--top N] [-o out.csv|out.json]
+    python main.py watch [carpeta ...] [--recursive]
+    python main.py quarantine [--retry PATH ... | --retry-all]
+    python main.py duplicates [--clear]
+    python main.py serve [--host 127.0.0.1] [--port 8765] [--token SECRET]
+
+Usa el mismo store y settings.json que la app (en --data-dir, por defecto
+la carpeta actual). No importa tkinter; moviepy solo si hace falta.
+"""
+import os
+import sys
+import time
+import queue
+import argparse
+from datetime import date
+
+from aggregates import Aggregates, day_of
+from cache import ProbeCache
+from core import (format_hm, format_hms, load_settings, make_manual_item, make_video_item,
+                  parse_manual_time_to_seconds, save_settings)
+from dedupe import DuplicateList
+from importer import FORMATS, Importer
+from items import ItemIndex, replaced
+from metrics import format_summary, write_metrics
+from probe import IsolatedProbe
+from quarantine import Quarantine
+from scanner import MAX_WORKERS, VIDEO_EXTS, DirSnapshots, MultiScanJob, ScanJob, parse_exts, profile_roots
+from search import HistoryFilter
+from storage import open_store
+from watcher import FolderWatcher
+
+FLUSH_EVERY_SEC = 1.0
+
+
+def _date(s: str) -> date:
+    try:
+        return date.fromisoformat(s)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {s!r}, expected YYYY-MM-DD")
+
+
+def _group_keys(s: str):
+    keys = tuple(k.strip() for k in s.split(",") if k.strip())
+    bad = [k for k in keys if k not in ("folder", "type", "label")]
+    if bad:
+        raise argparse.ArgumentTypeError(f"invalid group {bad[0]!r}, expected folder, type or label")
+    return keys
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="WorkHoursTracker", description="Worked hours tracker (headless mode).")
+    ap.add_argument("--data-dir", default=".", help="folder with data.json / settings.json (default: current)")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("scan", help="scan a folder and save new videos")
+    p.add_argument("folder")
+    p.add_argument("--recursive", "-r", action="store_true", help="include subfolders")
+    p.add_argument("--workers", "-w", type=int, default=None, help=f"parallel probes (1-{MAX_WORKERS})")
+    p.add_argument("--profile", default=None, metavar="PATH", help="dump cProfile stats of the scan thread here")
+
+    p = sub.add_parser("scan-all", help="scan every folder of a saved profile at the same time, then save once")
+    p.add_argument("name")
+
+    p = sub.add_parser("profiles", help="list, create or edit scan profiles (folders scanned together)")
+    p.add_argument("name", nargs="?", default=None)
+    p.add_argument("--add", default=None, metavar="DIR", help="add (or replace) this folder in the profile")
+    p.add_argument("--no-recursive", dest="recursive", action="store_false", help="with --add: skip subfolders")
+    p.add_argument("--exts", default="", help="with --add: extensions to pick up, e.g. .mp4,.mts (default: video types)")
+    p.add_argument("--workers", "-w", type=int, default=0,
+                   help=f"with --add: parallel probes for this folder (1-{MAX_WORKERS}, default: scan_workers)")
+    p.add_argument("--remove", default=None, metavar="DIR", help="take this folder out of the profile")
+    p.add_argument("--delete", action="store_true", help="delete the whole profile")
+
+    p = sub.add_parser("add", help="add manual time (m:ss, h:mm:ss or minutes)")
+    p.add_argument("time")
+    p.add_argument("label", nargs="?", default="Manual input")
+
+    p = sub.add_parser("import", help="add time records exported by other tools (CSV or JSONL)")
+    p.add_argument("file")
+    p.add_argument("--format", choices=FORMATS, default=None, help="default: from the extension")
+    p.add_argument("--dry-run", action="store_true", help="check the file and count new records, save nothing")
+
+    p = sub.add_parser("total", help="print totals")
+    p.add_argument("--from", dest="first", type=_date, default=None)
+    p.add_argument("--to", dest="last", type=_date, default=None)
+
+    p = sub.add_parser("list", help="list entries, newest first")
+    p.add_argument("--since", type=_date, default=None)
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--search", default="", help="words (or word prefixes) in the description, file name or folder")
+    p.add_argument("--type", choices=("video", "manual"), default=None)
+    p.add_argument("--folder", default=None, help="only this folder and its subfolders")
+
+    p = sub.add_parser("report", help="time per period, grouped by folder/type/label (CSV/JSON export)")
+    p.add_argument("--period", choices=("day", "week", "month", "total"), default="month")
+    p.add_argument("--by", type=_group_keys, default=("folder",), help="comma list of folder, type, label")
+    p.add_argument("--from", dest="first", type=_date, default=None)
+    p.add_argument("--to", dest="last", type=_date, default=None)
+    p.add_argument("--top", type=int, default=None, help="keep the N largest groups of each period")
+    p.add_argument("--output", "-o", default=None, help="write .csv or .json instead of printing")
+
+    p = sub.add_parser("watch", help="keep running and add new videos as they appear (Ctrl+C to stop)")
+    p.add_argument("folders", nargs="*", help="folders to watch (default: the ones saved in settings.json)")
+    p.add_argument("--recursive", "-r", action="store_true", help="include subfolders")
+    p.add_argument("--workers", "-w", type=int, default=None, help=f"parallel probes (1-{MAX_WORKERS})")
+
+    p = sub.add_parser("quarantine", help="list files that could not be measured")
+    p.add_argument("--retry", nargs="+", default=None, metavar="PATH", help="take these files out so they are retried")
+    p.add_argument("--retry-all", action="store_true", help="empty the list")
+
+    p = sub.add_parser("duplicates", help="list copies that were skipped because the same video is already saved")
+    p.add_argument("--clear", action="store_true", help="forget them so the next scan checks them again")
+
+    p = sub.add_parser("serve", help="accept entries, deletes and total queries over HTTP/JSON (Ctrl+C to stop)")
+    p.add_argument("--host", default=None, help="address to listen on (default: 127.0.0.1); 0.0.0.0 for other machines")
+    p.add_argument("--port", type=int, default=None, help="default: 8765; 0 picks a free port")
+    p.add_argument("--token", default=os.environ.get("WHT_TOKEN", ""),
+                   help="require 'Authorization: Bearer TOKEN' (default: $WHT_TOKEN)")
+    return ap
+
+
+# -------------------------
+# Commands
+# -------------------------
+def cmd_scan(args, store, data, settings) -> int:
+    if not os.path.isdir(args.folder):
+        print(f"error: not a folder: {args.folder}", file=sys.stderr)
+        return 2
+
+    prober = IsolatedProbe(settings["probe_timeout_sec"])
+    job = ScanJob(
+        args.folder,
+        args.recursive,
+        store.known_ids(),
+        prober,
+        workers=args.workers or settings["scan_workers"],
+        use_processes=settings["scan_use_processes"],
+        cache=ProbeCache().load(),
+        snapshots=DirSnapshots().load(),
+        quarantine=Quarantine().load(),
+        duplicates=DuplicateList().load() if settings["skip_duplicates"] else None,
+        profile_path=args.profile,
+    )
+    return _run_scan(job, prober, store, data)
+
+
+def cmd_scan_all(args, store, data, settings) -> int:
+    roots = settings["scan_profiles"].get(args.name)
+    if not roots:
+        print(f"error: no profile named {args.name!r} (see `profiles`)", file=sys.stderr)
+        return 2
+    roots = profile_roots(roots, settings["scan_workers"])
+    missing = [r["path"] for r in roots if not os.path.isdir(r["path"])]
+    if missing:
+        print(f"error: not a folder: {missing[0]}", file=sys.stderr)
+        return 2
+
+    prober = IsolatedProbe(settings["probe_timeout_sec"])
+    job = MultiScanJob(
+        roots,
+        store.known_ids(),
+        prober,
+        use_processes=settings["scan_use_processes"],
+        cache=ProbeCache().load(),
+        snapshots=DirSnapshots().load(),
+        quarantine=Quarantine().load(),
+        duplicates=DuplicateList().load() if settings["skip_duplicates"] else None,
+    )
+    # Un solo guardado al final: si se corta, la cache de duraciones hace barato repetirlo
+    return _run_scan(job, prober, store, data, save_at_end=True)
+
+
+def _run_scan(job, prober, store, data, save_at_end: bool = False) -> int:
+    """Consume la cola de un ScanJob / MultiScanJob e imprime el resumen."""
+    job.start()
+
+    added = moved = done_files = quarantined = duplicates = 0
+    added_seconds = 0.0
+    n_total = None
+    listed = False
+    batch = []
+    last_flush = time.monotonic()
+    finished = None
+    progress = sys.stderr.isatty()
+    store_secs = 0.0
+    index = None  # ItemIndex de data["items"], armado con el primer archivo movido
+
+    while finished is None:
+        try:
+            msg = job.queue.get(timeout=0.2)
+        except queue.Empty:
+            msg = None
+        except KeyboardInterrupt:
+            # Ctrl+C: se cancela pero se guarda todo lo ya medido
+            job.cancel()
+            continue
+
+        if msg is not None:
+            kind = msg[0]
+            if kind == "total":
+                # Van llegando mientras se lista (y de cada raíz en MultiScanJob): se suman
+                n_total = (n_total or 0) + msg[1]
+                done_files += msg[2]
+            elif kind == "listed":
+                listed = True
+            elif kind == "item":
+                item = make_video_item(*msg[1:])
+                data["items"].append(item)
+                batch.append(item)
+                added += 1
+                added_seconds += item["duration_sec"]
+                done_files += 1
+            elif kind == "moved":
+                _, old_id, fid, p, dur = msg
+                if index is None:
+                    index = ItemIndex(data["items"])
+                old = index.get(old_id)
+                if old is None:
+                    item = make_video_item(fid, p, dur)
+                    data["items"].append(item)
+                    batch.append(item)
+                else:
+                    # Copia nueva: la compactación del journal puede estar escribiendo el item viejo
+                    item = replaced(old, id=fid, label=os.path.basename(p), path=p)
+                    index.replace(old_id, item)
+                    store.update(old_id, item)
+                    moved += 1
+                done_files += 1
+            elif kind == "quarantined":
+                quarantined += 1
+                done_files += 1
+                if progress:
+                    print(file=sys.stderr)
+                print(f"warning: could not measure {msg[1]}: {msg[2]}", file=sys.stderr)
+            elif kind == "duplicate":
+                duplicates += 1  # ya contado como salteado en "total"
+            else:
+                finished = msg
+
+        if batch and (finished is not None or (not save_at_end and time.monotonic() - last_flush >= FLUSH_EVERY_SEC)):
+            start = time.perf_counter()
+            store.add(batch)
+            store_secs += time.perf_counter() - start
+            batch = []
+            last_flush = time.monotonic()
+        if progress and n_total is not None:
+            # "+": todavía se está listando, el total puede crecer
+            print(f"\r{done_files}/{n_total}{'' if listed else '+'} ", end="", file=sys.stderr, flush=True)
+
+    prober.close()
+    if progress:
+        print(file=sys.stderr)
+    if finished[0] == "error":
+        print(f"error: scan failed: {finished[1]}", file=sys.stderr)
+        return 1
+
+    _, cancelled, stats = finished
+    if cancelled:
+        print("Scan cancelled.")
+    for root, error in stats.get("errors", ()):
+        print(f"warning: could not scan {root}: {error}", file=sys.stderr)
+    print(f"Added {added} new videos. Added time: {format_hms(added_seconds)}")
+    if moved:
+        print(f"Moved or renamed: {moved}")
+    if duplicates:
+        print(f"Skipped {duplicates} copies of videos already saved (see `duplicates`)")
+    if quarantined:
+        print(f"Could not measure {quarantined} files (see `quarantine`)")
+    if "cache_hits" in stats:
+        print(f"Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses")
+
+    metrics = stats["metrics"]
+    metrics.add_time("store", store_secs)
+    metrics.count("added", added)
+    metrics.count("moved", moved)
+    summary = metrics.summary()
+    try:
+        write_metrics(summary)
+    except OSError as e:
+        print(f"warning: could not write metrics: {e}", file=sys.stderr)
+    c = summary["counters"]
+    print(f"Seen {c['seen']}, already saved {c['skipped_known']}, copies {c['duplicates']}, "
+          f"already quarantined {c['skipped_quarantined']}, probed {c['probed']}, no duration {c['failed']}")
+    for line in format_summary(summary):
+        print(line)
+    if job.profile_path:
+        print(f"Profile written to {job.profile_path}")
+    return 130 if cancelled else 0
+
+
+def cmd_profiles(args, store, data, settings) -> int:
+    # Dict nuevo: no mutar el de DEFAULT_SETTINGS
+    profiles = dict(settings["scan_profiles"])
+    if args.name is None:
+        for name in sorted(profiles):
+            print(f"{name}\t{len(profiles[name])} folder(s)")
+        return 0
+
+    roots = list(profiles.get(args.name, []))
+    if args.delete:
+        if profiles.pop(args.name, None) is None:
+            print(f"error: no profile named {args.name!r}", file=sys.stderr)
+            return 2
+    elif args.add or args.remove:
+        path = os.path.abspath(args.add or args.remove)
+        roots = [r for r in roots if os.path.abspath(r["path"]) != path]
+        if args.add:
+            if not os.path.isdir(path):
+                print(f"error: not a folder: {path}", file=sys.stderr)
+                return 2
+            exts = sorted(parse_exts(args.exts)) if args.exts else []
+            roots.append({"path": path, "recursive": args.recursive, "exts": exts,
+                          "workers": max(0, min(args.workers, MAX_WORKERS))})
+        profiles[args.name] = roots
+    else:
+        if args.name not in profiles:
+            print(f"error: no profile named {args.name!r}", file=sys.stderr)
+            return 2
+        for r in roots:
+            exts = " ".join(r.get("exts") or sorted(VIDEO_EXTS))
+            print("\t".join((r["path"], "recursive" if r.get("recursive", True) else "top only",
+                             str(r.get("workers") or settings["scan_workers"]), exts)))
+        return 0
+
+    settings["scan_profiles"] = profiles
+    save_settings(settings)
+    return 0
+
+
+def cmd_add(args, store, data, settings) -> int:
+    sec = parse_manual_time_to_seconds(args.time)
+    if sec is None:
+        print("error: invalid format. Use m:ss (e.g., 2:34), h:mm:ss (e.g., 1:02:05) or whole minutes (e.g., 25).",
+              file=sys.stderr)
+        return 2
+    item = make_manual_item(sec, args.label.strip() or "Manual input", len(data["items"]))
+    data["items"].append(item)
+    store.add([item])
+    print(f"Added {format_hms(sec)} ({item['label']})")
+    return 0
+
+
+def cmd_import(args, store, data, settings) -> int:
+    if not os.path.isfile(args.file):
+        print(f"error: not a file: {args.file}", file=sys.stderr)
+        return 2
+    importer = Importer(args.file, store.known_ids(), args.format)
+    items = data["items"]
+    start = len(items)
+    added_seconds = 0.0
+    progress = sys.stderr.isatty()
+    cancelled = False
+    try:
+        for batch in importer.batches():
+            added_seconds += sum(it.duration_sec for it in batch)
+            if not args.dry_run:
+                items.extend(batch)
+            if progress:
+                pct = importer.read_bytes * 100 // max(importer.total_bytes, 1)
+                print(f"\r{importer.rows} records, {importer.added} new ({pct}%)", end="",
+                      file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        # Ctrl+C: se guarda lo leído; repetir el import saltea lo que ya entró
+        cancelled = True
+    except (OSError, ValueError) as e:
+        if progress:
+            print(file=sys.stderr)
+        print(f"error: could not import {args.file}: {e}", file=sys.stderr)
+        del items[start:]
+        return 1
+    if progress:
+        print(file=sys.stderr)
+
+    new = items[start:]
+    if new:
+        # Una sola escritura al final (un append del journal o una transacción de SQLite)
+        store.add(new)
+    for line, error in importer.errors:
+        print(f"warning: line {line}: {error}", file=sys.stderr)
+    if importer.invalid > len(importer.errors):
+        print(f"warning: {importer.invalid - len(importer.errors)} more invalid records", file=sys.stderr)
+    if cancelled:
+        print("Import cancelled.")
+    verb = "Would add" if args.dry_run else "Added"
+    print(f"{verb} {importer.added} records. Added time: {format_hms(added_seconds)}")
+    print(f"Already saved {importer.known}, invalid {importer.invalid}")
+    return 130 if cancelled else 0
+
+
+def cmd_total(args, store, data, settings) -> int:
+    agg = Aggregates.from_store(store)
+    if args.first or args.last:
+        first = args.first or date.min
+        last = args.last or date.today()
+        print(f"{first.isoformat() if args.first else '…'} → {last.isoformat()}: "
+              f"{format_hm(agg.range_sec(first, last))}")
+        return 0
+    print(f"Total:      {format_hm(agg.total_sec)}")
+    print(f"Videos:     {agg.videos}")
+    print(f"Manual:     {agg.manual}")
+    print(f"Today:      {format_hm(agg.today_sec())}")
+    print(f"This week:  {format_hm(agg.week_sec())}")
+    print(f"This month: {format_hm(agg.month_sec())}")
+    return 0
+
+
+def cmd_list(args, store, data, settings) -> int:
+    since = args.since.toordinal() if args.since else None
+    flt = HistoryFilter(args.search, args.type, folder=args.folder)
+    shown = 0
+    for it in store.recent_items():
+        if since is not None and day_of(it.get("added_at", 0)) < since:
+            break  # vienen ordenados del más nuevo al más viejo
+        if args.limit is not None and shown >= args.limit:
+            break
+        if flt and not flt.matches(it):
+            continue
+        added = time.strftime("%Y-%m-%d %H:%M", time.localtime(it.get("added_at", 0)))
+        dur = format_hms(float(it.get("duration_sec", 0.0) or 0.0))
+        print("\t".join((added, it.get("type", "video"), dur, it.get("label", ""), it.get("path", "") or "")))
+        shown += 1
+    return 0
+
+
+def cmd_report(args, store, data, settings) -> int:
+    # numpy solo para este comando: el resto del CLI arranca sin cargarlo
+    from report import ItemColumns, build_report, export
+
+    rows = build_report(ItemColumns(data["items"]), args.period, args.by, args.first, args.last, args.top)
+    if args.output:
+        export(rows, args.output, args.period, args.by)
+        print(f"Wrote {len(rows)} rows to {args.output}")
+        return 0
+    for r in rows:
+        print("\t".join((r["period"], *(r[k] or "-" for k in args.by), str(r["items"]), format_hms(r["seconds"]))))
+    return 0
+
+
+def cmd_watch(args, store, data, settings) -> int:
+    if args.folders:
+        folders = [(f, args.recursive) for f in args.folders]
+    else:
+        folders = [(w["path"], w.get("recursive", True)) for w in settings["watch_folders"]]
+    missing = [f for f, _ in folders if not os.path.isdir(f)]
+    if missing:
+        print(f"error: not a folder: {missing[0]}", file=sys.stderr)
+        return 2
+    if not folders:
+        print("error: no folders given and none saved in settings.json", file=sys.stderr)
+        return 2
+
+    prober = IsolatedProbe(settings["probe_timeout_sec"])
+    watcher = FolderWatcher(folders, store.known_ids(), prober,
+                            workers=args.workers or settings["scan_workers"], quarantine=Quarantine().load(),
+                            duplicates=DuplicateList().load() if settings["skip_duplicates"] else None)
+    watcher.start()
+    print(f"Watching {len(folders)} folder(s). Ctrl+C to stop.", file=sys.stderr)
+
+    batch = []
+    last_flush = time.monotonic()
+    status = 0
+    while True:
+        try:
+            msg = watcher.queue.get(timeout=0.5)
+        except queue.Empty:
+            msg = None
+        except KeyboardInterrupt:
+            break
+
+        if msg is not None:
+            if msg[0] == "error":
+                print(f"error: watcher stopped: {msg[1]}", file=sys.stderr)
+                status = 1
+                break
+            if msg[0] == "quarantined":
+                print(f"warning: could not measure {msg[1]}: {msg[2]}", file=sys.stderr)
+                continue
+            if msg[0] == "duplicate":
+                print(f"Skipped copy  {msg[1]}  (same as {msg[2]})", flush=True)
+                continue
+            item = make_video_item(*msg[1:])
+            data["items"].append(item)
+            batch.append(item)
+            print(f"Added {format_hms(item['duration_sec'])}  {item['path']}", flush=True)
+
+        if batch and time.monotonic() - last_flush >= FLUSH_EVERY_SEC:
+            store.add(batch)
+            batch = []
+            last_flush = time.monotonic()
+
+    watcher.stop()
+    watcher.join(timeout=5)
+    while True:
+        try:
+            msg = watcher.queue.get_nowait()
+        except queue.Empty:
+            break
+        if msg[0] == "item":
+            item = make_video_item(*msg[1:])
+            data["items"].append(item)
+            batch.append(item)
+    store.add(batch)
+    prober.close()
+    return status
+
+
+def cmd_quarantine(args, store, data, settings) -> int:
+    quarantine = Quarantine().load()
+    if args.retry_all or args.retry:
+        paths = list(quarantine.entries) if args.retry_all else args.retry
+        before = len(quarantine)
+        quarantine.discard(paths)
+        quarantine.save()
+        print(f"Removed {before - len(quarantine)} files from quarantine; the next scan retries them.")
+        return 0
+    for path, entry in quarantine.items():
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["at"]))
+        print("\t".join((when, path, entry["error"])))
+    return 0
+
+
+def cmd_duplicates(args, store, data, settings) -> int:
+    duplicates = DuplicateList().load()
+    if args.clear:
+        n = len(duplicates)
+        duplicates.discard(list(duplicates.entries))
+        duplicates.save()
+        print(f"Forgot {n} duplicates; the next scan checks them again.")
+        return 0
+    for path, entry in duplicates.items():
+        print("\t".join((path, entry["original"])))
+    return 0
+
+
+def cmd_serve(args, store, data, settings) -> int:
+    # http.server solo para este comando, igual que numpy en report
+    from server import DEFAULT_HOST, DEFAULT_PORT, serve
+
+    host = args.host or DEFAULT_HOST
+    port = DEFAULT_PORT if args.port is None else args.port
+
+    def ready(server):
+        bound = server.server_address
+        print(f"Serving on http://{bound[0]}:{bound[1]} ({len(data['items'])} items). Ctrl+C to stop.",
+              file=sys.stderr, flush=True)
+
+    if host not in ("127.0.0.1", "localhost", "::1") and not args.token:
+        print("warning: listening on a network address without --token; anyone who can reach it can add entries",
+              file=sys.stderr)
+    try:
+        serve(store, data, host, port, args.token, ready)
+    except OSError as e:
+        print(f"error: could not listen on {host}:{port}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+COMMANDS = {
+    "scan": cmd_scan,
+    "scan-all": cmd_scan_all,
+    "profiles": cmd_profiles,
+    "add": cmd_add,
+    "import": cmd_import,
+    "total": cmd_total,
+    "list": cmd_list,
+    "report": cmd_report,
+    "watch": cmd_watch,
+    "quarantine": cmd_quarantine,
+    "duplicates": cmd_duplicates,
+    "serve": cmd_serve,
+}
+
+
+def run(argv) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "scan":
+        args.folder = os.path.abspath(args.folder)  # antes del chdir
+        if args.profile:
+            args.profile = os.path.abspath(args.profile)
+    elif args.command == "watch":
+        args.folders = [os.path.abspath(f) for f in args.folders]
+    elif args.command == "profiles" and (args.add or args.remove):
+        args.add = args.add and os.path.abspath(args.add)
+        args.remove = args.remove and os.path.abspath(args.remove)
+    elif args.command == "import":
+        args.file = os.path.abspath(args.file)
+    elif args.command == "report" and args.output:
+        args.output = os.path.abspath(args.output)
+    elif args.command == "quarantine" and args.retry:
+        args.retry = [os.path.abspath(p) for p in args.retry]
+    try:
+        os.chdir(args.data_dir)
+    except OSError as e:
+        print(f"error: cannot use data dir {args.data_dir}: {e}", file=sys.stderr)
+        return 1
+
+    settings = load_settings()
+    store = open_store(settings["storage"])
+    data = store.load()
+    try:
+        return COMMANDS[args.command](args, store, data, settings)
+    finally:
+        store.close()
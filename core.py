@@ -0,0 +1,114 @@
+import os
+import json
+import time
+
+from items import Item
+from probe import PROBE_TIMEOUT_SECS, decoder_duration_seconds, header_duration_seconds
+from scanner import DEFAULT_WORKERS
+
+APP_SETTINGS_FILE = "settings.json"
+
+
+# -------------------------
+# Helpers
+# -------------------------
+def now_ts() -> int:
+    return int(time.time())
+
+
+DEFAULT_SETTINGS = {
+    "scan_workers": DEFAULT_WORKERS,
+    "scan_use_processes": False,
+    "storage": "json",  # "json", "sqlite" o "binary"
+    "watch_folders": [],  # [{"path": ..., "recursive": bool}] que se agregan solos
+    # nombre -> [{"path", "recursive", "exts": [...] (vacío = VIDEO_EXTS), "workers" (0 = scan_workers)}]
+    "scan_profiles": {},
+    "scan_profile": "",  # el último elegido en la ventana
+    "probe_timeout_sec": PROBE_TIMEOUT_SECS,  # tope por archivo para el camino de ffmpeg
+    "skip_duplicates": True,  # copias idénticas en otras carpetas no se suman (ver duplicates.json)
+    "profile_next_scan": False,  # True: el próximo escaneo se perfila con cProfile (y vuelve a False)
+}
+
+
+def load_settings():
+    settings = dict(DEFAULT_SETTINGS)
+    if os.path.exists(APP_SETTINGS_FILE):
+        try:
+            with open(APP_SETTINGS_FILE, "r", encoding="utf-8") as f:
+                settings.update(json.load(f))
+        except Exception:
+            pass
+    return settings
+
+
+def save_settings(settings):
+    with open(APP_SETTINGS_FILE, "w", encoding="utf-8") as f:
+        json.dump(settings, f, ensure_ascii=False, indent=2)
+
+
+def format_hms(seconds: float) -> str:
+    s = int(round(seconds))
+    h = s // 3600
+    m = (s % 3600) // 60
+    sec = s % 60
+    return f"{h:02d}:{m:02d}:{sec:02d}"
+
+
+def format_hm(seconds: float) -> str:
+    s = int(round(seconds))
+    h = s // 3600
+    m = (s % 3600) // 60
+    return f"{h}h {m}m"
+
+
+def safe_video_duration_seconds(path: str) -> float:
+    # Camino rápido: solo la cabecera del contenedor. ffmpeg queda de respaldo.
+    dur = header_duration_seconds(path)
+    if dur is not None:
+        return dur
+    try:
+        return decoder_duration_seconds(path)
+    except Exception:
+        return 0.0
+
+
+def parse_manual_time_to_seconds(s: str) -> float | None:
+    """
+    Acepta:
+      - "m:ss"    (2:34)
+      - "mm:ss"   (12:05)
+      - "h:mm:ss" (1:02:05)
+      - "m" o "mm" (solo minutos) (25)
+    Lo comparten la carga manual y la importación (importer.py).
+    """
+    s = s.strip()
+    if not s:
+        return None
+
+    if ":" in s:
+        parts = [p.strip() for p in s.split(":")]
+        if len(parts) > 3 or not all(p.isdigit() for p in parts):
+            return None
+        # El primer campo no tiene tope (90:00 vale); los de después son < 60
+        if any(int(p) >= 60 for p in parts[1:]):
+            return None
+        total = 0
+        for p in parts:
+            total = total * 60 + int(p)
+        return float(total) if total > 0 else None
+
+    # solo minutos
+    if s.isdigit():
+        m = int(s)
+        total = m * 60
+        return float(total) if total > 0 else None
+
+    return None
+
+
+def make_video_item(fid: str, path: str, dur: float):
+    return Item(fid, "video", os.path.basename(path), dur, now_ts(), path)
+
+
+def make_manual_item(sec: float, label: str, n_items: int):
+    return Item(f"manual-{now_ts()}-{n_items}", "manual", label, float(sec), now_ts(), "")
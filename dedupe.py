@@ -0,0 +1,165 @@
+import hashlib
+from collections import defaultdict
+
+from cache import SAMPLE_BYTES, sampled_hash
+from quarantine import SkipList
+
+APP_DUPLICATES_FILE = "duplicates.json"
+FULL_HASH_CHUNK = 1 << 20
+
+
+def full_hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(FULL_HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def saved_video_sizes(known_ids, sizes: set):
+    """(path, size) de los videos guardados cuyo tamaño está en sizes; sale del id, sin stat."""
+    for fid in known_ids:
+        parts = fid.rsplit("|", 2)
+        if len(parts) == 3 and parts[1].isdigit() and int(parts[1]) in sizes:
+            yield parts[0], int(parts[1])
+
+
+def _group(paths, key_fn):
+    groups = defaultdict(list)
+    for p in paths:
+        try:
+            groups[key_fn(p)].append(p)
+        except OSError:
+            continue  # un guardado que ya no existe no es original de nadie
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def find_duplicates(new_files, saved) -> dict:
+    """
+    new_files: (path, size) a punto de agregarse; saved: (path, size) ya guardados.
+    Devuelve {path nuevo: path original} para las copias confirmadas.
+
+    Por etapas, leyendo lo mínimo: tamaño (gratis, viene del listado), hash de
+    bloques de cabeza y cola, y hash completo solo si esos coinciden. Entre
+    copias gana el guardado; entre nuevas, la primera en orden.
+    """
+    new_files = list(new_files)
+    by_size = defaultdict(list)
+    for p, size in new_files:
+        if size > 0:
+            by_size[size].append(p)
+    is_new = {p for p, _ in new_files}
+    rank = {p: i for i, (p, _) in enumerate(new_files)}
+    for p, size in saved:
+        if size in by_size and p not in is_new:
+            by_size[size].insert(0, p)
+            rank[p] = -1
+
+    dups = {}
+    for size, paths in by_size.items():
+        if len(paths) < 2 or not any(p in is_new for p in paths):
+            continue
+        for same_sample in _group(paths, lambda p: sampled_hash(p, size)):
+            # Hasta 2 bloques el hash de muestra ya cubrió el archivo entero
+            same_content = [same_sample] if size <= 2 * SAMPLE_BYTES else _group(same_sample, full_hash)
+            for copies in same_content:
+                copies.sort(key=rank.__getitem__)
+                for p in copies[1:]:
+                    if p in is_new:
+                        dups[p] = copies[0]
+    return dups
+
+
+class DuplicateFinder:
+    """
+    find_duplicates de a un archivo, para el escaneo en streaming: check()
+    recibe los nuevos en el orden en que aparecen y devuelve el original si
+    el archivo es copia de un guardado o de un nuevo anterior (mismo criterio:
+    gana el guardado, entre nuevos el primero). Un tamaño se empieza a
+    hashear recién cuando aparece un segundo archivo con él; desde ahí sus
+    archivos quedan agrupados por hash de muestra.
+    """
+
+    def __init__(self, known_ids=()):
+        # tamaño -> fid guardado (o lista, si hay varios): el path sale del fid recién al comparar
+        self.saved = {}
+        for fid in known_ids:
+            parts = fid.rsplit("|", 2)
+            if len(parts) == 3 and parts[1].isdigit():
+                _put(self.saved, int(parts[1]), fid)
+        self.first = {}   # tamaño -> único path nuevo con ese tamaño, mientras no haya grupos
+        self.groups = {}  # tamaño -> {hash de muestra: [paths, guardados primero]}
+        self.fulls = {}
+
+    def _groups(self, size: int) -> dict:
+        groups = self.groups.get(size)
+        if groups is None:
+            groups = self.groups[size] = {}
+            members = [fid.rsplit("|", 2)[0] for fid in _get(self.saved, size)]
+            if size in self.first:
+                members.append(self.first.pop(size))
+            for p in members:
+                try:
+                    groups.setdefault(sampled_hash(p, size), []).append(p)
+                except OSError:
+                    continue  # un guardado que ya no existe no es original de nadie
+        return groups
+
+    def _full(self, path: str):
+        if path not in self.fulls:
+            try:
+                self.fulls[path] = full_hash(path)
+            except OSError:
+                self.fulls[path] = None
+        return self.fulls[path]
+
+    def check(self, path: str, size: int) -> str | None:
+        if size <= 0:
+            return None
+        if size not in self.groups and size not in self.first and size not in self.saved:
+            self.first[size] = path
+            return None
+        groups = self._groups(size)
+        try:
+            sample = sampled_hash(path, size)
+        except OSError:
+            return None
+        same = groups.setdefault(sample, [])
+        for original in same:
+            if original == path:
+                continue
+            # Hasta 2 bloques el hash de muestra ya cubrió el archivo entero
+            if size <= 2 * SAMPLE_BYTES:
+                return original
+            full = self._full(path)
+            if full is not None and full == self._full(original):
+                return original
+        same.append(path)
+        return None
+
+
+def _put(table: dict, key, value):
+    old = table.get(key)
+    if old is None:
+        table[key] = value
+    elif type(old) is list:
+        old.append(value)
+    else:
+        table[key] = [old, value]
+
+
+def _get(table: dict, key) -> list:
+    value = table.get(key)
+    if value is None:
+        return []
+    return value if type(value) is list else [value]
+
+
+class DuplicateList(SkipList):
+    """Copias confirmadas que no se suman; se saltean mientras no cambien."""
+
+    def __init__(self, path: str = APP_DUPLICATES_FILE):
+        super().__init__(path)
+
+    def add(self, path: str, original: str, size: int | None = None, mtime: float | None = None):
+        self._put(path, size, mtime, original=original)
@@ -0,0 +1,1580 @@
+import os
+import time
+import queue
+import tkinter as tk
+from datetime import date
+from tkinter import ttk, filedialog, messagebox, simpledialog
+
+from aggregates import Aggregates
+from cache import ProbeCache
+from core import (format_hm, format_hms, load_settings, make_manual_item, make_video_item,
+                  parse_manual_time_to_seconds, save_settings)
+from metrics import APP_PROFILE_FILE, PHASES, format_summary, write_metrics
+from dedupe import DuplicateList
+from probe import IsolatedProbe
+from quarantine import Quarantine
+from search import HistoryFilter
+from items import ItemIndex, replaced
+from scanner import DEFAULT_WORKERS, MAX_WORKERS, DirSnapshots, MultiScanJob, ScanJob, parse_exts, profile_roots
+from storage import WriteBehindStore, open_store
+from table import HistoryTable
+from watcher import FolderWatcher
+
+SCAN_POLL_MS = 50
+SCAN_MSGS_PER_TICK = 200
+CARDS_TICK_MS = 60_000
+WATCH_POLL_MS = 500
+# Espera desde la última tecla antes de filtrar
+FILTER_DEBOUNCE_MS = 150
+# El Treeview del reporte muestra como mucho esto; el export lleva todo
+PREVIEW_ROWS = 2000
+
+
+# -------------------------
+# i18n
+# -------------------------
+I18N = {
+    "es": {
+        "app_title": "WorkHours Tracker",
+        "header_title": "Registro de horas trabajadas",
+        "header_sub": "Suma automáticamente duraciones de videos y también permite agregar tiempo manual.",
+        "card_total": "Total acumulado",
+        "card_videos": "Videos guardados",
+        "card_manual": "Entradas manuales",
+        "card_today": "Hoy",
+        "card_week": "Esta semana",
+        "card_month": "Este mes",
+        "actions": "Acciones",
+        "folder_title": "Carpeta de videos",
+        "choose": "Elegir…",
+        "include_sub": "Incluir subcarpetas",
+        "scan_workers": "Lecturas en paralelo:",
+        "scan_save": "Escanear carpeta y guardar nuevos videos",
+        "cancel": "Cancelar",
+        "profile_pick": "Perfil:",
+        "profiles_edit": "Perfiles…",
+        "scan_all": "Escanear todas las carpetas del perfil",
+        "profiles_title": "Perfiles de escaneo",
+        "profiles_name": "Perfil:",
+        "profiles_exts": "Extensiones (vacío = videos):",
+        "profiles_workers": "Lecturas en paralelo (0 = general):",
+        "profiles_add": "Agregar carpeta…",
+        "profiles_remove": "Quitar seleccionadas",
+        "profiles_save": "Guardar perfil",
+        "profiles_delete": "Borrar perfil",
+        "profiles_default": "por defecto",
+        "col_recursive": "Subcarpetas",
+        "col_exts": "Extensiones",
+        "col_workers": "Lecturas",
+        "yes": "Sí",
+        "no": "No",
+        "err_profile": "Elige un perfil con al menos una carpeta.",
+        "err_profile_name": "Escribe un nombre para el perfil.",
+        "scan_root_failed": "No se pudo escanear {root}: {e}",
+        "watch": "Vigilar esta carpeta (agregar solos los nuevos)",
+        "manual_title": "Agregar tiempo manual",
+        "manual_time": "Tiempo (m:ss):",
+        "manual_desc": "Descripción:",
+        "manual_add": "Agregar a la lista",
+        "manage": "Gestión",
+        "delete_selected": "Eliminar seleccionados",
+        "relabel": "Cambiar descripción…",
+        "retype": "Cambiar tipo",
+        "undo": "Deshacer último cambio",
+        "relabel_title": "Cambiar descripción",
+        "relabel_prompt": "Nueva descripción para {n} items:",
+        "reset_all": "Resetear TODO",
+        "quarantine": "Archivos con error ({n})",
+        "report": "Reportes y exportación…",
+        "report_title": "Reporte de horas",
+        "report_period": "Período:",
+        "report_by": "Agrupar por:",
+        "report_top": "Top por período (0 = todos):",
+        "report_from": "Desde (AAAA-MM-DD):",
+        "report_to": "Hasta:",
+        "report_refresh": "Actualizar",
+        "report_export": "Exportar CSV / JSON…",
+        "report_saved": "Reporte guardado en {path}",
+        "period_day": "Día",
+        "period_week": "Semana",
+        "period_month": "Mes",
+        "period_total": "Total",
+        "by_folder": "Carpeta",
+        "by_type": "Tipo",
+        "by_label": "Descripción",
+        "col_period": "Período",
+        "col_items": "Items",
+        "err_date": "Fecha inválida, usa AAAA-MM-DD.",
+        "quarantine_title": "Archivos que no se pudieron medir",
+        "quarantine_retry": "Reintentar en el próximo escaneo",
+        "close": "Cerrar",
+        "col_error": "Error",
+        "col_when": "Fecha",
+        "tip": "Tip: la app carga tus datos al abrir.\nNo necesitas escanear de nuevo.",
+        "history": "Historial",
+        "col_type": "Tipo",
+        "col_desc": "Descripción",
+        "col_dur": "Duración",
+        "col_path": "Ruta",
+        "type_video": "Video",
+        "type_manual": "Manual",
+        "filter_search": "Buscar:",
+        "filter_all": "Todos",
+        "filter_from": "Desde:",
+        "filter_to": "Hasta:",
+        "filter_folder": "Carpeta:",
+        "filter_clear": "Limpiar",
+        "filter_summary": "Mostrando {n} de {total} · {t}",
+        "filter_indexing": "Indexando el historial…",
+        "err": "Error",
+        "err_folder": "Selecciona una carpeta válida.",
+        "err_time_format": "Formato inválido. Usa m:ss (ej: 2:34), h:mm:ss (ej: 1:02:05) o minutos enteros (ej: 25).",
+        "err_time_positive": "El tiempo debe ser mayor que 0.",
+        "info": "Info",
+        "pick_row": "Selecciona uno o más items en la tabla (Ctrl+A: todos los que se ven).",
+        "confirm": "Confirmar",
+        "confirm_delete": "¿Eliminar {n} items seleccionados?",
+        "confirm_reset": "¿Seguro que quieres borrar TODO el historial?",
+        "done": "Listo",
+        "scan_added": "Agregados {n} videos nuevos.\nTiempo añadido: {t}",
+        "scan_cancelled": "Escaneo cancelado.",
+        "scan_moved": "Movidos o renombrados: {n}",
+        "scan_cache": "Caché: {hits} aciertos, {misses} fallos",
+        "scan_progress": "{done} de {total}",
+        "scan_progress_listing": "{done} de {total}+ (buscando archivos…)",
+        "scan_counts": "Vistos {seen} · ya guardados {skipped} · copias {duplicates} · ya en cuarentena {quarantined} · medidos {probed} · sin duración {failed}",
+        "scan_profile": "Perfil guardado en {path}",
+        "scan_quarantined": "No se pudieron medir {n} archivos (ver «Archivos con error»).",
+        "scan_duplicates": "Copias de videos ya guardados (no se suman): {n}",
+        "phase_list": "listado",
+        "phase_filter": "filtro",
+        "phase_cache": "caché",
+        "phase_probe": "lectura",
+        "phase_store": "guardado",
+        "phase_table": "tabla",
+        "watch_failed": "Se detuvo la vigilancia de carpetas:\n{e}",
+        "scan_failed": "El escaneo falló: {e}",
+        "save_failed": "No se pudieron guardar los últimos cambios: {e}",
+        "saved": "Guardado",
+        "saved_msg": "Se guardaron {n} items.",
+        "warn": "Aviso",
+        "warn_not_found": "No se encontró el item en los datos (raro).",
+        "lang_btn": "EN",
+        "manual_default": "entrada manual",
+    },
+    "en": {
+        "app_title": "WorkHours Tracker",
+        "header_title": "Worked hours tracker",
+        "header_sub": "Automatically sums video durations and lets you add manual time.",
+        "card_total": "Total",
+        "card_videos": "Saved videos",
+        "card_manual": "Manual entries",
+        "card_today": "Today",
+        "card_week": "This week",
+        "card_month": "This month",
+        "actions": "Actions",
+        "folder_title": "Video folder",
+        "choose": "Browse…",
+        "include_sub": "Include subfolders",
+        "scan_workers": "Parallel probes:",
+        "scan_save": "Scan folder and save new videos",
+        "cancel": "Cancel",
+        "profile_pick": "Profile:",
+        "profiles_edit": "Profiles…",
+        "scan_all": "Scan all folders in the profile",
+        "profiles_title": "Scan profiles",
+        "profiles_name": "Profile:",
+        "profiles_exts": "Extensions (empty = videos):",
+        "profiles_workers": "Parallel probes (0 = general):",
+        "profiles_add": "Add folder…",
+        "profiles_remove": "Remove selected",
+        "profiles_save": "Save profile",
+        "profiles_delete": "Delete profile",
+        "profiles_default": "default",
+        "col_recursive": "Subfolders",
+        "col_exts": "Extensions",
+        "col_workers": "Probes",
+        "yes": "Yes",
+        "no": "No",
+        "err_profile": "Choose a profile with at least one folder.",
+        "err_profile_name": "Type a name for the profile.",
+        "scan_root_failed": "Could not scan {root}: {e}",
+        "watch": "Watch this folder (auto-add new videos)",
+        "manual_title": "Add manual time",
+        "manual_time": "Time (m:ss):",
+        "manual_desc": "Description:",
+        "manual_add": "Add to list",
+        "manage": "Manage",
+        "delete_selected": "Delete selected",
+        "relabel": "Change description…",
+        "retype": "Change type",
+        "undo": "Undo last change",
+        "relabel_title": "Change description",
+        "relabel_prompt": "New description for {n} items:",
+        "reset_all": "Reset ALL",
+        "quarantine": "Files with errors ({n})",
+        "report": "Reports and export…",
+        "report_title": "Hours report",
+        "report_period": "Period:",
+        "report_by": "Group by:",
+        "report_top": "Top per period (0 = all):",
+        "report_from": "From (YYYY-MM-DD):",
+        "report_to": "To:",
+        "report_refresh": "Refresh",
+        "report_export": "Export CSV / JSON…",
+        "report_saved": "Report saved to {path}",
+        "period_day": "Day",
+        "period_week": "Week",
+        "period_month": "Month",
+        "period_total": "Total",
+        "by_folder": "Folder",
+        "by_type": "Type",
+        "by_label": "Description",
+        "col_period": "Period",
+        "col_items": "Items",
+        "err_date": "Invalid date, use YYYY-MM-DD.",
+        "quarantine_title": "Files that could not be measured",
+        "quarantine_retry": "Retry on next scan",
+        "close": "Close",
+        "col_error": "Error",
+        "col_when": "Date",
+        "tip": "Tip: the app loads your data on startup.\nNo need to scan again.",
+        "history": "History",
+        "col_type": "Type",
+        "col_desc": "Description",
+        "col_dur": "Duration",
+        "col_path": "Path",
+        "type_video": "Video",
+        "type_manual": "Manual",
+        "filter_search": "Search:",
+        "filter_all": "All",
+        "filter_from": "From:",
+        "filter_to": "To:",
+        "filter_folder": "Folder:",
+        "filter_clear": "Clear",
+        "filter_summary": "Showing {n} of {total} · {t}",
+        "filter_indexing": "Indexing history…",
+        "err": "Error",
+        "err_folder": "Choose a valid folder.",
+        "err_time_format": "Invalid format. Use m:ss (e.g., 2:34), h:mm:ss (e.g., 1:02:05) or whole minutes (e.g., 25).",
+        "err_time_positive": "Time must be greater than 0.",
+        "info": "Info",
+        "pick_row": "Select one or more items in the table (Ctrl+A: all shown).",
+        "confirm": "Confirm",
+        "confirm_delete": "Delete the {n} selected items?",
+        "confirm_reset": "Are you sure you want to delete ALL history?",
+        "done": "Done",
+        "scan_added": "Added {n} new videos.\nAdded time: {t}",
+        "scan_cancelled": "Scan cancelled.",
+        "scan_moved": "Moved or renamed: {n}",
+        "scan_cache": "Cache: {hits} hits, {misses} misses",
+        "scan_progress": "{done} of {total}",
+        "scan_progress_listing": "{done} of {total}+ (still finding files…)",
+        "scan_counts": "Seen {seen} · already saved {skipped} · copies {duplicates} · already quarantined {quarantined} · probed {probed} · no duration {failed}",
+        "scan_profile": "Profile written to {path}",
+        "scan_quarantined": "{n} files could not be measured (see \"Files with errors\").",
+        "scan_duplicates": "Copies of videos already saved (not counted): {n}",
+        "phase_list": "listing",
+        "phase_filter": "filter",
+        "phase_cache": "cache",
+        "phase_probe": "probe",
+        "phase_store": "save",
+        "phase_table": "table",
+        "watch_failed": "Folder watching stopped:\n{e}",
+        "scan_failed": "Scan failed: {e}",
+        "save_failed": "Could not save the latest changes: {e}",
+        "saved": "Saved",
+        "saved_msg": "Saved {n} items.",
+        "warn": "Warning",
+        "warn_not_found": "Item not found in data (weird).",
+        "lang_btn": "ES",
+        "manual_default": "Manual input",
+    }
+}
+
+
+# -------------------------
+# App
+# -------------------------
+class App(tk.Tk):
+    def __init__(self):
+        super().__init__()
+
+        self.lang = "es"
+        self.t = lambda k: I18N[self.lang][k]
+
+        self.settings = load_settings()
+        # Las ediciones se escriben en otro hilo, agrupadas: la ventana no espera al disco
+        self.store = WriteBehindStore(open_store(self.settings["storage"]))
+        self.data = self.store.load()
+        self.scan_job = None
+        self.item_index = None  # ItemIndex de data["items"], armado con la primera edición en lote
+        self.undo = None        # (tipo, datos) de la última edición en lote
+        self.probe_cache = None
+        self.dir_snapshots = None
+        self.quarantine = Quarantine().load()
+        self.duplicates = DuplicateList().load() if self.settings["skip_duplicates"] else None
+        self.prober = IsolatedProbe(self.settings["probe_timeout_sec"])
+        self.watcher = None
+        self._watch_after = None
+        self.agg = Aggregates()
+
+        self._setup_style()
+        self._build_ui()
+
+        self.refresh_table_and_totals()
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(CARDS_TICK_MS, self._tick_cards)
+        self._restart_watcher()
+
+    def _setup_style(self):
+        self.configure(bg="#121212")
+        style = ttk.Style(self)
+        style.theme_use("clam")
+
+        style.configure("TFrame", background="#121212")
+        style.configure("Card.TFrame", background="#1b1b1b")
+        style.configure("TLabel", background="#121212", foreground="#eaeaea")
+        style.configure("Title.TLabel", font=("Segoe UI", 16, "bold"))
+        style.configure("Sub.TLabel", font=("Segoe UI", 10), foreground="#cfcfcf")
+        style.configure("CardTitle.TLabel", background="#1b1b1b", foreground="#eaeaea",
+                        font=("Segoe UI", 11, "bold"))
+        style.configure("CardText.TLabel", background="#1b1b1b", foreground="#d8d8d8",
+                        font=("Segoe UI", 10))
+
+        style.configure("TButton", font=("Segoe UI", 10), padding=8)
+
+        style.configure("Treeview",
+                        background="#1b1b1b",
+                        fieldbackground="#1b1b1b",
+                        foreground="#eaeaea",
+                        rowheight=28,
+                        borderwidth=0)
+        style.configure("Treeview.Heading",
+                        background="#242424",
+                        foreground="#eaeaea",
+                        font=("Segoe UI", 10, "bold"))
+        style.map("Treeview", background=[("selected", "#2e2e2e")])
+
+        style.configure("TProgressbar", troughcolor="#242424", bordercolor="#242424", background="#4a90e2")
+
+    def _build_ui(self):
+        self.title(self.t("app_title"))
+        self.geometry("860x640")
+        self.minsize(860, 640)
+
+        root = ttk.Frame(self)
+        root.pack(fill="both", expand=True, padx=16, pady=16)
+
+        # Header row with language button
+        header = ttk.Frame(root)
+        header.pack(fill="x", pady=(0, 12))
+
+        header_left = ttk.Frame(header)
+        header_left.pack(side="left", fill="x", expand=True)
+
+        self.lbl_header_title = ttk.Label(header_left, text=self.t("header_title"), style="Title.TLabel")
+        self.lbl_header_title.pack(anchor="w")
+
+        self.lbl_header_sub = ttk.Label(header_left, text=self.t("header_sub"), style="Sub.TLabel")
+        self.lbl_header_sub.pack(anchor="w", pady=(4, 0))
+
+        header_right = ttk.Frame(header)
+        header_right.pack(side="right")
+
+        self.btn_lang = ttk.Button(header_right, text=self.t("lang_btn"), command=self.toggle_language, width=6)
+        self.btn_lang.pack(anchor="e")
+
+        # Cards row
+        cards = ttk.Frame(root)
+        cards.pack(fill="x", pady=(0, 12))
+
+        self.card_total = self._make_card(cards, self.t("card_total"), "0h 0m")
+        self.card_videos = self._make_card(cards, self.t("card_videos"), "0")
+        self.card_manual = self._make_card(cards, self.t("card_manual"), "0")
+
+        self.card_total.pack(side="left", fill="x", expand=True, padx=(0, 8))
+        self.card_videos.pack(side="left", fill="x", expand=True, padx=8)
+        self.card_manual.pack(side="left", fill="x", expand=True, padx=(8, 0))
+
+        # Period cards row
+        periods = ttk.Frame(root)
+        periods.pack(fill="x", pady=(0, 12))
+
+        self.card_today = self._make_card(periods, self.t("card_today"), "0h 0m")
+        self.card_week = self._make_card(periods, self.t("card_week"), "0h 0m")
+        self.card_month = self._make_card(periods, self.t("card_month"), "0h 0m")
+
+        self.card_today.pack(side="left", fill="x", expand=True, padx=(0, 8))
+        self.card_week.pack(side="left", fill="x", expand=True, padx=8)
+        self.card_month.pack(side="left", fill="x", expand=True, padx=(8, 0))
+
+        # Main split
+        main = ttk.Frame(root)
+        main.pack(fill="both", expand=True)
+
+        left = ttk.Frame(main, style="Card.TFrame")
+        left.pack(side="left", fill="y", padx=(0, 12))
+        right = ttk.Frame(main, style="Card.TFrame")
+        right.pack(side="left", fill="both", expand=True)
+
+        # Left title
+        self.lbl_actions = ttk.Label(left, text=self.t("actions"), style="CardTitle.TLabel")
+        self.lbl_actions.pack(anchor="w", padx=12, pady=(12, 6))
+
+        # Folder / scan
+        folder_box = ttk.Frame(left, style="Card.TFrame")
+        folder_box.pack(fill="x", padx=12, pady=(0, 10))
+
+        self.lbl_folder = ttk.Label(folder_box, text=self.t("folder_title"), style="CardText.TLabel")
+        self.lbl_folder.pack(anchor="w")
+
+        self.folder_var = tk.StringVar(value="")
+        folder_row = ttk.Frame(folder_box, style="Card.TFrame")
+        folder_row.pack(fill="x", pady=(6, 0))
+
+        self.folder_entry = ttk.Entry(folder_row, textvariable=self.folder_var)
+        self.folder_entry.pack(side="left", fill="x", expand=True)
+
+        self.btn_choose = ttk.Button(folder_row, text=self.t("choose"), command=self.pick_folder)
+        self.btn_choose.pack(side="left", padx=(8, 0))
+
+        self.include_sub_var = tk.BooleanVar(value=True)
+        self.chk_sub = ttk.Checkbutton(folder_box, text=self.t("include_sub"), variable=self.include_sub_var)
+        self.chk_sub.pack(anchor="w", pady=(8, 0))
+
+        self.watch_var = tk.BooleanVar(value=False)
+        self.chk_watch = ttk.Checkbutton(folder_box, text=self.t("watch"), variable=self.watch_var,
+                                         command=self.toggle_watch)
+        self.chk_watch.pack(anchor="w", pady=(4, 0))
+        self.folder_var.trace_add("write", lambda *_: self._sync_watch_check())
+
+        workers_row = ttk.Frame(folder_box, style="Card.TFrame")
+        workers_row.pack(fill="x", pady=(8, 0))
+
+        self.lbl_workers = ttk.Label(workers_row, text=self.t("scan_workers"), style="CardText.TLabel")
+        self.lbl_workers.pack(side="left")
+
+        self.workers_var = tk.IntVar(value=self.settings["scan_workers"])
+        self.spin_workers = ttk.Spinbox(workers_row, from_=1, to=MAX_WORKERS, width=5,
+                                        textvariable=self.workers_var)
+        self.spin_workers.pack(side="left", padx=(8, 0))
+
+        self.btn_scan = ttk.Button(folder_box, text=self.t("scan_save"), command=self.scan_and_save)
+        self.btn_scan.pack(fill="x", pady=(10, 0))
+
+        # Perfil: varias carpetas escaneadas a la vez
+        profile_row = ttk.Frame(folder_box, style="Card.TFrame")
+        profile_row.pack(fill="x", pady=(10, 0))
+
+        self.lbl_profile = ttk.Label(profile_row, text=self.t("profile_pick"), style="CardText.TLabel")
+        self.lbl_profile.pack(side="left")
+
+        self.profile_var = tk.StringVar(value=self.settings["scan_profile"])
+        self.cmb_profile = ttk.Combobox(profile_row, textvariable=self.profile_var, state="readonly", width=16,
+                                        values=sorted(self.settings["scan_profiles"]))
+        self.cmb_profile.pack(side="left", fill="x", expand=True, padx=(8, 0))
+
+        self.btn_profiles = ttk.Button(profile_row, text=self.t("profiles_edit"), command=self.show_profiles)
+        self.btn_profiles.pack(side="left", padx=(8, 0))
+
+        self.btn_scan_all = ttk.Button(folder_box, text=self.t("scan_all"), command=self.scan_profile)
+        self.btn_scan_all.pack(fill="x", pady=(8, 0))
+
+        # Mini progress bar + cancel (hidden until scan)
+        self.progress = ttk.Progressbar(folder_box, mode="determinate", length=260)
+        self.progress.pack(fill="x", pady=(8, 0))
+        self.progress.pack_forget()
+        self.lbl_progress = ttk.Label(folder_box, text="", style="CardText.TLabel")
+
+        self.btn_cancel = ttk.Button(folder_box, text=self.t("cancel"), command=self.cancel_scan)
+        self.btn_cancel.pack(fill="x", pady=(8, 0))
+        self.btn_cancel.pack_forget()
+
+        # Manual add
+        manual_box = ttk.Frame(left, style="Card.TFrame")
+        manual_box.pack(fill="x", padx=12, pady=(0, 10))
+
+        self.lbl_manual_title = ttk.Label(manual_box, text=self.t("manual_title"), style="CardText.TLabel")
+        self.lbl_manual_title.pack(anchor="w")
+
+        row1 = ttk.Frame(manual_box, style="Card.TFrame")
+        row1.pack(fill="x", pady=(6, 0))
+
+        self.lbl_manual_time = ttk.Label(row1, text=self.t("manual_time"), style="CardText.TLabel")
+        self.lbl_manual_time.pack(side="left")
+
+        self.manual_time = tk.StringVar(value="")
+        ttk.Entry(row1, textvariable=self.manual_time, width=12).pack(side="left", padx=(8, 0))
+
+        row2 = ttk.Frame(manual_box, style="Card.TFrame")
+        row2.pack(fill="x", pady=(6, 0))
+
+        self.lbl_manual_desc = ttk.Label(row2, text=self.t("manual_desc"), style="CardText.TLabel")
+        self.lbl_manual_desc.pack(side="left")
+
+        self.manual_label = tk.StringVar(value=self.t("manual_default"))
+        ttk.Entry(row2, textvariable=self.manual_label).pack(side="left", fill="x", expand=True, padx=(8, 0))
+
+        self.btn_manual_add = ttk.Button(manual_box, text=self.t("manual_add"), command=self.add_manual)
+        self.btn_manual_add.pack(fill="x", pady=(10, 0))
+
+        # Manage
+        manage_box = ttk.Frame(left, style="Card.TFrame")
+        manage_box.pack(fill="x", padx=12, pady=(0, 12))
+
+        self.lbl_manage = ttk.Label(manage_box, text=self.t("manage"), style="CardText.TLabel")
+        self.lbl_manage.pack(anchor="w")
+
+        self.btn_delete = ttk.Button(manage_box, text=self.t("delete_selected"), command=self.delete_selected)
+        self.btn_delete.pack(fill="x", pady=(8, 0))
+
+        self.btn_relabel = ttk.Button(manage_box, text=self.t("relabel"), command=self.relabel_selected)
+        self.btn_relabel.pack(fill="x", pady=(8, 0))
+
+        self.retype_menu = tk.Menu(self, tearoff=False)
+        self.retype_menu.add_command(label=self.t("type_video"), command=lambda: self.retype_selected("video"))
+        self.retype_menu.add_command(label=self.t("type_manual"), command=lambda: self.retype_selected("manual"))
+        self.btn_retype = ttk.Menubutton(manage_box, text=self.t("retype"), menu=self.retype_menu)
+        self.btn_retype.pack(fill="x", pady=(8, 0))
+
+        self.btn_undo = ttk.Button(manage_box, text=self.t("undo"), command=self.undo_last, state="disabled")
+        self.btn_undo.pack(fill="x", pady=(8, 0))
+
+        self.btn_reset = ttk.Button(manage_box, text=self.t("reset_all"), command=self.reset_all)
+        self.btn_reset.pack(fill="x", pady=(8, 0))
+
+        self.btn_quarantine = ttk.Button(manage_box, text=self.t("quarantine").format(n=len(self.quarantine)),
+                                         command=self.show_quarantine)
+        self.btn_quarantine.pack(fill="x", pady=(8, 0))
+
+        self.btn_report = ttk.Button(manage_box, text=self.t("report"), command=self.show_report)
+        self.btn_report.pack(fill="x", pady=(8, 0))
+
+        self.lbl_tip = ttk.Label(left, text=self.t("tip"), style="CardText.TLabel")
+        self.lbl_tip.pack(anchor="w", padx=12, pady=(0, 12))
+
+        # Right: table
+        self.lbl_history = ttk.Label(right, text=self.t("history"), style="CardTitle.TLabel")
+        self.lbl_history.pack(anchor="w", padx=12, pady=(12, 6))
+
+        # Filter
+        self.filter_bar = ttk.Frame(right)
+        self.filter_bar.pack(fill="x", padx=12, pady=(0, 4))
+
+        self.filter_text = tk.StringVar(value="")
+        self.filter_type = tk.StringVar(value=self.t("filter_all"))
+        self.filter_from = tk.StringVar(value="")
+        self.filter_to = tk.StringVar(value="")
+        self.filter_folder = tk.StringVar(value="")
+        self._filter_after = None
+
+        self.lbl_filter_search = ttk.Label(self.filter_bar, text=self.t("filter_search"))
+        self.lbl_filter_search.pack(side="left")
+        ttk.Entry(self.filter_bar, textvariable=self.filter_text, width=22).pack(side="left", padx=(6, 10))
+        self.cmb_filter_type = ttk.Combobox(self.filter_bar, textvariable=self.filter_type, state="readonly",
+                                            width=8, values=self._filter_type_names())
+        self.cmb_filter_type.pack(side="left", padx=(0, 10))
+        self.lbl_filter_from = ttk.Label(self.filter_bar, text=self.t("filter_from"))
+        self.lbl_filter_from.pack(side="left")
+        ttk.Entry(self.filter_bar, textvariable=self.filter_from, width=11).pack(side="left", padx=(6, 6))
+        self.lbl_filter_to = ttk.Label(self.filter_bar, text=self.t("filter_to"))
+        self.lbl_filter_to.pack(side="left")
+        ttk.Entry(self.filter_bar, textvariable=self.filter_to, width=11).pack(side="left", padx=(6, 10))
+        self.lbl_filter_folder = ttk.Label(self.filter_bar, text=self.t("filter_folder"))
+        self.lbl_filter_folder.pack(side="left")
+        self.cmb_filter_folder = ttk.Combobox(self.filter_bar, textvariable=self.filter_folder, width=24,
+                                              postcommand=self._load_filter_folders)
+        self.cmb_filter_folder.pack(side="left", fill="x", expand=True, padx=(6, 10))
+        self.btn_filter_clear = ttk.Button(self.filter_bar, text=self.t("filter_clear"), command=self.clear_filter)
+        self.btn_filter_clear.pack(side="left")
+
+        for var in (self.filter_text, self.filter_type, self.filter_from, self.filter_to, self.filter_folder):
+            var.trace_add("write", lambda *_: self._schedule_filter())
+        # El índice se arma recién cuando alguien va a filtrar
+        for child in self.filter_bar.winfo_children():
+            child.bind("<FocusIn>", lambda e: self._ensure_index(), add="+")
+
+        self.lbl_filter_summary = ttk.Label(right, text="", style="Sub.TLabel")
+        self.lbl_filter_summary.pack(anchor="w", padx=12, pady=(0, 4))
+
+        cols = ("tipo", "descripcion", "duracion", "ruta")
+        self.tree = ttk.Treeview(right, columns=cols, show="headings")
+        self.tree.heading("tipo", text=self.t("col_type"))
+        self.tree.heading("descripcion", text=self.t("col_desc"))
+        self.tree.heading("duracion", text=self.t("col_dur"))
+        self.tree.heading("ruta", text=self.t("col_path"))
+
+        self.tree.column("tipo", width=90, anchor="w")
+        self.tree.column("descripcion", width=240, anchor="w")
+        self.tree.column("duracion", width=110, anchor="center")
+        self.tree.column("ruta", width=360, anchor="w")
+
+        self.tree.pack(fill="both", expand=True, padx=12, pady=(0, 12))
+
+        sb = ttk.Scrollbar(self.tree, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=sb.set)
+        sb.place(relx=1.0, rely=0, relheight=1.0, anchor="ne")
+
+        self.table = HistoryTable(self.tree, sb, self._row_values)
+        self.table.on_filtered = self._update_filter_summary
+
+        self.tree.bind("<Delete>", lambda e: self.delete_selected())
+        self.tree.bind("<Control-a>", lambda e: (self.table.select_all(), "break")[1])
+        self.tree.bind("<Control-z>", lambda e: self.undo_last())
+
+    def _make_card(self, parent, title, value):
+        card = ttk.Frame(parent, style="Card.TFrame")
+        title_lbl = ttk.Label(card, text=title, style="CardTitle.TLabel")
+        title_lbl.pack(anchor="w", padx=12, pady=(10, 0))
+        value_lbl = ttk.Label(card, text=value, style="CardText.TLabel", font=("Segoe UI", 18, "bold"))
+        value_lbl.pack(anchor="w", padx=12, pady=(4, 10))
+        card.title_label = title_lbl
+        card.value_label = value_lbl
+        return card
+
+    # -------------------------
+    # Language
+    # -------------------------
+    def toggle_language(self):
+        self.lang = "en" if self.lang == "es" else "es"
+        self.t = lambda k: I18N[self.lang][k]
+        self.apply_language()
+
+    def apply_language(self):
+        self.title(self.t("app_title"))
+
+        self.lbl_header_title.config(text=self.t("header_title"))
+        self.lbl_header_sub.config(text=self.t("header_sub"))
+
+        self.btn_lang.config(text=self.t("lang_btn"))
+
+        self.card_total.title_label.config(text=self.t("card_total"))
+        self.card_videos.title_label.config(text=self.t("card_videos"))
+        self.card_manual.title_label.config(text=self.t("card_manual"))
+        self.card_today.title_label.config(text=self.t("card_today"))
+        self.card_week.title_label.config(text=self.t("card_week"))
+        self.card_month.title_label.config(text=self.t("card_month"))
+
+        self.lbl_actions.config(text=self.t("actions"))
+        self.lbl_folder.config(text=self.t("folder_title"))
+        self.btn_choose.config(text=self.t("choose"))
+        self.chk_sub.config(text=self.t("include_sub"))
+        self.chk_watch.config(text=self.t("watch"))
+        self.lbl_workers.config(text=self.t("scan_workers"))
+        self.btn_scan.config(text=self.t("scan_save"))
+        self.lbl_profile.config(text=self.t("profile_pick"))
+        self.btn_profiles.config(text=self.t("profiles_edit"))
+        self.btn_scan_all.config(text=self.t("scan_all"))
+        self.btn_cancel.config(text=self.t("cancel"))
+
+        self.lbl_manual_title.config(text=self.t("manual_title"))
+        self.lbl_manual_time.config(text=self.t("manual_time"))
+        self.lbl_manual_desc.config(text=self.t("manual_desc"))
+        self.btn_manual_add.config(text=self.t("manual_add"))
+
+        self.lbl_manage.config(text=self.t("manage"))
+        self.btn_delete.config(text=self.t("delete_selected"))
+        self.btn_relabel.config(text=self.t("relabel"))
+        self.btn_retype.config(text=self.t("retype"))
+        self.retype_menu.entryconfig(0, label=self.t("type_video"))
+        self.retype_menu.entryconfig(1, label=self.t("type_manual"))
+        self.btn_undo.config(text=self.t("undo"))
+        self.btn_reset.config(text=self.t("reset_all"))
+        self.btn_quarantine.config(text=self.t("quarantine").format(n=len(self.quarantine)))
+        self.btn_report.config(text=self.t("report"))
+
+        self.lbl_tip.config(text=self.t("tip"))
+        self.lbl_history.config(text=self.t("history"))
+
+        self.tree.heading("tipo", text=self.t("col_type"))
+        self.tree.heading("descripcion", text=self.t("col_desc"))
+        self.tree.heading("duracion", text=self.t("col_dur"))
+        self.tree.heading("ruta", text=self.t("col_path"))
+
+        self.lbl_filter_search.config(text=self.t("filter_search"))
+        self.lbl_filter_from.config(text=self.t("filter_from"))
+        self.lbl_filter_to.config(text=self.t("filter_to"))
+        self.lbl_filter_folder.config(text=self.t("filter_folder"))
+        self.btn_filter_clear.config(text=self.t("filter_clear"))
+        type_pos = max(self.cmb_filter_type.current(), 0)
+        self.cmb_filter_type.config(values=self._filter_type_names())
+        self.cmb_filter_type.current(type_pos)
+        self._update_filter_summary()
+
+        # Solo actualiza el placeholder si el usuario no escribió nada custom
+        if not self.manual_label.get().strip():
+            self.manual_label.set(self.t("manual_default"))
+
+        # Solo cambia el texto de la columna "Tipo": no hace falta reconstruir
+        self.table.refresh_values()
+
+    # -------------------------
+    # Actions
+    # -------------------------
+    def pick_folder(self):
+        p = filedialog.askdirectory()
+        if p:
+            self.folder_var.set(p)
+
+    def scan_workers(self):
+        try:
+            workers = int(self.workers_var.get())
+        except (tk.TclError, ValueError):
+            workers = DEFAULT_WORKERS
+        workers = max(1, min(workers, MAX_WORKERS))
+        self.workers_var.set(workers)
+        if workers != self.settings["scan_workers"]:
+            self.settings["scan_workers"] = workers
+            save_settings(self.settings)
+        return workers
+
+    def _load_scan_state(self):
+        if self.probe_cache is None:
+            self.probe_cache = ProbeCache().load()
+        self.probe_cache.hits = self.probe_cache.misses = 0
+        if self.dir_snapshots is None:
+            self.dir_snapshots = DirSnapshots().load()
+        self.dir_snapshots.reused = self.dir_snapshots.listed = 0
+
+    def scan_and_save(self):
+        if self.scan_job is not None:
+            return
+        root = self.folder_var.get().strip()
+        if not root or not os.path.isdir(root):
+            messagebox.showerror(self.t("err"), self.t("err_folder"))
+            return
+
+        self._load_scan_state()
+        profile_path = None
+        if self.settings["profile_next_scan"]:
+            profile_path = APP_PROFILE_FILE
+            self.settings["profile_next_scan"] = False
+            save_settings(self.settings)
+
+        self._start_scan(ScanJob(
+            root,
+            self.include_sub_var.get(),
+            self.store.known_ids(),
+            self.prober,
+            workers=self.scan_workers(),
+            use_processes=self.settings["scan_use_processes"],
+            cache=self.probe_cache,
+            snapshots=self.dir_snapshots,
+            quarantine=self.quarantine,
+            duplicates=self.duplicates,
+            profile_path=profile_path,
+        ))
+
+    def scan_profile(self):
+        if self.scan_job is not None:
+            return
+        name = self.profile_var.get()
+        roots = self.settings["scan_profiles"].get(name)
+        if not roots:
+            messagebox.showerror(self.t("err"), self.t("err_profile"))
+            return
+        if name != self.settings["scan_profile"]:
+            self.settings["scan_profile"] = name
+            save_settings(self.settings)
+
+        # Sin isdir acá: con un NAS colgado bloquearía la ventana; cada raíz falla sola en su hilo
+        self._load_scan_state()
+        job = MultiScanJob(
+            profile_roots(roots, self.scan_workers()),
+            self.store.known_ids(),
+            self.prober,
+            use_processes=self.settings["scan_use_processes"],
+            cache=self.probe_cache,
+            snapshots=self.dir_snapshots,
+            quarantine=self.quarantine,
+            duplicates=self.duplicates,
+        )
+        # Un solo guardado al final; si se corta, la cache de duraciones hace barato repetirlo
+        self._start_scan(job, save_at_end=True)
+
+    def _start_scan(self, job, save_at_end: bool = False):
+        self.scan_job = job
+        self.scan_unsaved = [] if save_at_end else None
+        self.scan_total = 0
+        self.scan_done = 0
+        self.scan_listed = False
+        self.scan_added = 0
+        self.scan_added_seconds = 0.0
+        self.scan_moved = 0
+        self.scan_quarantined = 0
+        self.scan_duplicates = 0
+        self.scan_ui_secs = {"store": 0.0, "table": 0.0}
+
+        # UI: progress indeterminado hasta que termine el listado
+        self.progress.config(mode="indeterminate", value=0, maximum=100)
+        self.progress.pack(fill="x", pady=(8, 0))
+        self.progress.start(15)
+        self.lbl_progress.config(text="")
+        self.lbl_progress.pack(anchor="w")
+        self.btn_cancel.config(state="normal")
+        self.btn_cancel.pack(fill="x", pady=(8, 0))
+        self._set_scanning(True)
+
+        self.scan_job.start()
+        self.after(SCAN_POLL_MS, self._drain_scan_queue)
+
+    def cancel_scan(self):
+        if self.scan_job is not None:
+            self.scan_job.cancel()
+            self.btn_cancel.config(state="disabled")
+
+    def _set_scanning(self, scanning: bool):
+        state = "disabled" if scanning else "normal"
+        self.btn_scan.config(state=state)
+        self.btn_scan_all.config(state=state)
+        self.btn_profiles.config(state=state)
+        self.cmb_profile.config(state="disabled" if scanning else "readonly")
+        self.btn_manual_add.config(state=state)
+        self.btn_delete.config(state=state)
+        self.btn_relabel.config(state=state)
+        self.btn_retype.config(state=state)
+        self.btn_undo.config(state="disabled" if scanning or self.undo is None else "normal")
+        self.btn_reset.config(state=state)
+        self.btn_choose.config(state=state)
+        self.btn_lang.config(state=state)
+        self.spin_workers.config(state=state)
+
+    def _drain_scan_queue(self):
+        job = self.scan_job
+        if job is None:
+            return
+        batch = []
+        finished = None
+        start = time.perf_counter()
+        for _ in range(SCAN_MSGS_PER_TICK):
+            try:
+                msg = job.queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = msg[0]
+            if kind == "total":
+                # Van llegando mientras se lista (y de cada raíz con MultiScanJob): se suman
+                _, n_paths, skipped = msg
+                self.scan_total += n_paths
+                self.scan_done += skipped
+                self.progress.stop()
+                self.progress.config(mode="determinate", maximum=max(self.scan_total, 1))
+            elif kind == "listed":
+                self.scan_listed = True
+            elif kind == "item":
+                # El watcher pudo haberlo agregado mientras el escaneo lo medía
+                if msg[1] not in self.table.items:
+                    batch.append(self._add_scanned_item(*msg[1:]))
+                self.scan_done += 1
+            elif kind == "moved":
+                self._move_item(*msg[1:])
+                self.scan_done += 1
+            elif kind == "quarantined":
+                self.scan_quarantined += 1
+                self.scan_done += 1
+            elif kind == "duplicate":
+                self.scan_duplicates += 1  # ya contado en el "total" como salteado
+            else:
+                finished = msg
+                break
+
+        if self.scan_total:
+            self.progress.config(value=self.scan_done)
+            key = "scan_progress" if self.scan_listed else "scan_progress_listing"
+            self.lbl_progress.config(text=self.t(key).format(done=self.scan_done, total=self.scan_total))
+        # Tabla y cards una vez por tick, no una por item
+        self._show_added(batch)
+        mid = time.perf_counter()
+        if self.scan_unsaved is not None:
+            self.scan_unsaved += batch
+        else:
+            # Un solo append al journal por tick
+            self.store.add(batch)
+        self.scan_ui_secs["table"] += mid - start
+        self.scan_ui_secs["store"] += time.perf_counter() - mid
+        if finished is not None:
+            self._finish_scan(finished)
+        else:
+            self.after(SCAN_POLL_MS, self._drain_scan_queue)
+
+    def _add_scanned_item(self, fid, p, dur):
+        self.scan_added += 1
+        self.scan_added_seconds += dur
+        return self._add_video_item(fid, p, dur)
+
+    def _add_video_item(self, fid, p, dur):
+        """Lo agrega a data["items"]; la tabla y las cards se actualizan con _show_added()."""
+        item = make_video_item(fid, p, dur)
+        self.data["items"].append(item)
+        return item
+
+    def _show_added(self, items):
+        if items:
+            self.table.insert_many(items)
+            self._count_items(items, 1)
+
+    def _move_item(self, old_id, fid, p, dur):
+        index = self._item_index()
+        old = index.get(old_id)
+        if old is None:
+            item = self._add_scanned_item(fid, p, dur)
+            self._show_added([item])
+            self.store.add([item])
+            return
+        # Copia nueva y no update() en su lugar: la tabla saca del índice de búsqueda al item viejo
+        item = replaced(old, id=fid, label=os.path.basename(p), path=p)
+        index.replace(old_id, item)
+        self.store.update(old_id, item)
+        self.table.update(old_id, item)
+        self.scan_moved += 1
+        self._update_filter_summary()
+
+    def _flush_unsaved(self):
+        if self.scan_unsaved:
+            start = time.perf_counter()
+            self.store.add(self.scan_unsaved)
+            self.scan_ui_secs["store"] += time.perf_counter() - start
+        self.scan_unsaved = None
+
+    def _finish_scan(self, msg):
+        job = self.scan_job
+        self.scan_job = None
+        self._flush_unsaved()
+
+        self.progress.stop()
+        self.progress.pack_forget()
+        self.lbl_progress.pack_forget()
+        self.btn_cancel.pack_forget()
+        self._set_scanning(False)
+
+        if msg[0] == "error":
+            messagebox.showerror(self.t("err"), self.t("scan_failed").format(e=msg[1]))
+            return
+        _, cancelled, stats = msg
+        lines = [self.t("scan_added").format(n=self.scan_added, t=format_hms(self.scan_added_seconds))]
+        if cancelled:
+            lines.insert(0, self.t("scan_cancelled"))
+        for root, error in stats.get("errors", ()):
+            lines.append(self.t("scan_root_failed").format(root=root, e=error))
+        if self.scan_moved:
+            lines.append(self.t("scan_moved").format(n=self.scan_moved))
+        if self.scan_duplicates:
+            lines.append(self.t("scan_duplicates").format(n=self.scan_duplicates))
+        if self.scan_quarantined:
+            lines.append(self.t("scan_quarantined").format(n=self.scan_quarantined))
+            self._update_quarantine_button()
+        if "cache_hits" in stats:
+            lines.append(self.t("scan_cache").format(hits=stats["cache_hits"], misses=stats["cache_misses"]))
+
+        metrics = stats["metrics"]
+        for phase, secs in self.scan_ui_secs.items():
+            metrics.add_time(phase, secs)
+        metrics.count("added", self.scan_added)
+        metrics.count("moved", self.scan_moved)
+        summary = metrics.summary()
+        try:
+            write_metrics(summary)
+        except OSError:
+            pass
+        c = summary["counters"]
+        lines.append("")
+        lines.append(self.t("scan_counts").format(seen=c["seen"], skipped=c["skipped_known"],
+                                                  duplicates=c["duplicates"], quarantined=c["skipped_quarantined"],
+                                                  probed=c["probed"], failed=c["failed"]))
+        lines += format_summary(summary, {k: self.t("phase_" + k) for k in PHASES})
+        if job.profile_path:
+            lines.append(self.t("scan_profile").format(path=os.path.abspath(job.profile_path)))
+        text = "\n".join(lines)
+        messagebox.showinfo(self.t("done"), text)
+
+    def on_close(self):
+        job = self.scan_job
+        if job is not None:
+            # Guardamos lo que ya se midió; lo demás se pierde con el cancel. La cola es
+            # acotada y este hilo es el único que la lee: hay que vaciarla mientras el
+            # escaneo termina (y guarda cache y snapshots), no esperarlo con join()
+            job.cancel()
+            batch = []
+            while True:
+                try:
+                    msg = job.queue.get(timeout=0.1)
+                except queue.Empty:
+                    if not job.is_alive():
+                        break
+                    continue
+                if msg[0] == "item":
+                    batch.append(self._add_scanned_item(*msg[1:]))
+                elif msg[0] == "moved":
+                    self._move_item(*msg[1:])
+            self._show_added(batch)
+            self.store.add((self.scan_unsaved or []) + batch)
+        if self.watcher is not None:
+            self.watcher.stop()
+            self._drain_watch_queue(reschedule=False)
+        self.prober.close()
+        try:
+            # Escribe lo que quede pendiente antes de salir
+            self.store.close()
+        except OSError as e:
+            messagebox.showerror(self.t("err"), self.t("save_failed").format(e=e))
+        self.destroy()
+
+    def add_manual(self):
+        time_str = self.manual_time.get().strip()
+        label = self.manual_label.get().strip() or self.t("manual_default")
+
+        sec = parse_manual_time_to_seconds(time_str)
+        if sec is None:
+            messagebox.showerror(self.t("err"), self.t("err_time_format"))
+            return
+        if sec <= 0:
+            messagebox.showerror(self.t("err"), self.t("err_time_positive"))
+            return
+
+        item = make_manual_item(sec, label, len(self.data["items"]))
+        self.data["items"].append(item)
+        self.store.add([item])
+
+        self.manual_time.set("")
+        self.table.insert(item)
+        self._count_item(item, 1)
+
+    # -------------------------
+    # Bulk edits
+    # -------------------------
+    def _item_index(self) -> ItemIndex:
+        # Se arma con la primera edición que lo necesita; reset_all cambia la lista
+        if self.item_index is None or self.item_index.items is not self.data["items"]:
+            self.item_index = ItemIndex(self.data["items"])
+        return self.item_index
+
+    def _count_items(self, items, sign: int):
+        for it in items:
+            self.agg.add(it, sign)
+        self._update_cards()
+        self._update_filter_summary()
+
+    def _selection_or_hint(self) -> list:
+        ids = self.table.selection()
+        if not ids:
+            messagebox.showinfo(self.t("info"), self.t("pick_row"))
+        return ids
+
+    def _set_undo(self, kind: str, payload):
+        self.undo = (kind, payload)
+        self.btn_undo.config(state="normal")
+
+    def delete_selected(self):
+        ids = self._selection_or_hint()
+        if not ids or not messagebox.askyesno(self.t("confirm"), self.t("confirm_delete").format(n=len(ids))):
+            return
+
+        removed = self._item_index().remove(ids)
+        if not removed:
+            messagebox.showwarning(self.t("warn"), self.t("warn_not_found"))
+            return
+        removed_ids = [it.get("id") for it in removed]
+        self.store.delete(removed_ids)
+        if self.watcher is not None:
+            self.watcher.forget(removed_ids)
+        self.table.delete(removed_ids)
+        self._count_items(removed, -1)
+        self._set_undo("delete", removed)
+
+    def relabel_selected(self):
+        ids = self._selection_or_hint()
+        if not ids:
+            return
+        first = self.table.items.get(ids[0])
+        label = simpledialog.askstring(self.t("relabel_title"), self.t("relabel_prompt").format(n=len(ids)),
+                                       initialvalue=first.get("label", "") if first else "", parent=self)
+        if label is not None and label.strip():
+            self._replace_selected(ids, label=label.strip())
+
+    def retype_selected(self, new_type: str):
+        ids = self._selection_or_hint()
+        if ids:
+            self._replace_selected(ids, type=new_type)
+
+    def _replace_selected(self, ids, **fields):
+        index = self._item_index()
+        pairs = []
+        for iid in ids:
+            old = index.get(iid)
+            if old is not None and any(old.get(k) != v for k, v in fields.items()):
+                pairs.append((old, replaced(old, **fields)))
+        if pairs:
+            self._apply_replacements(pairs)
+            self._set_undo("replace", pairs)
+
+    def _apply_replacements(self, pairs):
+        """pairs: [(viejo, nuevo)] con el mismo id. Los updates salen juntos en una escritura (WriteBehindStore)."""
+        index = self._item_index()
+        for old, new in pairs:
+            index.replace(old.get("id"), new)
+            self.store.update(old.get("id"), new)
+        self.table.update_many([(old.get("id"), new) for old, new in pairs])
+        for old, new in pairs:
+            self.agg.add(old, -1)
+            self.agg.add(new, 1)
+        self._update_cards()
+        self._update_filter_summary()
+
+    def undo_last(self):
+        if self.undo is None or self.scan_job is not None:
+            return
+        kind, payload = self.undo
+        self.undo = None
+        self.btn_undo.config(state="disabled")
+        if kind == "delete":
+            # Un escaneo o el watcher pudieron haber vuelto a agregar alguno
+            back = [it for it in payload if it.get("id") not in self.table.items]
+            self.data["items"].extend(back)
+            self.store.add(back)
+            self.table.insert_many(back)
+            self._count_items(back, 1)
+        else:
+            # Solo los que siguen como los dejó la edición
+            index = self._item_index()
+            self._apply_replacements([(new, old) for old, new in payload if index.get(new.get("id")) is new])
+
+    def reset_all(self):
+        if not messagebox.askyesno(self.t("confirm"), self.t("confirm_reset")):
+            return
+        self.data["items"] = []
+        self.undo = None
+        self.btn_undo.config(state="disabled")
+        self.store.reset()
+        self.refresh_table_and_totals()
+        # Lo que esté en las carpetas vigiladas vuelve a entrar
+        self._restart_watcher()
+
+    # -------------------------
+    # Quarantine
+    # -------------------------
+    def _update_quarantine_button(self):
+        self.btn_quarantine.config(text=self.t("quarantine").format(n=len(self.quarantine)))
+
+    def show_quarantine(self):
+        win = tk.Toplevel(self)
+        win.title(self.t("quarantine_title"))
+        win.geometry("760x360")
+        win.configure(bg="#121212")
+        win.transient(self)
+
+        cols = ("ruta", "error", "fecha")
+        tree = ttk.Treeview(win, columns=cols, show="headings", selectmode="extended")
+        tree.heading("ruta", text=self.t("col_path"))
+        tree.heading("error", text=self.t("col_error"))
+        tree.heading("fecha", text=self.t("col_when"))
+        tree.column("ruta", width=360, anchor="w")
+        tree.column("error", width=260, anchor="w")
+        tree.column("fecha", width=120, anchor="center")
+        tree.pack(fill="both", expand=True, padx=12, pady=(12, 8))
+
+        def fill():
+            tree.delete(*tree.get_children())
+            for path, entry in self.quarantine.items():
+                when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["at"]))
+                tree.insert("", "end", iid=path, values=(path, entry["error"], when))
+
+        def retry():
+            # Sale de la lista: el próximo escaneo (o el watcher) lo vuelve a medir
+            self.quarantine.discard(tree.selection())
+            try:
+                self.quarantine.save()
+            except OSError as e:
+                messagebox.showerror(self.t("err"), str(e), parent=win)
+            fill()
+            self._update_quarantine_button()
+
+        buttons = ttk.Frame(win)
+        buttons.pack(fill="x", padx=12, pady=(0, 12))
+        ttk.Button(buttons, text=self.t("quarantine_retry"), command=retry).pack(side="left")
+        ttk.Button(buttons, text=self.t("close"), command=win.destroy).pack(side="right")
+        fill()
+
+    # -------------------------
+    # Scan profiles
+    # -------------------------
+    def _set_profiles(self, profiles: dict, current: str):
+        self.settings["scan_profiles"] = profiles
+        self.settings["scan_profile"] = current
+        save_settings(self.settings)
+        self.cmb_profile.config(values=sorted(profiles))
+        self.profile_var.set(current)
+
+    def show_profiles(self):
+        win = tk.Toplevel(self)
+        win.title(self.t("profiles_title"))
+        win.geometry("860x420")
+        win.configure(bg="#121212")
+        win.transient(self)
+
+        top = ttk.Frame(win)
+        top.pack(fill="x", padx=12, pady=(12, 0))
+        ttk.Label(top, text=self.t("profiles_name")).pack(side="left")
+        name_var = tk.StringVar(value=self.profile_var.get())
+        cmb_name = ttk.Combobox(top, textvariable=name_var, width=28, values=sorted(self.settings["scan_profiles"]))
+        cmb_name.pack(side="left", padx=(8, 0))
+
+        cols = ("ruta", "sub", "exts", "workers")
+        tree = ttk.Treeview(win, columns=cols, show="headings", selectmode="extended")
+        tree.heading("ruta", text=self.t("col_path"))
+        tree.heading("sub", text=self.t("col_recursive"))
+        tree.heading("exts", text=self.t("col_exts"))
+        tree.heading("workers", text=self.t("col_workers"))
+        tree.column("ruta", width=420, anchor="w")
+        tree.column("sub", width=90, anchor="center")
+        tree.column("exts", width=200, anchor="w")
+        tree.column("workers", width=80, anchor="center")
+        tree.pack(fill="both", expand=True, padx=12, pady=(8, 8))
+
+        add_row = ttk.Frame(win)
+        add_row.pack(fill="x", padx=12, pady=(0, 8))
+        sub_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(add_row, text=self.t("include_sub"), variable=sub_var).pack(side="left")
+        ttk.Label(add_row, text=self.t("profiles_exts")).pack(side="left", padx=(12, 0))
+        exts_var = tk.StringVar(value="")
+        ttk.Entry(add_row, textvariable=exts_var, width=16).pack(side="left", padx=(6, 0))
+        ttk.Label(add_row, text=self.t("profiles_workers")).pack(side="left", padx=(12, 0))
+        workers_var = tk.IntVar(value=0)
+        ttk.Spinbox(add_row, from_=0, to=MAX_WORKERS, width=4, textvariable=workers_var).pack(side="left", padx=(6, 0))
+
+        roots = []  # las del perfil que se está editando; se guardan recién con "Guardar"
+
+        def fill():
+            tree.delete(*tree.get_children())
+            for i, r in enumerate(roots):
+                tree.insert("", "end", iid=str(i), values=(
+                    r["path"],
+                    self.t("yes") if r.get("recursive", True) else self.t("no"),
+                    " ".join(r.get("exts") or ()) or self.t("profiles_default"),
+                    r.get("workers") or self.t("profiles_default"),
+                ))
+
+        def load(*_):
+            roots[:] = self.settings["scan_profiles"].get(name_var.get().strip(), [])
+            fill()
+
+        def add():
+            p = filedialog.askdirectory(parent=win)
+            if not p:
+                return
+            p = os.path.abspath(p)
+            try:
+                workers = int(workers_var.get())
+            except (tk.TclError, ValueError):
+                workers = 0
+            exts = sorted(parse_exts(exts_var.get())) if exts_var.get().strip() else []
+            # La misma carpeta otra vez reemplaza su configuración
+            roots[:] = [r for r in roots if os.path.abspath(r["path"]) != p]
+            roots.append({"path": p, "recursive": bool(sub_var.get()), "exts": exts,
+                          "workers": max(0, min(workers, MAX_WORKERS))})
+            fill()
+
+        def remove():
+            drop = {int(i) for i in tree.selection()}
+            roots[:] = [r for i, r in enumerate(roots) if i not in drop]
+            fill()
+
+        def save():
+            name = name_var.get().strip()
+            if not name:
+                messagebox.showerror(self.t("err"), self.t("err_profile_name"), parent=win)
+                return
+            # Dict nuevo: no mutar el de DEFAULT_SETTINGS
+            profiles = dict(self.settings["scan_profiles"])
+            profiles[name] = list(roots)
+            self._set_profiles(profiles, name)
+            cmb_name.config(values=sorted(profiles))
+
+        def delete():
+            profiles = dict(self.settings["scan_profiles"])
+            if profiles.pop(name_var.get().strip(), None) is None:
+                return
+            self._set_profiles(profiles, "")
+            cmb_name.config(values=sorted(profiles))
+            name_var.set("")
+            load()
+
+        cmb_name.bind("<<ComboboxSelected>>", load)
+
+        buttons = ttk.Frame(win)
+        buttons.pack(fill="x", padx=12, pady=(0, 12))
+        ttk.Button(buttons, text=self.t("profiles_add"), command=add).pack(side="left")
+        ttk.Button(buttons, text=self.t("profiles_remove"), command=remove).pack(side="left", padx=(8, 0))
+        ttk.Button(buttons, text=self.t("close"), command=win.destroy).pack(side="right")
+        ttk.Button(buttons, text=self.t("profiles_delete"), command=delete).pack(side="right", padx=(0, 8))
+        ttk.Button(buttons, text=self.t("profiles_save"), command=save).pack(side="right", padx=(0, 8))
+        load()
+
+    # -------------------------
+    # Filter
+    # -------------------------
+    def _filter_type_names(self):
+        return [self.t("filter_all"), self.t("type_video"), self.t("type_manual")]
+
+    def _ensure_index(self):
+        if self.table.index is None:
+            self.table.start_indexing()
+
+    def _load_filter_folders(self):
+        index = self.table.index
+        ready = index is not None and not self.table.indexing
+        self.cmb_filter_folder.config(values=index.folders() if ready else [])
+
+    def _schedule_filter(self):
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(FILTER_DEBOUNCE_MS, self.apply_filter)
+
+    @staticmethod
+    def _filter_date(raw: str):
+        # Una fecha a medio escribir todavía no filtra
+        try:
+            return date.fromisoformat(raw.strip()) if raw.strip() else None
+        except ValueError:
+            return None
+
+    def apply_filter(self):
+        self._filter_after = None
+        kind = (None, "video", "manual")[max(self.cmb_filter_type.current(), 0)]
+        flt = HistoryFilter(self.filter_text.get(), kind, self._filter_date(self.filter_from.get()),
+                            self._filter_date(self.filter_to.get()), self.filter_folder.get().strip() or None)
+        if flt:
+            self._ensure_index()
+        self.table.set_filter(flt)
+        self._update_filter_summary()
+
+    def clear_filter(self):
+        for var in (self.filter_text, self.filter_from, self.filter_to, self.filter_folder):
+            var.set("")
+        self.cmb_filter_type.current(0)
+        self.apply_filter()
+
+    def _update_filter_summary(self):
+        if self.table.filter_pending:
+            text = self.t("filter_indexing")
+        elif self.table.filter is None:
+            text = ""
+        else:
+            text = self.t("filter_summary").format(n=len(self.table.fids), total=len(self.table),
+                                                   t=format_hms(self.table.filtered_ms / 1000))
+        self.lbl_filter_summary.config(text=text)
+
+    # -------------------------
+    # Reports
+    # -------------------------
+    def show_report(self):
+        # numpy se carga recién acá
+        from report import GROUP_KEYS, PERIODS, ItemColumns, build_report, export
+
+        cols = ItemColumns(self.data["items"])  # una vez por ventana; se reusa en cada actualización
+        win = tk.Toplevel(self)
+        win.title(self.t("report_title"))
+        win.geometry("820x480")
+        win.configure(bg="#121212")
+        win.transient(self)
+
+        opts = ttk.Frame(win)
+        opts.pack(fill="x", padx=12, pady=(12, 6))
+
+        period_names = {self.t("period_" + p): p for p in PERIODS}
+        period_var = tk.StringVar(value=self.t("period_month"))
+        ttk.Label(opts, text=self.t("report_period")).grid(row=0, column=0, sticky="w")
+        ttk.Combobox(opts, textvariable=period_var, values=list(period_names), state="readonly",
+                     width=10).grid(row=0, column=1, sticky="w", padx=(6, 16))
+
+        ttk.Label(opts, text=self.t("report_by")).grid(row=0, column=2, sticky="w")
+        by_vars = {k: tk.BooleanVar(value=k == "folder") for k in GROUP_KEYS}
+        for i, k in enumerate(GROUP_KEYS):
+            ttk.Checkbutton(opts, text=self.t("by_" + k), variable=by_vars[k]).grid(row=0, column=3 + i, sticky="w")
+
+        top_var = tk.IntVar(value=0)
+        first_var = tk.StringVar(value="")
+        last_var = tk.StringVar(value="")
+        ttk.Label(opts, text=self.t("report_top")).grid(row=1, column=0, columnspan=2, sticky="w", pady=(6, 0))
+        ttk.Spinbox(opts, from_=0, to=1000, width=6, textvariable=top_var).grid(row=1, column=2, sticky="w",
+                                                                               pady=(6, 0))
+        ttk.Label(opts, text=self.t("report_from")).grid(row=2, column=0, columnspan=2, sticky="w", pady=(6, 0))
+        ttk.Entry(opts, textvariable=first_var, width=12).grid(row=2, column=2, sticky="w", pady=(6, 0))
+        ttk.Label(opts, text=self.t("report_to")).grid(row=2, column=3, sticky="e", pady=(6, 0))
+        ttk.Entry(opts, textvariable=last_var, width=12).grid(row=2, column=4, columnspan=2, sticky="w",
+                                                             padx=(6, 0), pady=(6, 0))
+
+        tree = ttk.Treeview(win, show="headings")
+        tree.pack(fill="both", expand=True, padx=12, pady=6)
+        current = {}
+
+        def params():
+            dates = []
+            for var in (first_var, last_var):
+                raw = var.get().strip()
+                try:
+                    dates.append(date.fromisoformat(raw) if raw else None)
+                except ValueError:
+                    messagebox.showerror(self.t("err"), self.t("err_date"), parent=win)
+                    return None
+            try:
+                top = int(top_var.get()) or None
+            except (tk.TclError, ValueError):
+                top = None
+            by = tuple(k for k in GROUP_KEYS if by_vars[k].get())
+            return period_names[period_var.get()], by, dates[0], dates[1], top
+
+        def refresh():
+            p = params()
+            if p is None:
+                return
+            period, by = p[0], p[1]
+            rows = build_report(cols, *p)
+            current.update(rows=rows, period=period, by=by)
+
+            columns = ("period", *by, "items", "dur")
+            headings = {"period": "col_period", "folder": "by_folder", "type": "by_type", "label": "by_label",
+                        "items": "col_items", "dur": "col_dur"}
+            tree.delete(*tree.get_children())
+            tree.config(columns=columns)
+            for c in columns:
+                tree.heading(c, text=self.t(headings[c]))
+                tree.column(c, width=300 if c in ("folder", "label") else 100,
+                            anchor="w" if c in ("folder", "label") else "center")
+            for r in rows[:PREVIEW_ROWS]:
+                values = [r["period"]]
+                values += [self.t("type_" + r[k]) if k == "type" else r[k] for k in by]
+                tree.insert("", "end", values=(*values, r["items"], format_hms(r["seconds"])))
+
+        def save():
+            if "rows" not in current:
+                return
+            path = filedialog.asksaveasfilename(parent=win, defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+            if not path:
+                return
+            try:
+                export(current["rows"], path, current["period"], current["by"])
+            except OSError as e:
+                messagebox.showerror(self.t("err"), str(e), parent=win)
+                return
+            messagebox.showinfo(self.t("done"), self.t("report_saved").format(path=path), parent=win)
+
+        buttons = ttk.Frame(win)
+        buttons.pack(fill="x", padx=12, pady=(0, 12))
+        ttk.Button(buttons, text=self.t("report_refresh"), command=refresh).pack(side="left")
+        ttk.Button(buttons, text=self.t("report_export"), command=save).pack(side="left", padx=(8, 0))
+        ttk.Button(buttons, text=self.t("close"), command=win.destroy).pack(side="right")
+        refresh()
+
+    # -------------------------
+    # Watch folders
+    # -------------------------
+    def _watched(self, root: str):
+        root = os.path.abspath(root)
+        return next((w for w in self.settings["watch_folders"] if os.path.abspath(w["path"]) == root), None)
+
+    def _sync_watch_check(self):
+        root = self.folder_var.get().strip()
+        self.watch_var.set(bool(root) and self._watched(root) is not None)
+
+    def toggle_watch(self):
+        root = self.folder_var.get().strip()
+        if self.watch_var.get() and (not root or not os.path.isdir(root)):
+            self.watch_var.set(False)
+            messagebox.showerror(self.t("err"), self.t("err_folder"))
+            return
+        # Lista nueva: no mutar la de DEFAULT_SETTINGS
+        current = self._watched(root) if root else None
+        folders = [w for w in self.settings["watch_folders"] if w is not current]
+        if self.watch_var.get():
+            folders.append({"path": os.path.abspath(root), "recursive": bool(self.include_sub_var.get())})
+        self.settings["watch_folders"] = folders
+        save_settings(self.settings)
+        self._restart_watcher()
+
+    def _restart_watcher(self):
+        if self._watch_after is not None:
+            self.after_cancel(self._watch_after)
+            self._watch_after = None
+        if self.watcher is not None:
+            self.watcher.stop()
+            self._drain_watch_queue(reschedule=False)
+            self.watcher = None
+        folders = [(w["path"], w.get("recursive", True)) for w in self.settings["watch_folders"]
+                   if os.path.isdir(w["path"])]
+        if not folders:
+            return
+        self.watcher = FolderWatcher(folders, self.store.known_ids(), self.prober,
+                                     workers=self.settings["scan_workers"], quarantine=self.quarantine,
+                                     duplicates=self.duplicates)
+        self.watcher.start()
+        self._watch_after = self.after(WATCH_POLL_MS, self._drain_watch_queue)
+
+    def _drain_watch_queue(self, reschedule=True):
+        watcher = self.watcher
+        if watcher is None:
+            return
+        batch = []
+        while True:
+            try:
+                msg = watcher.queue.get_nowait()
+            except queue.Empty:
+                break
+            if msg[0] == "error":
+                self.watcher = None
+                messagebox.showerror(self.t("err"), self.t("watch_failed").format(e=msg[1]))
+                reschedule = False
+                break
+            if msg[0] == "quarantined":
+                self._update_quarantine_button()
+                continue
+            if msg[0] == "duplicate":
+                continue
+            _, fid, p, dur = msg
+            # Un escaneo manual pudo haberlo agregado mientras se medía
+            if fid not in self.table.items:
+                batch.append(self._add_video_item(fid, p, dur))
+        self._show_added(batch)
+        self.store.add(batch)
+        self._watch_after = self.after(WATCH_POLL_MS, self._drain_watch_queue) if reschedule else None
+
+    # -------------------------
+    # UI refresh
+    # -------------------------
+    def _row_values(self, it):
+        t = it.get("type", "video")
+        return (
+            self.t("type_video") if t == "video" else self.t("type_manual"),
+            it.get("label", ""),
+            format_hms(float(it.get("duration_sec", 0.0) or 0.0)),
+            it.get("path", "") or ""
+        )
+
+    def _count_item(self, it, sign: int):
+        self.agg.add(it, sign)
+        self._update_cards()
+        self._update_filter_summary()
+
+    def _update_cards(self):
+        self.card_total.value_label.config(text=format_hm(self.agg.total_sec))
+        self.card_videos.value_label.config(text=str(self.agg.videos))
+        self.card_manual.value_label.config(text=str(self.agg.manual))
+        self.card_today.value_label.config(text=format_hm(self.agg.today_sec()))
+        self.card_week.value_label.config(text=format_hm(self.agg.week_sec()))
+        self.card_month.value_label.config(text=format_hm(self.agg.month_sec()))
+
+    def _tick_cards(self):
+        # Hoy/semana/mes dependen de la fecha: se recalculan aunque no haya cambios
+        self._update_cards()
+        self.after(CARDS_TICK_MS, self._tick_cards)
+
+    def refresh_table_and_totals(self):
+        # Reconstrucción completa: solo al abrir y al resetear; el resto son diffs.
+        # La tabla ordena sola: no hace falta la copia ordenada de recent_items()
+        self.table.reset(self.data["items"])
+
+        self.agg = Aggregates.from_store(self.store)
+        self._update_cards()
+        self._update_filter_summary()
+
@@ -0,0 +1,211 @@
+"""
+Importación de registros de tiempo de otras herramientas (CSV o JSONL).
+
+El archivo se lee registro por registro y los items nuevos salen en lotes de
+IMPORT_BATCH: nunca está entero en memoria, pese lo que pese. Columnas del
+CSV (primera fila) o claves de cada línea JSON, sin distinguir mayúsculas:
+
+  duration       "h:mm:ss", "m:ss" o minutos, igual que la carga manual
+  duration_sec   segundos como número (en vez de duration; también "seconds")
+  date           timestamp unix o fecha/hora ISO (también "added_at", "start")
+  label          descripción (también "description")
+  type           "manual" (por defecto) o "video"
+  path, id       opcionales
+
+Sin id se deriva uno estable de los campos (import-<hash>): importar dos
+veces el mismo archivo no agrega nada la segunda.
+"""
+import os
+import csv
+import json
+import math
+import hashlib
+from datetime import datetime
+
+from core import parse_manual_time_to_seconds
+from items import TYPES, Item
+
+FORMATS = ("csv", "jsonl")
+IMPORT_BATCH = 10_000
+# Errores que se guardan con su línea; del resto solo se cuenta cuántos hubo
+MAX_ERRORS = 20
+
+# campo -> nombres aceptados, en orden de preferencia
+FIELDS = {
+    "duration": ("duration", "time"),
+    "duration_sec": ("duration_sec", "seconds"),
+    "date": ("date", "added_at", "start"),
+    "label": ("label", "description"),
+    "type": ("type",),
+    "path": ("path",),
+    "id": ("id",),
+}
+
+
+def format_of(path: str) -> str:
+    """"csv" o "jsonl" según la extensión (.json y .ndjson cuentan como JSONL)."""
+    ext = os.path.splitext(path)[1].lower()
+    return "jsonl" if ext in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+# -------------------------
+# Registro -> item
+# -------------------------
+def _field(rec: dict, name: str):
+    for key in FIELDS[name]:
+        value = rec.get(key)
+        if value is not None and value != "":
+            return value
+    return None
+
+
+def _seconds(rec: dict) -> float:
+    value = _field(rec, "duration_sec")
+    if value is not None:
+        try:
+            sec = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid duration_sec {value!r}")
+        if not math.isfinite(sec) or sec <= 0:
+            raise ValueError(f"invalid duration_sec {value!r}")
+        return sec
+    value = _field(rec, "duration")
+    if value is None:
+        raise ValueError("missing duration")
+    sec = parse_manual_time_to_seconds(str(value))
+    if sec is None:
+        raise ValueError(f"invalid duration {value!r} (use h:mm:ss, m:ss or minutes)")
+    return sec
+
+
+def _timestamp(value) -> int:
+    if value is None:
+        raise ValueError("missing date")
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        ts = value
+    else:
+        text = str(value).strip()
+        try:
+            ts = float(text)
+        except ValueError:
+            try:
+                # Sin zona horaria se toma como hora local, igual que los items propios
+                ts = datetime.fromisoformat(text).timestamp()
+            except ValueError:
+                raise ValueError(f"invalid date {value!r}")
+    if not math.isfinite(ts) or ts <= 0:
+        raise ValueError(f"invalid date {value!r}")
+    return int(ts)
+
+
+def stable_id(type: str, label: str, sec: float, added_at: int, path: str) -> str:
+    key = f"{added_at}|{sec!r}|{type}|{label}|{path}".encode("utf-8")
+    return "import-" + hashlib.blake2b(key, digest_size=8).hexdigest()
+
+
+def record_item(rec: dict) -> Item:
+    """Item de un registro con las claves en minúscula. ValueError si no sirve."""
+    sec = _seconds(rec)
+    added_at = _timestamp(_field(rec, "date"))
+    type = str(_field(rec, "type") or "manual").strip().lower()
+    if type not in TYPES:
+        raise ValueError(f"unknown type {type!r}")
+    label = str(_field(rec, "label") or "").strip() or "Imported"
+    path = str(_field(rec, "path") or "")
+    iid = str(_field(rec, "id") or "").strip() or stable_id(type, label, sec, added_at, path)
+    return Item(iid, type, label, sec, added_at, path)
+
+
+# -------------------------
+# Lectura
+# -------------------------
+class Importer:
+    """
+    Lee path (CSV o JSONL) y arma los items cuyo id no está en known_ids;
+    los que agrega se suman a known_ids, así un id repetido dentro del
+    archivo también entra una sola vez. batches() es un generador: quien lo
+    consume decide qué hacer con cada lote y cuándo guardar. Mientras
+    tanto, read_bytes/total_bytes y los contadores sirven para el progreso.
+    """
+
+    def __init__(self, path: str, known_ids: set, fmt: str | None = None, batch_size: int = IMPORT_BATCH):
+        self.path = path
+        self.fmt = fmt or format_of(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"unknown format {self.fmt!r}, expected csv or jsonl")
+        self.known_ids = known_ids
+        self.batch_size = batch_size
+        self.total_bytes = os.path.getsize(path)
+        self.read_bytes = 0
+        self.added = 0
+        self.known = 0    # ya estaban (en el store o antes en el archivo)
+        self.invalid = 0
+        self.errors = []  # (línea, mensaje), los primeros MAX_ERRORS
+
+    @property
+    def rows(self) -> int:
+        return self.added + self.known + self.invalid
+
+    def _bad(self, line: int, msg: str):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, msg))
+
+    def _lines(self, f):
+        # Binario para contar bytes leídos (tell() no anda mientras se itera un archivo de texto)
+        first = True
+        for raw in f:
+            self.read_bytes += len(raw)
+            line = raw.decode("utf-8", errors="replace")
+            if first:
+                line = line.lstrip("\ufeff")
+                first = False
+            yield line
+
+    def _records(self, f):
+        """(línea, dict con claves en minúscula) por registro; los que no se pueden leer van a errors."""
+        if self.fmt == "csv":
+            reader = csv.reader(self._lines(f))
+            try:
+                header = [h.strip().lower() for h in next(reader, [])]
+                for row in reader:
+                    if any(cell.strip() for cell in row):
+                        yield reader.line_num, dict(zip(header, row))
+            except csv.Error as e:
+                # Comillas sin cerrar y similares: desde ahí no se sabe dónde empieza cada registro
+                raise ValueError(f"line {reader.line_num}: {e}")
+            return
+        for n, line in enumerate(self._lines(f), 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                self._bad(n, f"invalid JSON: {e}")
+                continue
+            if not isinstance(rec, dict):
+                self._bad(n, "not a JSON object")
+                continue
+            yield n, {str(k).lower(): v for k, v in rec.items()}
+
+    def batches(self):
+        """Listas de hasta batch_size items nuevos, en el orden del archivo."""
+        batch = []
+        with open(self.path, "rb") as f:
+            for line, rec in self._records(f):
+                try:
+                    item = record_item(rec)
+                except ValueError as e:
+                    self._bad(line, str(e))
+                    continue
+                if item.id in self.known_ids:
+                    self.known += 1
+                    continue
+                self.known_ids.add(item.id)
+                self.added += 1
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,226 @@
+"""
+Representación compacta de los items del historial.
+
+Un item como dict ocupa ~550 bytes y repite el path dos veces: entero dentro
+del id ("path|size|mtime") y como basename en label. Item guarda solo el id
+y deriva path y label de él cuando coinciden con lo derivable; el tipo es un
+string compartido. Se comporta como un dict de solo esas seis claves (get,
+[], keys, update...) y to_dict() devuelve exactamente lo que se cargó, en el
+mismo orden, así que el JSON sale byte por byte igual.
+
+Un dict con otras claves, en otro orden o con tipos raros no se convierte:
+queda como dict, y todo el código lo trata igual por la interfaz común.
+"""
+import os
+
+KEYS = ("id", "type", "label", "duration_sec", "added_at", "path")
+# Un único objeto str por tipo en vez de uno por item
+TYPES = {"video": "video", "manual": "manual"}
+
+_ALTSEP = os.altsep or ""
+
+
+class Item:
+    __slots__ = ("_id", "type", "_label", "duration_sec", "added_at", "_path")
+
+    def __init__(self, id, type, label, duration_sec, added_at, path):
+        self.type = TYPES.get(type, type)
+        self.duration_sec = duration_sec
+        self.added_at = added_at
+        self._set(id, label, path)
+
+    def _set(self, id, label, path):
+        # None = se deriva: path sale del id y label del path. Las comparaciones
+        # equivalen a id.rsplit("|", 2)[0] == path y label == basename(path)
+        # sin armar strings (esto corre una vez por item al cargar)
+        self._id = id
+        self._path = path
+        self._label = label
+        if not path:
+            return
+        n = len(path)
+        if id.startswith(path) and id.count("|", n) == 2 and id[n] == "|":
+            self._path = None
+        last = path.rfind(os.sep)
+        if _ALTSEP:
+            last = max(last, path.rfind(_ALTSEP))
+        if last == n - len(label) - 1 and path.endswith(label):
+            self._label = None
+
+    @classmethod
+    def from_dict(cls, d):
+        """
+        Item si d tiene exactamente las claves de KEYS (en ese orden); si no, d
+        tal cual. Sirve de object_hook de json.load: cada item se compacta
+        apenas se parsea y la lista de dicts completa nunca existe.
+        """
+        if type(d) is not dict or tuple(d) != KEYS:
+            return d
+        id, label, path = d["id"], d["label"], d["path"]
+        if type(id) is not str or type(label) is not str or type(path) is not str:
+            return d
+        return cls(id, d["type"], label, d["duration_sec"], d["added_at"], path)
+
+    @classmethod
+    def from_parts(cls, id, type, label, duration_sec, added_at, path):
+        """Inverso de parts(): label/path None = derivados, sin volver a compararlos (snapshot.py)."""
+        it = cls.__new__(cls)
+        it._id = id
+        it.type = TYPES.get(type, type)
+        it._label = label
+        it.duration_sec = duration_sec
+        it.added_at = added_at
+        it._path = path
+        return it
+
+    def parts(self) -> tuple:
+        """Los campos como se guardan: label y path son None cuando se derivan del id."""
+        return self._id, self.type, self._label, self.duration_sec, self.added_at, self._path
+
+    # -------------------------
+    # Campos derivados
+    # -------------------------
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def path(self) -> str:
+        return self._id.rsplit("|", 2)[0] if self._path is None else self._path
+
+    @property
+    def label(self) -> str:
+        return os.path.basename(self.path) if self._label is None else self._label
+
+    # -------------------------
+    # Interfaz de dict
+    # -------------------------
+    def get(self, key, default=None):
+        return getattr(self, key) if key in KEYS else default
+
+    def __getitem__(self, key):
+        if key not in KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        self.update({key: value})
+
+    def update(self, other=(), **kw):
+        fields = dict(other, **kw)
+        unknown = fields.keys() - set(KEYS)
+        if unknown:
+            raise KeyError(f"Item has no field {sorted(unknown)[0]!r}")
+        if "type" in fields:
+            self.type = TYPES.get(fields["type"], fields["type"])
+        if "duration_sec" in fields:
+            self.duration_sec = fields["duration_sec"]
+        if "added_at" in fields:
+            self.added_at = fields["added_at"]
+        if fields.keys() & {"id", "label", "path"}:
+            # Se calculan con los valores viejos antes de re-derivar
+            self._set(fields.get("id", self._id), fields.get("label", self.label), fields.get("path", self.path))
+
+    def __contains__(self, key):
+        return key in KEYS
+
+    def __iter__(self):
+        return iter(KEYS)
+
+    def __len__(self):
+        return len(KEYS)
+
+    def keys(self):
+        return KEYS
+
+    def values(self):
+        return [getattr(self, k) for k in KEYS]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in KEYS]
+
+    def to_dict(self) -> dict:
+        return dict(zip(KEYS, self.values()))
+
+    def __eq__(self, other):
+        if isinstance(other, (Item, dict)):
+            return self.items() == list(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Item({self.to_dict()!r})"
+
+
+def replaced(it, **fields):
+    """Copia de it (Item o dict) con fields cambiados; el original queda intacto."""
+    if type(it) is Item:
+        return Item(**{**it.to_dict(), **fields})
+    return {**it, **fields}
+
+
+def jsonable(obj):
+    """default= de json.dump: los Item se escriben como su dict."""
+    if type(obj) is Item:
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class ItemIndex:
+    """
+    id -> posición en la lista de items (data["items"]), para sacar y
+    reemplazar por id sin recorrerla: O(k) para k ids. Lo agregado con
+    append() al final se indexa solo en la próxima consulta; sacar o
+    reemplazar tiene que pasar por acá. Sacar mueve el último item al hueco:
+    el orden de la lista cambia, pero nada depende de él (la tabla y los
+    reportes ordenan por fecha).
+    """
+
+    def __init__(self, items: list):
+        self.items = items
+        self.pos = {}
+        self.indexed = 0
+
+    def _catch_up(self):
+        items = self.items
+        for i in range(self.indexed, len(items)):
+            iid = items[i].get("id")
+            if iid:
+                self.pos[iid] = i
+        self.indexed = len(items)
+
+    def get(self, iid):
+        self._catch_up()
+        i = self.pos.get(iid)
+        return None if i is None else self.items[i]
+
+    def replace(self, old_id, item):
+        """Pone item en el lugar del de old_id (el id puede cambiar); devuelve el viejo, o None."""
+        self._catch_up()
+        i = self.pos.pop(old_id, None)
+        if i is None:
+            return None
+        old = self.items[i]
+        self.items[i] = item
+        if item.get("id"):
+            self.pos[item.get("id")] = i
+        return old
+
+    def remove(self, ids) -> list:
+        """Saca los items de ids que estén y los devuelve."""
+        self._catch_up()
+        items = self.items
+        removed = []
+        for iid in ids:
+            i = self.pos.pop(iid, None)
+            if i is None:
+                continue
+            removed.append(items[i])
+            last = items.pop()
+            if i < len(items):
+                items[i] = last
+                if last.get("id"):
+                    self.pos[last.get("id")] = i
+        self.indexed = len(items)
+        return removed
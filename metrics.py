@@ -0,0 +1,141 @@
+import time
+from contextlib import contextmanager
+
+from storage import atomic_write_json, atomic_write_text
+
+APP_METRICS_JSON = "scan_metrics.json"
+APP_METRICS_PROM = "scan_metrics.prom"
+APP_PROFILE_FILE = "scan_profile.prof"
+PROM_PREFIX = "workhours_scan"
+
+# Orden en el que se muestran; una fase sin tiempo no aparece
+PHASES = ("list", "filter", "dedupe", "cache", "probe", "store", "table")
+# Siempre presentes (en 0) para que las series de Prometheus no aparezcan y desaparezcan
+COUNTERS = ("seen", "skipped_known", "skipped_quarantined", "duplicates", "cached", "probed", "failed")
+
+
+def percentile(values, p: float) -> float:
+    """Percentil por rango más cercano (p en 0..100); 0 si no hay valores."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def timed_probe(probe, path: str):
+    """(resultado de probe, segundos que tardó). De módulo para que pase por pickle al pool de procesos."""
+    start = time.perf_counter()
+    result = probe(path)
+    return result, time.perf_counter() - start
+
+
+class ScanMetrics:
+    """
+    Tiempo por fase y contadores de un escaneo. Las fases se acumulan (una
+    fase puede abrirse varias veces) y las latencias de probe se guardan por
+    archivo para sacar p50/p95.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phases = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.probe_secs = []
+        self.probe_bytes = 0
+
+    @classmethod
+    def combined(cls, parts):
+        """
+        Métricas de escaneos que corrieron a la vez (uno por raíz): contadores
+        y latencias se suman; cada fase vale lo que tardó la raíz más lenta,
+        que es el tiempo de pared que ocupó.
+        """
+        m = cls()
+        for p in parts:
+            m.started_at = min(m.started_at, p.started_at)
+            for k, v in p.phases.items():
+                m.phases[k] = max(m.phases.get(k, 0.0), v)
+            for k, v in p.counters.items():
+                m.count(k, v)
+            m.probe_secs += p.probe_secs
+            m.probe_bytes += p.probe_bytes
+        return m
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, secs: float):
+        self.phases[name] = self.phases.get(name, 0.0) + secs
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def probed(self, secs: float, size: int, ok: bool):
+        self.probe_secs.append(secs)
+        self.probe_bytes += size
+        self.count("probed")
+        if not ok:
+            self.count("failed")
+
+    def summary(self) -> dict:
+        probe_wall = self.phases.get("probe", 0.0)
+        return {
+            "started_at": int(self.started_at),
+            "phases_sec": {k: round(self.phases[k], 6) for k in PHASES if k in self.phases},
+            "counters": dict(self.counters),
+            "probe_p50_ms": round(percentile(self.probe_secs, 50) * 1000, 3),
+            "probe_p95_ms": round(percentile(self.probe_secs, 95) * 1000, 3),
+            "probe_bytes": self.probe_bytes,
+            "probe_bytes_per_sec": round(self.probe_bytes / probe_wall) if probe_wall > 0 else 0,
+        }
+
+
+# -------------------------
+# Export
+# -------------------------
+def to_prometheus(summary: dict) -> str:
+    """Formato de texto de Prometheus (sirve para el textfile collector de node_exporter)."""
+    p = PROM_PREFIX
+    lines = [
+        f"# HELP {p}_phase_seconds Wall time per scan phase.",
+        f"# TYPE {p}_phase_seconds gauge",
+    ]
+    lines += [f'{p}_phase_seconds{{phase="{k}"}} {v}' for k, v in summary["phases_sec"].items()]
+    lines += [
+        f"# HELP {p}_files Files per outcome in the last scan.",
+        f"# TYPE {p}_files gauge",
+    ]
+    lines += [f'{p}_files{{kind="{k}"}} {v}' for k, v in sorted(summary["counters"].items())]
+    lines += [
+        f"# HELP {p}_probe_latency_seconds Per-file probe latency quantiles.",
+        f"# TYPE {p}_probe_latency_seconds gauge",
+        f'{p}_probe_latency_seconds{{quantile="0.5"}} {summary["probe_p50_ms"] / 1000}',
+        f'{p}_probe_latency_seconds{{quantile="0.95"}} {summary["probe_p95_ms"] / 1000}',
+        f"# TYPE {p}_probe_bytes_per_second gauge",
+        f'{p}_probe_bytes_per_second {summary["probe_bytes_per_sec"]}',
+        f"# TYPE {p}_last_run_timestamp_seconds gauge",
+        f'{p}_last_run_timestamp_seconds {summary["started_at"]}',
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(summary: dict, json_path: str = APP_METRICS_JSON, prom_path: str = APP_METRICS_PROM):
+    atomic_write_json(json_path, summary)
+    atomic_write_text(prom_path, to_prometheus(summary))
+
+
+def format_summary(summary: dict, phase_names=None) -> list[str]:
+    """Líneas cortas para el diálogo / la consola. phase_names traduce el nombre de cada fase."""
+    names = phase_names or {}
+    phases = "  ".join(f"{names.get(k, k)} {v:.2f}s" for k, v in summary["phases_sec"].items())
+    lines = [phases] if phases else []
+    if summary["counters"].get("probed"):
+        mb_s = summary["probe_bytes_per_sec"] / (1 << 20)
+        lines.append(f"p50 {summary['probe_p50_ms']:.1f} ms  p95 {summary['probe_p95_ms']:.1f} ms  {mb_s:.1f} MB/s")
+    return lines
@@ -0,0 +1,393 @@
+import math
+import struct
+import threading
+import multiprocessing
+
+# Tope por archivo para el camino lento (ffmpeg) antes de matar el proceso
+PROBE_TIMEOUT_SECS = 30.0
+
+# Cuántos elementos/boxes recorremos como máximo antes de rendirnos.
+# Con esto un archivo raro nunca nos hace leer más que unos pocos KB.
+MAX_ELEMENTS = 256
+AVI_HDRL_MAX = 64 * 1024
+
+
+# -------------------------
+# MP4 / MOV / M4V  (moov/mvhd)
+# -------------------------
+def _read_box_header(f, end: int):
+    start = f.tell()
+    if start + 8 > end:
+        return None
+    hdr = f.read(8)
+    if len(hdr) < 8:
+        return None
+    size, kind = struct.unpack(">I4s", hdr)
+    header_len = 8
+    if size == 1:
+        ext = f.read(8)
+        if len(ext) < 8:
+            return None
+        size = struct.unpack(">Q", ext)[0]
+        header_len = 16
+    elif size == 0:
+        size = end - start  # la box llega hasta el final
+    if size < header_len:
+        return None
+    return start, kind, size, header_len
+
+
+def _iter_boxes(f, start: int, end: int):
+    pos = start
+    for _ in range(MAX_ELEMENTS):
+        f.seek(pos)
+        box = _read_box_header(f, end)
+        if box is None:
+            return
+        yield box
+        pos = box[0] + box[2]
+        if pos >= end:
+            return
+
+
+def _mvhd_duration(f, size: int):
+    body = f.read(min(size, 32))
+    if len(body) < 20:
+        return None
+    version = body[0]
+    if version == 1:
+        if len(body) < 32:
+            return None
+        timescale, duration = struct.unpack(">IQ", body[20:32])
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack(">II", body[12:20])
+        unknown = 0xFFFFFFFF
+    if not timescale or duration == unknown:
+        return None
+    return timescale, duration
+
+
+def _mehd_duration(f, start: int, end: int):
+    # fMP4: la duración total vive en moov/mvex/mehd (en el timescale del mvhd)
+    for box_start, kind, size, hl in _iter_boxes(f, start, end):
+        if kind == b"mehd":
+            f.seek(box_start + hl)
+            body = f.read(12)
+            if len(body) >= 12 and body[0] == 1:
+                return struct.unpack(">Q", body[4:12])[0]
+            if len(body) >= 8:
+                return struct.unpack(">I", body[4:8])[0]
+    return None
+
+
+def mp4_duration(f, file_size: int) -> float | None:
+    for box_start, kind, size, hl in _iter_boxes(f, 0, file_size):
+        if kind != b"moov":
+            continue  # mdat & co.: solo saltamos por tamaño, nunca se leen
+
+        moov_end = min(box_start + size, file_size)
+        mvhd = None
+        mvex = None
+        for child_start, child_kind, child_size, child_hl in _iter_boxes(f, box_start + hl, moov_end):
+            if child_kind == b"mvhd":
+                f.seek(child_start + child_hl)
+                mvhd = _mvhd_duration(f, child_size - child_hl)
+            elif child_kind == b"mvex":
+                mvex = (child_start + child_hl, child_start + child_size)
+            if mvhd and mvhd[1]:
+                break
+
+        if not mvhd:
+            return None
+        timescale, duration = mvhd
+        if not duration and mvex:
+            duration = _mehd_duration(f, *mvex) or 0
+        return duration / timescale
+    return None
+
+
+# -------------------------
+# Matroska / WebM  (Segment/Info/Duration)
+# -------------------------
+EBML_HEADER = 0x1A45DFA3
+MKV_SEGMENT = 0x18538067
+MKV_INFO = 0x1549A966
+MKV_CLUSTER = 0x1F43B675
+MKV_TIMECODE_SCALE = 0x2AD7B1
+MKV_DURATION = 0x4489
+
+
+def _read_vint(f, keep_marker: bool):
+    b = f.read(1)
+    if not b:
+        return None
+    first = b[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not (first & mask):
+        mask >>= 1
+        length += 1
+    if length > 8:
+        return None
+    rest = f.read(length - 1)
+    if len(rest) < length - 1:
+        return None
+    value = first if keep_marker else first & (mask - 1)
+    for c in rest:
+        value = (value << 8) | c
+    unknown = (not keep_marker) and value == (1 << (7 * length)) - 1
+    return value, length, unknown
+
+
+def _read_element_header(f):
+    eid = _read_vint(f, keep_marker=True)
+    if eid is None:
+        return None
+    size = _read_vint(f, keep_marker=False)
+    if size is None:
+        return None
+    return eid[0], size[0], size[2]
+
+
+def _mkv_info_duration(f, end: int):
+    scale = 1_000_000
+    duration = None
+    for _ in range(MAX_ELEMENTS):
+        if f.tell() >= end:
+            break
+        el = _read_element_header(f)
+        if el is None:
+            return None
+        eid, size, unknown = el
+        if unknown:
+            return None
+        body_start = f.tell()
+        if eid == MKV_TIMECODE_SCALE and 0 < size <= 8:
+            scale = int.from_bytes(f.read(size), "big")
+        elif eid == MKV_DURATION and size in (4, 8):
+            duration = struct.unpack(">f" if size == 4 else ">d", f.read(size))[0]
+        f.seek(body_start + size)
+    if duration is None:
+        return None
+    return duration * scale / 1e9
+
+
+def mkv_duration(f, file_size: int) -> float | None:
+    el = _read_element_header(f)
+    if el is None or el[0] != EBML_HEADER:
+        return None
+    f.seek(f.tell() + el[1])
+
+    el = _read_element_header(f)
+    if el is None or el[0] != MKV_SEGMENT:
+        return None
+    seg_end = file_size if el[2] else min(f.tell() + el[1], file_size)
+
+    for _ in range(MAX_ELEMENTS):
+        if f.tell() >= seg_end:
+            break
+        el = _read_element_header(f)
+        if el is None:
+            return None
+        eid, size, unknown = el
+        if eid == MKV_INFO:
+            if unknown:
+                return None
+            return _mkv_info_duration(f, f.tell() + size)
+        if eid == MKV_CLUSTER or unknown:
+            # Info siempre va antes de los clusters; si no lo vimos, no está
+            return None
+        f.seek(f.tell() + size)
+    return None
+
+
+# -------------------------
+# AVI  (RIFF/hdrl/avih)
+# -------------------------
+def _iter_riff_chunks(buf: bytes, start: int, end: int):
+    pos = start
+    while pos + 8 <= end:
+        cid = buf[pos:pos + 4]
+        size = struct.unpack("<I", buf[pos + 4:pos + 8])[0]
+        yield cid, pos + 8, min(pos + 8 + size, end)
+        pos += 8 + size + (size & 1)
+
+
+def avi_duration(f, file_size: int) -> float | None:
+    head = f.read(24)
+    if len(head) < 24 or head[:4] != b"RIFF" or head[8:12] != b"AVI ":
+        return None
+    if head[12:16] != b"LIST" or head[20:24] != b"hdrl":
+        return None
+    hdrl_size = struct.unpack("<I", head[16:20])[0]
+    buf = head[20:24] + f.read(min(hdrl_size, AVI_HDRL_MAX) - 4)
+
+    us_per_frame = 0
+    frames = 0
+    for cid, body, end in _iter_riff_chunks(buf, 4, len(buf)):
+        if cid == b"avih" and end - body >= 20:
+            us_per_frame, _, _, _, frames = struct.unpack("<5I", buf[body:body + 20])
+        elif cid == b"LIST" and buf[body:body + 4] == b"odml":
+            # OpenDML (>1 GB): avih solo cuenta los frames del primer RIFF
+            for sub, sub_body, sub_end in _iter_riff_chunks(buf, body + 4, end):
+                if sub == b"dmlh" and sub_end - sub_body >= 4:
+                    frames = max(frames, struct.unpack("<I", buf[sub_body:sub_body + 4])[0])
+
+    if not us_per_frame or not frames:
+        return None
+    return us_per_frame * frames / 1e6
+
+
+# -------------------------
+# Entry point
+# -------------------------
+MP4_TOP_LEVEL = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot", b"uuid"}
+
+
+def header_duration_seconds(path: str) -> float | None:
+    """
+    Lee la duración directo de la cabecera del contenedor (unos pocos KB).
+    Devuelve None si el formato no se reconoce o la cabecera no sirve;
+    en ese caso hay que usar el camino lento (ffmpeg).
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, 2)
+            file_size = f.tell()
+            f.seek(0)
+            magic = f.read(12)
+            f.seek(0)
+
+            if magic[:4] == b"\x1a\x45\xdf\xa3":
+                dur = mkv_duration(f, file_size)
+            elif magic[:4] == b"RIFF" and magic[8:12] == b"AVI ":
+                dur = avi_duration(f, file_size)
+            elif magic[4:8] in MP4_TOP_LEVEL:
+                dur = mp4_duration(f, file_size)
+            else:
+                return None
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if dur is None or not math.isfinite(dur) or dur <= 0:
+        return None
+    return float(dur)
+
+
+# -------------------------
+# Camino lento, aislado
+# -------------------------
+def decoder_duration_seconds(path: str) -> float:
+    """Duración vía moviepy/ffmpeg. Lanza excepción si no se puede leer."""
+    # moviepy tarda en importarse: solo se carga si alguna cabecera falla
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+    with VideoFileClip(path) as clip:
+        return float(clip.duration or 0)
+
+
+def _short_error(e: Exception) -> str:
+    # ffmpeg vuelca todo su stderr en el mensaje: alcanza con la última línea
+    lines = [line.strip() for line in str(e).splitlines() if line.strip()]
+    return f"{type(e).__name__}: {lines[-1] if lines else ''}"[:300]
+
+
+def _helper_main(conn):
+    """Proceso hijo: mide los paths que llegan por conn hasta recibir None."""
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            return
+        if path is None:
+            return
+        try:
+            conn.send((decoder_duration_seconds(path), None))
+        except Exception as e:
+            conn.send((0.0, _short_error(e)))
+
+
+class _Helper:
+    def __init__(self):
+        ctx = multiprocessing.get_context("spawn")  # fork desde un proceso con hilos no es seguro
+        self.conn, child = ctx.Pipe()
+        self.proc = ctx.Process(target=_helper_main, args=(child,), daemon=True)
+        self.proc.start()
+        child.close()
+
+    def probe(self, path: str, timeout: float):
+        """(duración, error). Si no responde a tiempo se mata el proceso (hay que descartar el helper)."""
+        try:
+            self.conn.send(path)
+            if self.conn.poll(timeout):
+                return self.conn.recv()
+        except (EOFError, OSError):
+            self.kill()
+            return 0.0, f"probe process died (exit code {self.proc.exitcode})"
+        self.kill()
+        return 0.0, f"timed out after {timeout:g}s"
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.is_alive()
+
+    def kill(self):
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.proc.join(timeout=5)
+        self.conn.close()
+
+    def close(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.proc.join(timeout=1)
+        self.kill()
+
+
+class IsolatedProbe:
+    """
+    probe(path) -> (duración, error | None).
+
+    La cabecera se lee en el mismo proceso (lecturas acotadas, no puede
+    colgarse con un archivo corrupto). El camino de ffmpeg corre en procesos
+    hijos reutilizables, uno por probe concurrente; si uno no contesta en
+    `timeout` segundos se mata y el próximo archivo arranca otro, así que un
+    archivo malo nunca le suma más que timeout al escaneo.
+    """
+
+    def __init__(self, timeout: float = PROBE_TIMEOUT_SECS):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = []
+
+    # Viaja por pickle al pool de procesos sin sus helpers
+    def __getstate__(self):
+        return {"timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__init__(state["timeout"])
+
+    def __call__(self, path: str):
+        dur = header_duration_seconds(path)
+        if dur is not None:
+            return dur, None
+
+        with self.lock:
+            helper = self.idle.pop() if self.idle else None
+        if helper is None:
+            helper = _Helper()
+        dur, error = helper.probe(path, self.timeout)
+        if helper.alive:
+            with self.lock:
+                self.idle.append(helper)
+        if error is None and dur <= 0:
+            error = "no duration found"
+        return dur, error
+
+    def close(self):
+        with self.lock:
+            helpers, self.idle = self.idle, []
+        for h in helpers:
+            h.close()
@@ -0,0 +1,78 @@
+import os
+import json
+import time
+import threading
+
+from storage import atomic_write_json
+
+APP_QUARANTINE_FILE = "quarantine.json"
+
+
+class SkipList:
+    """
+    Archivos que los escaneos saltean mientras sigan iguales (mismo tamaño y
+    mtime), guardados en un JSON {path: {"size", "mtime", "at", ...}}. Si el
+    archivo cambia se vuelve a evaluar. La usan a la vez el escaneo y el
+    watcher: todo pasa por el lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("entries", {})
+            except Exception:
+                self.entries = {}
+        return self
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            atomic_write_json(self.path, {"entries": self.entries})
+            self.dirty = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def blocks(self, path: str, size: int, mtime: float) -> bool:
+        entry = self.entries.get(path)
+        return entry is not None and entry["size"] == size and entry["mtime"] == mtime
+
+    def _put(self, path: str, size: int | None, mtime: float | None, **fields):
+        if size is None or mtime is None:
+            try:
+                st = os.stat(path)
+                size, mtime = st.st_size, st.st_mtime
+            except OSError:
+                return
+        with self.lock:
+            self.entries[path] = {"size": size, "mtime": mtime, "at": int(time.time()), **fields}
+            self.dirty = True
+
+    def discard(self, paths):
+        with self.lock:
+            for p in paths:
+                if self.entries.pop(p, None) is not None:
+                    self.dirty = True
+
+    def items(self):
+        """(path, entry) del más reciente al más viejo."""
+        with self.lock:
+            return sorted(self.entries.items(), key=lambda kv: kv[1]["at"], reverse=True)
+
+
+class Quarantine(SkipList):
+    """Archivos que fallaron o se pasaron del timeout al medirlos, con su error."""
+
+    def __init__(self, path: str = APP_QUARANTINE_FILE):
+        super().__init__(path)
+
+    def add(self, path: str, error: str, size: int | None = None, mtime: float | None = None):
+        self._put(path, size, mtime, error=error)
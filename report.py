@@ -0,0 +1,222 @@
+"""
+Reportes por período y por carpeta / tipo / descripción, para facturar.
+
+Los items se pasan una sola vez a columnas NumPy (ms, timestamp, códigos de
+tipo, carpeta y descripción); después cada reporte es aritmética sobre
+arrays: bucket de fecha, np.unique sobre una clave combinada y bincount.
+numpy viene con moviepy; este módulo se importa solo al pedir un reporte.
+"""
+import os
+import csv
+import json
+import time
+from datetime import date
+
+import numpy as np
+
+from core import format_hms
+
+PERIODS = ("day", "week", "month", "total")
+GROUP_KEYS = ("folder", "type", "label")
+TYPES = ("video", "manual")
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# 1970-01-01 fue jueves: (día + 3) % 7 da 0 para los lunes
+EPOCH_WEEKDAY = 3
+# Rango de horas (~240 años) hasta el que local_days usa una tabla por hora en vez de np.unique
+DENSE_HOURS = 1 << 21
+
+
+def _folders(paths):
+    # rpartition es varias veces más rápido que os.path.dirname en un millón de paths
+    if os.sep != "/":
+        paths = [p.replace(os.sep, "/") for p in paths]
+    return [p.rpartition("/")[0] for p in paths]
+
+
+def categorical(values):
+    """
+    (códigos int32, nombres) de una lista de strings. Agrupa por hash con
+    np.unique (no arma un dict de un millón de entradas) y verifica contra los
+    valores: si dos strings distintos comparten hash se usa el camino exacto.
+    """
+    values = np.array(values, dtype=object)
+    if not len(values):
+        return np.zeros(0, np.int32), values
+    hashes = np.fromiter(map(hash, values), np.int64, len(values))
+    _, first, inverse = np.unique(hashes, return_index=True, return_inverse=True)
+    names = values[first]
+    if not (names[inverse] == values).all():
+        index = {}
+        codes = np.fromiter((index.setdefault(v, len(index)) for v in values), np.int32, len(values))
+        return codes, np.array(list(index), dtype=object)
+    return inverse.astype(np.int32), names
+
+
+class ItemColumns:
+    """
+    Vista columnar de los items. folder y label son categóricos (un código
+    int32 por item + la tabla de nombres) y se arman recién cuando un
+    reporte agrupa por ellos.
+    """
+
+    def __init__(self, items):
+        self._items = items if isinstance(items, list) else list(items)
+        # Mismo redondeo que aggregates.duration_ms
+        dur = np.array([it.get("duration_sec", 0.0) or 0.0 for it in self._items], np.float64)
+        self.duration_ms = np.floor(dur * 1000 + 0.5).astype(np.int64)
+        self.added_at = np.array([int(it.get("added_at", 0) or 0) for it in self._items], np.int64)
+        self.type_code = np.array([it.get("type", "video") != "video" for it in self._items], np.int8)
+        self._categories = {}
+
+    def __len__(self):
+        return len(self.duration_ms)
+
+    def category(self, key: str):
+        """(códigos, nombres) para "folder" o "label"."""
+        if key not in self._categories:
+            if key == "folder":
+                values = _folders([it.get("path", "") or "" for it in self._items])
+            else:
+                values = [it.get("label", "") for it in self._items]
+            self._categories[key] = categorical(values)
+        return self._categories[key]
+
+    # -------------------------
+    # Fechas
+    # -------------------------
+    def local_days(self):
+        """Día local (días desde 1970-01-01) de cada item, como aggregates.day_of pero vectorizado."""
+        if not len(self):
+            return np.zeros(0, np.int64)
+        # Offset de la zona horaria por hora UTC: respeta los cambios de horario de verano.
+        # localtime solo para las horas que aparecen: un added_at=0 suelto no recorre décadas
+        hours = self.added_at // 3600
+        first = int(hours.min())
+        span = int(hours.max()) - first + 1
+        if span > DENSE_HOURS:
+            # Timestamps raros (en ms, del futuro lejano): sin tabla por hora
+            used, inverse = np.unique(hours, return_inverse=True)
+            return (self.added_at + _gmtoffs(used)[inverse.reshape(-1)]) // 86400
+        rel = hours - first
+        present = np.zeros(span, bool)
+        present[rel] = True
+        used = np.flatnonzero(present)
+        table = np.zeros(span, np.int32)
+        table[used] = _gmtoffs(used + first)
+        return (self.added_at + table[rel]) // 86400
+
+
+def _gmtoffs(hours):
+    return np.fromiter((time.localtime(h * 3600).tm_gmtoff for h in hours.tolist()), np.int64, len(hours))
+
+
+def _bucket(days, period: str):
+    if period == "day":
+        return days
+    if period == "week":
+        return days - (days + EPOCH_WEEKDAY) % 7
+    if period == "month":
+        return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+    return np.zeros_like(days)
+
+
+def _bucket_label(code: int, period: str) -> str:
+    if period == "month":
+        return str(np.datetime64(int(code), "M"))
+    if period == "total":
+        return "total"
+    return date.fromordinal(int(code) + EPOCH_ORDINAL).isoformat()
+
+
+def build_report(cols: ItemColumns, period: str = "month", by=("folder",), first: date | None = None,
+                 last: date | None = None, top: int | None = None) -> list[dict]:
+    """
+    Suma por (período, *by). Filas ordenadas por período y, dentro de cada
+    uno, de mayor a menor tiempo; top deja las N primeras de cada período.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"unknown period {period!r}")
+    by = tuple(by)
+    for key in by:
+        if key not in GROUP_KEYS:
+            raise ValueError(f"unknown group {key!r}")
+
+    days = cols.local_days()
+    mask = np.ones(len(cols), bool)
+    if first is not None:
+        mask &= days >= first.toordinal() - EPOCH_ORDINAL
+    if last is not None:
+        mask &= days <= last.toordinal() - EPOCH_ORDINAL
+    if not mask.any():
+        return []
+
+    bucket = _bucket(days[mask], period)
+    codes = {}
+    radix = {}
+    names = {}
+    for k in by:
+        if k == "type":
+            code, names[k] = cols.type_code, np.array(TYPES, dtype=object)
+        else:
+            code, names[k] = cols.category(k)
+        codes[k] = code[mask].astype(np.int64)
+        radix[k] = max(len(names[k]), 1)
+
+    # Clave combinada en base mixta: (bucket, k1, k2, ...) -> un int64
+    b0 = int(bucket.min())
+    key = bucket - b0
+    for k in by:
+        key = key * radix[k] + codes[k]
+    uniq, inverse = np.unique(key, return_inverse=True)
+    sums = np.bincount(inverse, weights=cols.duration_ms[mask], minlength=len(uniq)).astype(np.int64)
+    counts = np.bincount(inverse, minlength=len(uniq))
+
+    # Decodificar la clave de cada grupo
+    parts = {}
+    rest = uniq
+    for k in reversed(by):
+        rest, parts[k] = np.divmod(rest, radix[k])
+    group_bucket = rest + b0
+
+    order = np.lexsort((-sums, group_bucket))
+    if top is not None:
+        sorted_bucket = group_bucket[order]
+        starts = np.searchsorted(sorted_bucket, sorted_bucket, side="left")
+        order = order[np.arange(len(order)) - starts < top]
+
+    rows = []
+    for i in order.tolist():
+        row = {"period": _bucket_label(group_bucket[i], period)}
+        for k in by:
+            row[k] = names[k][parts[k][i]]
+        row["items"] = int(counts[i])
+        row["seconds"] = int(sums[i]) / 1000
+        rows.append(row)
+    return rows
+
+
+# -------------------------
+# Export
+# -------------------------
+def write_csv(rows, path: str, by=("folder",)):
+    columns = ["period", *by, "items", "seconds", "hours", "hms"]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(columns)
+        for r in rows:
+            w.writerow([r["period"], *(r[k] for k in by), r["items"], f"{r['seconds']:.3f}",
+                        f"{r['seconds'] / 3600:.2f}", format_hms(r["seconds"])])
+
+
+def write_json(rows, path: str, period: str = "month", by=("folder",)):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"period": period, "by": list(by), "rows": rows}, f, ensure_ascii=False, indent=2)
+
+
+def export(rows, path: str, period: str = "month", by=("folder",)):
+    """CSV o JSON según la extensión de path."""
+    if os.path.splitext(path)[1].lower() == ".json":
+        write_json(rows, path, period, by)
+    else:
+        write_csv(rows, path, by)
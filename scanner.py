@@ -0,0 +1,679 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from operator import itemgetter
+
+from dedupe import DuplicateFinder
+from metrics import ScanMetrics, timed_probe
+from storage import atomic_write_json
+
+VIDEO_EXTS = {".mp4", ".mov", ".mkv", ".avi", ".webm", ".m4v"}
+APP_DIRS_FILE = "dir_snapshots.json"
+# mtimes más nuevos que esto respecto del snapshot no son confiables (resolución del FS)
+RACY_MTIME_NS = 2_000_000_000
+
+# Pocos para discos mecánicos / red, muchos para NVMe
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+MAX_WORKERS = 32
+
+
+# -------------------------
+# Files
+# -------------------------
+def fingerprint(path: str) -> str:
+    st = os.stat(path)
+    return make_fingerprint(path, st.st_size, st.st_mtime)
+
+
+def make_fingerprint(path: str, size: int, mtime: float) -> str:
+    return f"{path}|{size}|{int(mtime)}"
+
+
+def is_video_file(path: str, exts=VIDEO_EXTS) -> bool:
+    return os.path.splitext(path)[1].lower() in exts
+
+
+def parse_exts(text) -> set:
+    """".mp4, MOV mts" o una lista -> {".mp4", ".mov", ".mts"}. Vacío = VIDEO_EXTS."""
+    if isinstance(text, str):
+        text = text.replace(",", " ").split()
+    exts = {("." + e.strip().lstrip(".")).lower() for e in text if e.strip().strip(".")}
+    return exts or set(VIDEO_EXTS)
+
+
+def _exts_key(exts):
+    # Lo que se guarda en el snapshot: None para VIDEO_EXTS (los snapshots viejos no tienen la clave)
+    return None if exts == VIDEO_EXTS else sorted(exts)
+
+
+class DirSnapshots:
+    """
+    Por carpeta: mtime, cantidad de entradas, videos (nombre, tamaño, mtime)
+    y subcarpetas. Si el mtime de la carpeta no cambió, su listado se reutiliza
+    sin scandir ni stat por archivo; solo se hace un stat por carpeta.
+    Un video reescrito en el lugar (mismo nombre) no cambia el mtime de la
+    carpeta: se detecta recién cuando la carpeta cambia. El listado guardado
+    vale solo para las mismas extensiones con las que se armó.
+    """
+
+    def __init__(self, path: str = APP_DIRS_FILE):
+        self.path = path
+        self.dirs = {}
+        self.reused = 0
+        self.listed = 0
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.dirs = json.load(f)
+            except Exception:
+                self.dirs = {}
+        return self
+
+    def save(self):
+        atomic_write_json(self.path, self.dirs)
+
+    def prune(self, root: str, visited: set):
+        prefix = os.path.join(root, "")
+        # list(): con varias raíces a la vez otro hilo puede estar agregando carpetas
+        for d in [d for d in list(self.dirs) if (d == root or d.startswith(prefix)) and d not in visited]:
+            del self.dirs[d]
+
+
+def _list_dir(dirpath: str, exts=VIDEO_EXTS):
+    files = []
+    subdirs = []
+    count = 0
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            count += 1
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif is_video_file(entry.name, exts) and entry.is_file():
+                    st = entry.stat()  # en Windows viene gratis con el DirEntry
+                    files.append((entry.name, st.st_size, st.st_mtime))
+            except OSError:
+                continue
+    return files, subdirs, count
+
+
+def iter_dirs(root: str, recursive: bool, snapshots: DirSnapshots | None = None, exts=VIDEO_EXTS):
+    """
+    Los videos bajo root (los archivos con extensión en exts) carpeta por
+    carpeta, a medida que se listan: una lista de (path, size, mtime) por
+    carpeta que tenga alguno. Los snapshots de carpetas que ya no existen se
+    podan solo si se recorrió todo.
+    """
+    exts_key = _exts_key(exts)
+    visited = set()
+    stack = [root]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            dir_mtime = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            continue
+        visited.add(dirpath)
+
+        rec = snapshots.dirs.get(dirpath) if snapshots is not None else None
+        if (rec and rec["mtime_ns"] == dir_mtime and rec["scanned_at_ns"] - dir_mtime > RACY_MTIME_NS
+                and rec.get("exts") == exts_key):
+            files, subdirs = rec["files"], rec["dirs"]
+            snapshots.reused += 1
+        else:
+            try:
+                files, subdirs, count = _list_dir(dirpath, exts)
+            except OSError:
+                continue
+            if snapshots is not None:
+                snapshots.listed += 1
+                rec = {
+                    "mtime_ns": dir_mtime,
+                    "scanned_at_ns": time.time_ns(),
+                    "count": count,
+                    "files": files,
+                    "dirs": subdirs,
+                }
+                if exts_key is not None:
+                    rec["exts"] = exts_key
+                snapshots.dirs[dirpath] = rec
+
+        if files:
+            yield [(os.path.join(dirpath, name), size, mtime) for name, size, mtime in files]
+        if recursive:
+            stack.extend(os.path.join(dirpath, d) for d in reversed(sorted(subdirs)))
+        else:
+            break
+
+    if snapshots is not None and recursive:
+        snapshots.prune(root, visited)
+
+
+def list_videos(root: str, recursive: bool, snapshots: DirSnapshots | None = None, exts=VIDEO_EXTS):
+    """Devuelve (path, size, mtime) de cada video bajo root, todos juntos en una lista."""
+    return [found for files in iter_dirs(root, recursive, snapshots, exts) for found in files]
+
+
+# -------------------------
+# Parallel probing
+# -------------------------
+def probe_in_order(paths, probe, workers: int = DEFAULT_WORKERS, use_processes: bool = False, key=None):
+    """
+    Ejecuta probe(path) en un pool y devuelve (path, resultado) en el mismo
+    orden que paths. Nunca hay más de `workers` probes corriendo y la ventana
+    de trabajos encolados está acotada, así que paths puede ser un generador.
+    Con key, paths trae registros y a probe le llega key(registro).
+    """
+    workers = max(1, min(int(workers), MAX_WORKERS))
+    arg = key or (lambda p: p)
+    if workers == 1:
+        for p in paths:
+            yield p, probe(arg(p))
+        return
+
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    pool = pool_cls(max_workers=workers)
+    pending = deque()
+    try:
+        for p in paths:
+            pending.append((p, pool.submit(probe, arg(p))))
+            # Lo ya medido sale enseguida aunque la entrada venga de a poco (escaneo en streaming)
+            while pending and (len(pending) >= workers * 2 or pending[0][1].done()):
+                head, fut = pending.popleft()
+                yield head, fut.result()
+        while pending:
+            head, fut = pending.popleft()
+            yield head, fut.result()
+    finally:
+        # Si el consumidor corta antes (cancelar), no esperamos lo encolado
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# -------------------------
+# Background scan
+# -------------------------
+# Entre etapas del escaneo pasan tandas de hasta PIPE_CHUNK archivos (así
+# cada archivo no paga un pasaje entre hilos) por colas de PIPE_SIZE tandas;
+# la de mensajes también es acotada. La memoria del escaneo no depende de
+# cuántos archivos tenga el árbol
+PIPE_CHUNK = 512
+PIPE_SIZE = 64
+SCAN_QUEUE_SIZE = 4096
+# Cada cuánto se avisa cuánto lleva listado (un "total" parcial)
+PROGRESS_EVERY_SECS = 0.2
+
+
+def save_state(*parts):
+    """Guarda cache, snapshots y listas (los que no son None); un error de disco no corta el escaneo."""
+    try:
+        for part in parts:
+            if part is not None:
+                part.save()
+    except OSError:
+        pass
+
+
+class _Failed:
+    __slots__ = ("error",)
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+_END = object()
+
+
+class _Pipe:
+    """
+    Cola acotada entre dos etapas del escaneo, cada una en su hilo. feed()
+    corre en el hilo que produce y cierra la cola al terminar (o le pasa su
+    excepción al que consume); iterarla corre en el que consume. stop suelta
+    a las dos puntas cuando la última etapa terminó antes (cancelar, error).
+    """
+
+    def __init__(self, stop: threading.Event, size: int = PIPE_SIZE):
+        self.queue = queue.Queue(size)
+        self.stop = stop
+
+    def _put(self, x) -> bool:
+        while not self.stop.is_set():
+            try:
+                self.queue.put(x, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def feed(self, items):
+        try:
+            for x in items:
+                if not self._put(x):
+                    return
+        except Exception as e:
+            self._put(_Failed(e))
+            return
+        self._put(_END)
+
+    def __iter__(self):
+        while not self.stop.is_set():
+            try:
+                x = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if x is _END:
+                return
+            if type(x) is _Failed:
+                raise x.error
+            yield x
+
+
+class ScanJob(threading.Thread):
+    """
+    Escanea una carpeta en segundo plano. Nunca toca Tk: todo lo que encuentra
+    lo manda por self.queue y la UI lo consume con after():
+
+      ("total", n_paths, n_skipped)   n_paths archivos más listados, n_skipped de ellos sin nada que hacer
+      ("listed",)                     listado terminado: los "total" ya suman todo
+      ("item", fid, path, dur)        un video nuevo ya medido
+      ("moved", old_id, fid, path, dur)  un video ya guardado que cambió de ruta
+      ("quarantined", path, error)    no se pudo medir: no se guarda, queda en cuarentena
+      ("duplicate", path, original)   copia de un video ya guardado (o de otro de este escaneo)
+      ("done", cancelled, stats)      fin (normal o cancelado) + contadores
+      ("error", message)              fin por excepción
+
+    Es un pipeline: un hilo lista carpeta por carpeta, otro descarta lo ya
+    guardado, en cuarentena o copiado y resuelve la cache, y este mide; entre
+    uno y otro hay colas acotadas (PIPE_SIZE). Se empieza a medir con el
+    primer archivo encontrado, el árbol nunca está entero en memoria y los
+    "total" van llegando mientras se lista: hasta ("listed",) son un piso.
+    self.queue también es acotada, así que quien consume marca el ritmo.
+
+    probe(path) devuelve (duración, error | None), como probe.IsolatedProbe.
+    Los archivos en cuarentena que no cambiaron ni se miden. Con duplicates
+    (dedupe.DuplicateList) las copias de contenido idéntico no se suman.
+
+    stats["metrics"] es el ScanMetrics del escaneo (tiempo por fase, latencias
+    de probe). Las fases de listado y filtro son el tiempo que trabajó cada
+    hilo; la de probe, lo que duró el pipeline entero. Con profile_path se
+    corre bajo cProfile y se vuelcan las stats ahí (solo este hilo: ni las
+    otras etapas ni los workers del pool aparecen).
+
+    exts reemplaza a VIDEO_EXTS. Con persist=False la cache, los snapshots y
+    las listas no se guardan al terminar: lo hace quien lanzó el escaneo
+    (MultiScanJob, una vez para todas las raíces).
+    """
+
+    def __init__(self, root: str, recursive: bool, known_ids: set, probe,
+                 workers: int = DEFAULT_WORKERS, use_processes: bool = False, cache=None,
+                 snapshots: DirSnapshots | None = None, quarantine=None, duplicates=None,
+                 profile_path: str | None = None, exts=VIDEO_EXTS, persist: bool = True):
+        super().__init__(daemon=True)
+        self.root = root
+        self.recursive = recursive
+        self.exts = exts
+        self.persist = persist
+        self.known_ids = set(known_ids)
+        self.probe = probe
+        self.workers = workers
+        self.use_processes = use_processes
+        self.cache = cache
+        self.snapshots = snapshots
+        self.quarantine = quarantine
+        self.duplicates = duplicates
+        self.profile_path = profile_path
+        self.metrics = ScanMetrics()
+        self.queue = queue.Queue(SCAN_QUEUE_SIZE)
+        self.cancel_event = threading.Event()
+        # Listado que todavía no salió en un "total" ([archivos, salteados]) y
+        # mensajes del filtro que salen después de él
+        self._unreported = [0, 0]
+        self._outbox = []
+        self._reported_at = 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run(self):
+        if not self.profile_path:
+            self._run()
+            return
+        import cProfile
+        prof = cProfile.Profile()
+        try:
+            prof.runcall(self._run)
+        finally:
+            prof.dump_stats(self.profile_path)
+
+    def _run(self):
+        m = self.metrics
+        # Cuando esta etapa termina (bien, cancelada o con error) las anteriores se sueltan
+        stop = threading.Event()
+        found = _Pipe(stop)
+        todo = _Pipe(stop)
+        stages = [
+            threading.Thread(target=found.feed, args=(self._discover(),), name="scan-list", daemon=True),
+            threading.Thread(target=todo.feed, args=(self._filter(found),), name="scan-filter", daemon=True),
+        ]
+        try:
+            # Sin esto una raíz que no existe (NAS desmontado) terminaría como "0 videos"
+            if not os.path.isdir(self.root):
+                raise OSError(f"not a folder: {self.root}")
+            for stage in stages:
+                stage.start()
+
+            results = probe_in_order((entry for batch in todo for entry in batch), partial(timed_probe, self.probe),
+                                     workers=self.workers, use_processes=self.use_processes, key=itemgetter(1))
+            try:
+                with m.phase("probe"):
+                    for (fid, p, size, mtime, key, st), ((dur, error), secs) in results:
+                        if self.cancelled:
+                            break
+                        m.probed(secs, size, error is None)
+                        if error is not None:
+                            # Sin item: un 0.0 guardado escondería el archivo malo para siempre
+                            if self.quarantine is not None:
+                                self.quarantine.add(p, error, size, mtime)
+                            self.queue.put(("quarantined", p, error))
+                            continue
+                        if self.quarantine is not None:
+                            self.quarantine.discard([p])
+                        if key is not None:
+                            self.cache.put(key, p, fid, dur, st)
+                        self.queue.put(("item", fid, p, dur))
+            finally:
+                results.close()
+
+            final = ("done", self.cancelled, self._stats())
+        except Exception as e:
+            final = ("error", str(e))
+        stop.set()
+        for stage in stages:
+            if stage.ident is not None:
+                stage.join()  # el listado toca los snapshots: tiene que terminar antes de guardarlos
+        # Guardar antes de avisar: quien recibe "done" puede cerrar el proceso
+        if self.persist:
+            save_state(self.cache, self.snapshots, self.quarantine, self.duplicates)
+        self.queue.put(final)
+
+    # -------------------------
+    # Etapas
+    # -------------------------
+    def _discover(self):
+        """Etapa 1: tandas de (path, size, mtime) a medida que se listan las carpetas."""
+        busy = 0.0
+        start = time.perf_counter()
+        try:
+            for files in iter_dirs(self.root, self.recursive, self.snapshots, self.exts):
+                busy += time.perf_counter() - start
+                for i in range(0, len(files), PIPE_CHUNK):
+                    yield files[i:i + PIPE_CHUNK]
+                start = time.perf_counter()
+            busy += time.perf_counter() - start
+        finally:
+            self.metrics.add_time("list", busy)
+
+    def _filter(self, found):
+        """
+        Etapa 2: saltea lo ya guardado, lo que está en cuarentena o en la lista
+        de copias y las copias nuevas; lo que está en la cache sale como item
+        sin medir. Deja pasar tandas de (fid, path, size, mtime, content_key,
+        stat) de lo que falta medir.
+        """
+        m = self.metrics
+        finder = DuplicateFinder(self.known_ids) if self.duplicates is not None else None
+        spent = dict.fromkeys(("filter", "dedupe", "cache"), 0.0)
+        self._reported_at = time.monotonic()
+        try:
+            for chunk in found:
+                batch = []
+                for p, size, mtime in chunk:
+                    if self.cancelled:
+                        self._report()
+                        return
+                    start = time.perf_counter()
+                    entry = self._admit(p, size, mtime, finder, spent)
+                    if entry is not None:
+                        batch.append(entry)
+                    spent["filter"] += time.perf_counter() - start
+                # Antes de pasar la tanda a medir: ningún "item" puede llegar antes que su "total"
+                if batch or self._outbox or time.monotonic() - self._reported_at >= PROGRESS_EVERY_SECS:
+                    self._report()
+                if batch:
+                    yield batch
+            self._report()
+            self.queue.put(("listed",))
+        finally:
+            m.add_time("filter", spent["filter"] - spent["dedupe"] - spent["cache"])
+            for name in ("dedupe", "cache"):
+                if spent[name]:
+                    m.add_time(name, spent[name])
+
+    def _admit(self, p, size, mtime, finder, spent):
+        """Un archivo del listado: lo que hay que medir, o None si se salteó o salió de la cache."""
+        m = self.metrics
+        m.count("seen")
+        self._unreported[0] += 1
+        fid = make_fingerprint(p, size, mtime)
+        if fid in self.known_ids:
+            m.count("skipped_known")
+        elif self.quarantine is not None and self.quarantine.blocks(p, size, mtime):
+            m.count("skipped_quarantined")  # los que se ponen en cuarentena ahora van a "failed"
+        elif self.duplicates is not None and self.duplicates.blocks(p, size, mtime):
+            m.count("duplicates")
+        else:
+            self.known_ids.add(fid)
+            original = None
+            if finder is not None:
+                start = time.perf_counter()
+                original = finder.check(p, size)
+                spent["dedupe"] += time.perf_counter() - start
+            if original is None:
+                # Se mide o sale de la cache: cuenta como hecho cuando llegue su "item"
+                start = time.perf_counter()
+                entry = self._resolve_cached(fid, p, size, mtime)
+                spent["cache"] += time.perf_counter() - start
+                return entry
+            self.duplicates.add(p, original, size, mtime)
+            m.count("duplicates")
+            self._put(("duplicate", p, original))
+        self._unreported[1] += 1
+        return None
+
+    def _report(self):
+        n, skipped = self._unreported
+        if n:
+            self.queue.put(("total", n, skipped))
+            self._unreported = [0, 0]
+        for msg in self._outbox:
+            self.queue.put(msg)
+        self._outbox = []
+        self._reported_at = time.monotonic()
+
+    def _put(self, msg):
+        # Sale con el próximo "total", que ya lo cuenta. De a tandas y no uno por archivo:
+        # cada put despierta a quien consume y, con hashes de por medio, cuesta un cambio de hilo
+        self._outbox.append(msg)
+
+    def _resolve_cached(self, fid, p, size, mtime):
+        """
+        Si p ya está en la cache sale sin decodificar (como item nuevo o como
+        "moved" si el item original ya no existe en su ruta) y devuelve None.
+        Si no, lo que necesita la etapa de probe: (fid, path, size, mtime,
+        content_key, stat).
+        """
+        if self.cache is None:
+            return fid, p, size, mtime, None, None
+        try:
+            st = os.stat(p)
+            key = self.cache.content_key(p, st)
+        except OSError:
+            return fid, p, size, mtime, None, None
+
+        entry = self.cache.get(key)
+        if entry is None:
+            return fid, p, size, mtime, key, st
+
+        dur = entry["duration_sec"]
+        self.metrics.count("cached")
+        old_id = entry.get("id")
+        if old_id in self.known_ids and old_id != fid and not os.path.exists(entry.get("path", "")):
+            self._put(("moved", old_id, fid, p, dur))
+        else:
+            self._put(("item", fid, p, dur))
+        self.cache.put(key, p, fid, dur, st)
+        return None
+
+    def _stats(self) -> dict:
+        stats = {"metrics": self.metrics}
+        if self.snapshots is not None:
+            stats["dirs_listed"] = self.snapshots.listed
+            stats["dirs_reused"] = self.snapshots.reused
+        if self.cache is not None:
+            stats["cache_hits"] = self.cache.hits
+            stats["cache_misses"] = self.cache.misses
+        return stats
+
+
+# -------------------------
+# Scan profiles (varias raíces)
+# -------------------------
+def profile_roots(roots, default_workers: int = DEFAULT_WORKERS) -> list[dict]:
+    """
+    Raíces de un perfil guardado ([{"path", "recursive", "exts", "workers"}])
+    listas para MultiScanJob: path absoluto, exts como set (vacío = VIDEO_EXTS)
+    y workers en 1..MAX_WORKERS (0 o sin poner = default_workers). Una ruta
+    repetida queda una sola vez.
+    """
+    out = []
+    seen = set()
+    for r in roots:
+        path = os.path.abspath(r["path"])
+        if path in seen:
+            continue
+        seen.add(path)
+        workers = int(r.get("workers") or default_workers)
+        out.append({
+            "path": path,
+            "recursive": bool(r.get("recursive", True)),
+            "exts": parse_exts(r.get("exts") or ()),
+            "workers": max(1, min(workers, MAX_WORKERS)),
+        })
+    return out
+
+
+class _Tagged:
+    """La cola que ve cada ScanJob de un MultiScanJob: va a la común, marcada con el índice de la raíz."""
+    __slots__ = ("inbox", "tag")
+
+    def __init__(self, inbox, tag: int):
+        self.inbox = inbox
+        self.tag = tag
+
+    def put(self, msg):
+        self.inbox.put((self.tag, msg))
+
+
+class MultiScanJob(threading.Thread):
+    """
+    Escanea varias raíces a la vez: un ScanJob por raíz, cada uno con su
+    propio pool de `workers` probes, así una ruta lenta (NAS) no frena a un
+    disco local. Todo sale por una sola self.queue con el protocolo de
+    ScanJob: los "total" de todas las raíces se suman igual que los de una,
+    y ("listed",) y "done" salen una sola vez, cuando terminaron todas.
+
+    Una raíz que falla no corta a las demás: queda en stats["errors"] como
+    (raíz, mensaje); solo si fallan todas termina con ("error", ...). cache,
+    snapshots y las listas se comparten entre las raíces (son seguros entre
+    hilos) y se guardan una sola vez al final. Dos copias idénticas nuevas en
+    raíces distintas no se detectan en la misma pasada: cada raíz compara
+    contra lo ya guardado.
+    """
+
+    def __init__(self, roots, known_ids: set, probe, use_processes: bool = False, cache=None,
+                 snapshots: DirSnapshots | None = None, quarantine=None, duplicates=None):
+        super().__init__(daemon=True)
+        self.cache = cache
+        self.snapshots = snapshots
+        self.quarantine = quarantine
+        self.duplicates = duplicates
+        self.profile_path = None
+        self.inbox = queue.Queue(SCAN_QUEUE_SIZE)
+        self.jobs = []
+        for i, r in enumerate(roots):
+            job = ScanJob(r["path"], r["recursive"], known_ids, probe, workers=r["workers"],
+                          use_processes=use_processes, cache=cache, snapshots=snapshots,
+                          quarantine=quarantine, duplicates=duplicates, exts=r["exts"], persist=False)
+            job.queue = _Tagged(self.inbox, i)
+            self.jobs.append(job)
+        self.queue = queue.Queue(SCAN_QUEUE_SIZE)
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+        for job in self.jobs:
+            job.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def run(self):
+        for job in self.jobs:
+            job.start()
+        pending = len(self.jobs)
+        listing = set(range(len(self.jobs)))
+        cancelled = False
+        errors = []
+        seen = set()
+        while pending:
+            tag, msg = self.inbox.get()
+            kind = msg[0]
+            if kind in ("listed", "done", "error") and tag in listing:
+                # Una raíz que falla o se cancela tampoco va a mandar más "total"
+                listing.discard(tag)
+                if not listing:
+                    self.queue.put(("listed",))
+            if kind == "listed":
+                continue
+            if kind == "done":
+                pending -= 1
+                cancelled = cancelled or msg[1]
+                continue
+            if kind == "error":
+                pending -= 1
+                errors.append((self.jobs[tag].root, msg[1]))
+                continue
+            if kind == "item" or kind == "moved":
+                # Raíces que se pisan (una dentro de otra) encuentran el mismo archivo
+                fid = msg[1] if kind == "item" else msg[2]
+                if fid in seen:
+                    continue
+                seen.add(fid)
+            self.queue.put(msg)
+
+        save_state(self.cache, self.snapshots, self.quarantine, self.duplicates)
+        if self.jobs and len(errors) == len(self.jobs):
+            self.queue.put(("error", "; ".join(f"{root}: {e}" for root, e in errors)))
+            return
+        self.queue.put(("done", cancelled or self.cancelled, self._stats(errors)))
+
+    def _stats(self, errors) -> dict:
+        stats = {"metrics": ScanMetrics.combined(job.metrics for job in self.jobs), "errors": errors}
+        if self.snapshots is not None:
+            stats["dirs_listed"] = self.snapshots.listed
+            stats["dirs_reused"] = self.snapshots.reused
+        if self.cache is not None:
+            stats["cache_hits"] = self.cache.hits
+            stats["cache_misses"] = self.cache.misses
+        return stats
@@ -0,0 +1,208 @@
+"""
+Filtro del historial: texto, tipo, rango de fechas y carpeta.
+
+El texto se parte en términos y cada uno tiene que ser prefijo de alguna
+palabra de la descripción, del nombre de archivo o de la carpeta ("cli mp4"
+encuentra ".../clip0001.mp4"). SearchIndex responde eso sin recorrer los
+items: un índice invertido palabra -> ids con el vocabulario ordenado para
+buscar prefijos por bisect. Las palabras de carpeta apuntan a carpetas y no
+a items, así cada item entra una vez por palabra propia y una por carpeta.
+"""
+import os
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import date, datetime
+
+from aggregates import day_of, duration_ms
+
+WORD_RE = re.compile(r"\w+")
+_findall = WORD_RE.findall
+# Mayor que cualquier sufijo de una palabra: [prefijo, prefijo + MAX_CHAR) son las que empiezan así
+MAX_CHAR = "\U0010ffff"
+
+
+def words(text: str) -> set:
+    return set(_findall(text.lower()))
+
+
+def split_item(item):
+    """(carpeta, palabras de la descripción y del nombre de archivo) de un item."""
+    folder, name = os.path.split(item.get("path", "") or "")
+    label = item.get("label", "") or ""
+    found = _findall(label.lower())
+    if name != label:  # en los videos son iguales: una sola pasada
+        found += _findall(name.lower())
+    return folder, set(found)
+
+
+def day_start_ts(d: date) -> int:
+    """Timestamp de la medianoche local de d."""
+    return int(datetime(d.year, d.month, d.day).timestamp())
+
+
+class HistoryFilter:
+    """
+    Lo que pide la caja de filtro. Vacío = sin filtro. folder incluye las
+    subcarpetas; first/last son días locales, inclusive.
+    """
+
+    def __init__(self, text: str = "", type: str | None = None, first: date | None = None,
+                 last: date | None = None, folder: str | None = None):
+        self.terms = sorted(words(text))
+        self.type = type or None
+        self.first = first
+        self.last = last
+        self.folder = folder.rstrip("/\\") if folder else None
+
+    def __bool__(self):
+        return bool(self.terms or self.type or self.first or self.last or self.folder)
+
+    def in_folder(self, folder: str) -> bool:
+        return folder == self.folder or folder.startswith(self.folder + os.sep)
+
+    def matches(self, item) -> bool:
+        """Mismo criterio que SearchIndex, para un item suelto (altas con el filtro puesto, CLI)."""
+        if self.type and item.get("type", "video") != self.type:
+            return False
+        if self.first or self.last:
+            day = day_of(item.get("added_at", 0))
+            if self.first and day < self.first.toordinal():
+                return False
+            if self.last and day > self.last.toordinal():
+                return False
+        folder, own = split_item(item)
+        if self.folder and not self.in_folder(folder):
+            return False
+        if self.terms:
+            own |= words(folder)
+            for term in self.terms:
+                if not any(w.startswith(term) for w in own):
+                    return False
+        return True
+
+
+class SearchIndex:
+    """
+    Índice invertido del historial, actualizado en cada alta/baja. Los items
+    se identifican por su iid (el de HistoryTable). remove() recalcula las
+    palabras desde el item: no se puede pasar un item modificado en su lugar.
+    También guarda los ms de cada item, para sumar un filtrado sin recorrer
+    items.
+    """
+
+    def __init__(self):
+        self.by_word = defaultdict(set)          # palabra -> {iid} (descripción y nombre de archivo)
+        self.folders_by_word = defaultdict(set)  # palabra -> {carpeta}
+        self.by_folder = defaultdict(set)        # carpeta -> {iid}
+        self.by_type = defaultdict(set)          # tipo -> {iid}
+        self.ms = {}                             # iid -> duración en ms
+        self.vocab = []                          # palabras de los dos índices, ordenadas
+        self.bulk = False
+
+    @classmethod
+    def build(cls, items: dict):
+        """items: iid -> item."""
+        index = cls()
+        index.begin_bulk()
+        for iid, item in items.items():
+            index.add(iid, item)
+        index.end_bulk()
+        return index
+
+    def begin_bulk(self):
+        # Carga masiva: el vocabulario se ordena una vez al final y no palabra por palabra
+        self.bulk = True
+
+    def end_bulk(self):
+        self.bulk = False
+        self.vocab = sorted(self.by_word.keys() | self.folders_by_word.keys())
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def _add_word(self, word: str):
+        if not self.bulk and word not in self.by_word and word not in self.folders_by_word:
+            insort(self.vocab, word)
+
+    def _drop_word(self, word: str):
+        if not self.bulk and word not in self.by_word and word not in self.folders_by_word:
+            i = bisect_left(self.vocab, word)
+            if i < len(self.vocab) and self.vocab[i] == word:
+                del self.vocab[i]
+
+    @staticmethod
+    def _unlink(table: dict, key, value) -> bool:
+        """Saca value; True si key quedó vacía (y se borró)."""
+        bucket = table.get(key)
+        if bucket is None:
+            return False
+        bucket.discard(value)
+        if bucket:
+            return False
+        del table[key]
+        return True
+
+    def add(self, iid, item):
+        folder, found = split_item(item)
+        for w in found:
+            self._add_word(w)
+            self.by_word[w].add(iid)
+        if folder:
+            if folder not in self.by_folder:
+                for w in words(folder):
+                    self._add_word(w)
+                    self.folders_by_word[w].add(folder)
+            self.by_folder[folder].add(iid)
+        self.by_type[item.get("type", "video")].add(iid)
+        self.ms[iid] = duration_ms(item)
+
+    def remove(self, iid, item):
+        folder, found = split_item(item)
+        for w in found:
+            if self._unlink(self.by_word, w, iid):
+                self._drop_word(w)
+        if folder and self._unlink(self.by_folder, folder, iid):
+            for w in words(folder):
+                if self._unlink(self.folders_by_word, w, folder):
+                    self._drop_word(w)
+        self._unlink(self.by_type, item.get("type", "video"), iid)
+        self.ms.pop(iid, None)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def _prefixed(self, prefix: str):
+        lo = bisect_left(self.vocab, prefix)
+        hi = bisect_left(self.vocab, prefix + MAX_CHAR, lo)
+        return self.vocab[lo:hi]
+
+    def term_ids(self, term: str) -> set:
+        """Items con alguna palabra (propia o de su carpeta) que empieza con term."""
+        # .get y no []: con defaultdict, [] crearía entradas vacías
+        matched = self._prefixed(term)
+        sets = list(filter(None, map(self.by_word.get, matched)))
+        folders = set().union(*filter(None, map(self.folders_by_word.get, matched)))
+        sets += map(self.by_folder.get, folders)
+        return set().union(*sets)
+
+    def folders(self) -> list:
+        return sorted(self.by_folder)
+
+    def total_ms(self, ids) -> int:
+        return sum(map(self.ms.__getitem__, ids))
+
+    def candidates(self, flt: HistoryFilter) -> set | None:
+        """
+        ids que cumplen texto, tipo y carpeta. None si el filtro no restringe
+        nada de eso (solo fechas, que se resuelven por orden en la tabla).
+        """
+        sets = [self.term_ids(t) for t in flt.terms]
+        if flt.type:
+            sets.append(self.by_type.get(flt.type, set()))
+        if flt.folder:
+            sets.append(set().union(*(ids for f, ids in self.by_folder.items() if flt.in_folder(f))))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
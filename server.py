@@ -0,0 +1,271 @@
+"""
+Servicio HTTP/JSON para cargar tiempo desde varias máquinas a un mismo store
+(python main.py serve). Solo stdlib: un hilo por conexión (ThreadingHTTPServer)
+y un único escritor, el de WriteBehindStore.
+
+  POST   /items    {"items": [{"duration_sec": 95, "label": "...", ...}, ...]}
+  DELETE /items    {"ids": ["...", ...]}
+  GET    /totals   [?from=YYYY-MM-DD&to=YYYY-MM-DD]
+
+Los items usan las claves del modelo (type, label, duration_sec, added_at,
+path, id). Sin id se deriva uno estable de esos campos como en importer.py,
+así reenviar un lote que no tuvo respuesta no duplica nada; por eso added_at
+es obligatorio salvo que venga el id (ahí por defecto es ahora).
+Un POST o DELETE responde recién cuando lo suyo está en disco: las
+ediciones que llegan mientras se escribe un lote salen juntas en la
+escritura siguiente (group commit), con un fsync por escritura y no por
+pedido. Los totales salen de Aggregates en memoria y la respuesta armada se
+reusa hasta la próxima edición.
+"""
+import os
+import json
+import hmac
+import time
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from aggregates import Aggregates
+from importer import FIELDS, record_item
+from items import ItemIndex
+from storage import WriteBehindStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Límites por pedido: un lote más grande se parte del lado del cliente
+MAX_BODY_BYTES = 16 << 20
+MAX_BATCH = 10_000
+# Respuestas de /totals guardadas por versión (un rango distinto por pedido no crece sin fin)
+MAX_CACHED = 256
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# -------------------------
+# Estado compartido
+# -------------------------
+class IngestService:
+    """
+    Items, índice por id y agregados en memoria, detrás de un lock: cada
+    edición se aplica acá y se encola en el store en el mismo orden, y
+    después espera fuera del lock a que el escritor la confirme.
+    """
+
+    def __init__(self, store, data: dict):
+        self.store = WriteBehindStore(store)
+        self.data = data
+        self.lock = threading.Lock()
+        self.index = ItemIndex(data["items"])
+        self.known_ids = store.known_ids()
+        self.agg = Aggregates.from_store(store)
+        self.version = 0
+        self._cache = (0, {})  # (versión, {(hoy, from, to): cuerpo de /totals ya serializado})
+
+    def start(self):
+        self.store.start()
+
+    def close(self):
+        self.store.close()
+
+    def add(self, records: list) -> dict:
+        items, invalid = [], []
+        for i, rec in enumerate(records):
+            # Se valida fuera del lock: solo el alta en memoria es serial
+            try:
+                if not isinstance(rec, dict):
+                    raise ValueError("not a JSON object")
+                rec = {str(k).lower(): v for k, v in rec.items()}
+                # Sin id, el derivado tiene que salir solo de lo que mandó el cliente: ahora cambia al reintentar
+                if str(rec.get("id") or "").strip() and all(rec.get(k) in (None, "") for k in FIELDS["date"]):
+                    rec["added_at"] = int(time.time())
+                if rec.get("path") and not rec.get("label"):
+                    rec["label"] = os.path.basename(rec["path"])
+                items.append(record_item(rec))
+            except ValueError as e:
+                invalid.append({"index": i, "error": str(e)})
+
+        with self.lock:
+            new = []
+            for it in items:
+                if it.id not in self.known_ids:
+                    self.known_ids.add(it.id)
+                    new.append(it)
+            if new:
+                self.data["items"].extend(new)
+                for it in new:
+                    self.agg.add(it)
+                self.store.add(new)
+                self.version += 1
+        self.store.flush()
+        return {"added": len(new), "known": len(items) - len(new), "invalid": invalid,
+                "ids": [it.id for it in new]}
+
+    def delete(self, ids: list) -> dict:
+        if not all(isinstance(iid, str) for iid in ids):
+            raise RequestError(400, "ids must be strings")
+        with self.lock:
+            removed = self.index.remove(ids)
+            removed_ids = [it.get("id") for it in removed]
+            if removed:
+                self.known_ids.difference_update(removed_ids)
+                for it in removed:
+                    self.agg.remove(it)
+                self.store.delete(removed_ids)
+                self.version += 1
+        self.store.flush()
+        return {"deleted": len(removed), "ids": removed_ids}
+
+    def totals(self, first: date | None = None, last: date | None = None) -> bytes:
+        key = (date.today(), first, last)
+        version, cached = self._cache
+        if version == self.version and key in cached:
+            return cached[key]
+        with self.lock:
+            version, cached = self._cache
+            if version != self.version or len(cached) >= MAX_CACHED:
+                cached = {}
+                self._cache = (self.version, cached)
+            today = key[0]
+            body = {
+                "total_sec": self.agg.total_sec,
+                "videos": self.agg.videos,
+                "manual": self.agg.manual,
+                "today_sec": self.agg.today_sec(today),
+                "week_sec": self.agg.week_sec(today),
+                "month_sec": self.agg.month_sec(today),
+            }
+            if first or last:
+                body["range_sec"] = self.agg.range_sec(first or date.min, last or today)
+            body = cached[key] = json.dumps(body).encode("utf-8")
+        return body
+
+
+# -------------------------
+# HTTP
+# -------------------------
+def _query_date(query: dict, name: str) -> date | None:
+    value = query.get(name, [""])[0]
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise RequestError(400, f"invalid {name} {value!r}, expected YYYY-MM-DD")
+
+
+class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1: los clientes reusan la conexión entre pedidos
+    protocol_version = "HTTP/1.1"
+    # Cabeceras y cuerpo salen en dos send(): con Nagle cada respuesta espera el ACK demorado (~40 ms)
+    disable_nagle_algorithm = True
+    server_version = "WorkHoursTracker"
+
+    @property
+    def service(self) -> IngestService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        pass  # un renglón por pedido tapa los errores de verdad
+
+    def _send(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, route):
+        self._body_read = False
+        try:
+            token = self.server.token
+            sent = self.headers.get("Authorization", "").encode()
+            if token and not hmac.compare_digest(sent, f"Bearer {token}".encode()):
+                raise RequestError(401, "missing or wrong token")
+            self._send(200, route())
+        except RequestError as e:
+            if not self._body_read and self.headers.get("Content-Length", "0") != "0":
+                self.close_connection = True  # el cuerpo quedó sin leer: la conexión no se puede reusar
+            self._send(e.status, json.dumps({"error": str(e)}).encode("utf-8"))
+        except Exception as e:
+            # Casi siempre una escritura del store que falló: lo encolado se reintenta con la próxima edición
+            self._send(500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode("utf-8"))
+
+    def _body(self, key: str) -> list:
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            raise RequestError(411, "Content-Length required")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"body larger than {MAX_BODY_BYTES} bytes")
+        try:
+            raw = self.rfile.read(length)
+            self._body_read = True
+            payload = json.loads(raw)
+        except ValueError as e:
+            raise RequestError(400, f"invalid JSON: {e}")
+        values = payload.get(key) if isinstance(payload, dict) else None
+        if not isinstance(values, list):
+            raise RequestError(400, f'expected {{"{key}": [...]}}')
+        if len(values) > MAX_BATCH:
+            raise RequestError(413, f"more than {MAX_BATCH} {key} in one request")
+        return values
+
+    def _path(self, *allowed):
+        path = urlsplit(self.path).path.rstrip("/")
+        if path not in allowed:
+            raise RequestError(404, f"no such endpoint: {self.command} {path or '/'}")
+        return path
+
+    def _post(self):
+        self._path("/items")
+        return json.dumps(self.service.add(self._body("items"))).encode("utf-8")
+
+    def _delete(self):
+        self._path("/items")
+        return json.dumps(self.service.delete(self._body("ids"))).encode("utf-8")
+
+    def _get(self):
+        self._path("/totals")
+        query = parse_qs(urlsplit(self.path).query)
+        return self.service.totals(_query_date(query, "from"), _query_date(query, "to"))
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    def do_GET(self):
+        self._handle(self._get)
+
+
+class IngestServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Muchos clientes conectando a la vez: el backlog por defecto (5) rechaza conexiones
+    request_queue_size = 128
+
+    def __init__(self, address, service: IngestService, token: str = ""):
+        super().__init__(address, Handler)
+        self.service = service
+        self.token = token
+
+
+def serve(store, data: dict, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, token: str = "", ready=None):
+    """Atiende hasta Ctrl+C; después escribe lo pendiente. ready(server) se llama con el puerto ya abierto."""
+    service = IngestService(store, data)
+    server = IngestServer((host, port), service, token)
+    service.start()
+    try:
+        if ready is not None:
+            ready(server)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
@@ -0,0 +1,591 @@
+"""
+Snapshot binario del historial (data.snap): arrancar sin parsear JSON.
+
+El archivo es una cabecera y secciones alineadas a 8 bytes, cada una un
+array de ancho fijo o texto UTF-8. Se abre con mmap y se lee solo lo que se
+usa:
+
+  cabecera   MAGIC, versión, banderas, cantidad de items, seq del journal
+             y los totales de las cards (ms, videos, manuales)
+  columnas   added_at (int64), duration_sec (float64), kind (uint8)
+  índices    order: filas por added_at descendente (el orden de la tabla)
+             by_id: filas ordenadas por id (búsqueda binaria)
+  días       día (ordinal) y ms de ese día, para Aggregates.by_day
+  strings    id, label, path y raw: offset de cada fila (uint64) y el texto
+             con un NUL al final de cada una
+  meta       el resto del snapshot JSON ({"format": 2, "seq": n, ...} con
+             "items": null), con las claves en el mismo orden
+
+label y path van vacíos cuando se derivan del id (como en items.Item). Un
+item que no entra en las columnas (un dict con otras claves, un duration_sec
+entero, un tipo desconocido, un NUL en un texto) va entero como JSON en raw:
+JSON -> binario -> JSON devuelve el mismo texto.
+
+Little-endian siempre; en una máquina big-endian las columnas se copian.
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import time
+from array import array
+from bisect import bisect_right
+from collections.abc import MutableSequence
+from io import BytesIO
+from itertools import accumulate, filterfalse
+
+from aggregates import day_of, duration_ms
+from items import TYPES, Item, jsonable
+
+MAGIC = b"WHTSNAP\n"
+VERSION = 1
+# kind: el tipo en los dos bits bajos y banderas de lo que se deriva del id
+KIND_VIDEO, KIND_MANUAL, KIND_RAW = 0, 1, 2
+KINDS = {"video": KIND_VIDEO, "manual": KIND_MANUAL}
+KIND_TYPES = (TYPES["video"], TYPES["manual"])
+TYPE_MASK = 3
+LABEL_DERIVED = 4
+PATH_DERIVED = 8
+# Banderas de la cabecera
+UNIQUE_IDS = 1
+HIDDEN_IDS = 2  # hay filas crudas con un id que no entra en la columna (no es str o tiene un NUL)
+STRINGS = ("id", "label", "path", "raw")
+# Secciones en el orden del archivo: nombre -> typecode de array (None = bytes)
+SECTIONS = {
+    "added_at": "q", "duration_sec": "d", "kind": "B", "order": "I", "by_id": "I", "day": "q", "day_ms": "q",
+    "id_at": "Q", "id": None, "label_at": "Q", "label": None, "path_at": "Q", "path": None,
+    "raw_at": "Q", "raw": None, "tz": None, "meta": None,
+}
+HEADER = struct.Struct("<8sIIIQqqQQ")  # magic, versión, secciones, banderas, n, seq, total_ms, videos, manual
+SPANS = struct.Struct(f"<{2 * len(SECTIONS)}Q")  # (offset, bytes) de cada sección
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def local_tz() -> str:
+    # Los días de la sección "day" son locales: con otra zona horaria hay que recalcularlos
+    return f"{time.timezone} {time.altzone} {time.daylight} {'/'.join(time.tzname)}"
+
+
+# -------------------------
+# Escritura
+# -------------------------
+def _row(item) -> tuple:
+    """(kind, added_at, duration_sec, id, label, path, raw) de un item para las columnas."""
+    if type(item) is Item:
+        iid, type_, label, dur, at, path = item.parts()
+        if (type(dur) is float and type(at) is int and INT64_MIN <= at <= INT64_MAX and type_ in KINDS
+                and "\0" not in iid and "\0" not in (label or "") and "\0" not in (path or "")):
+            kind = KINDS[type_] | (LABEL_DERIVED if label is None else 0) | (PATH_DERIVED if path is None else 0)
+            return kind, at, dur, iid, label or "", path or "", ""
+    iid = item.get("id")
+    try:
+        at = int(item.get("added_at", 0) or 0)  # el mismo orden que le da la tabla
+    except (TypeError, ValueError, OverflowError):
+        at = 0
+    if not INT64_MIN <= at <= INT64_MAX:
+        at = 0
+    raw = json.dumps(item, ensure_ascii=False, separators=(",", ":"), default=jsonable)
+    return KIND_RAW, at, 0.0, iid if type(iid) is str and "\0" not in iid else "", "", "", raw
+
+
+def _text(strings: list) -> tuple:
+    """(offsets, bytes) de strings, con un NUL al final de cada uno."""
+    joined = "\0".join(strings) + "\0" if strings else ""
+    data = joined.encode("utf-8", "surrogatepass")
+    if len(data) == len(joined):
+        lengths = map(len, strings)  # ASCII: bytes = caracteres, sin codificar de a uno
+    else:
+        lengths = (len(s.encode("utf-8", "surrogatepass")) for s in strings)
+    return array("Q", accumulate((n + 1 for n in lengths), initial=0)), data
+
+
+def dump(data: dict, f):
+    """
+    Escribe data (las claves de un snapshot JSON, con "items") en f, abierto
+    en binario. items puede ser un SnapshotItems: sus filas sin tocar se
+    copian del archivo viejo sin armar los items.
+    """
+    items = data["items"]
+    snap = items.snap if isinstance(items, SnapshotItems) else None
+    ats, durs, kinds = array("q"), array("d"), array("B")
+    strings = ([], [], [], [])
+    days = {}
+    total_ms = videos = manual = 0
+    flags = 0
+    for entry in (items.entries if snap is not None else items):
+        item = None
+        if type(entry) is int:
+            row = snap.row(entry)
+        else:
+            item = entry
+            row = _row(item)
+        kind, at, dur = row[:3]
+        ats.append(at)
+        durs.append(dur)
+        kinds.append(kind)
+        for column, text in zip(strings, row[3:]):
+            column.append(text)
+
+        if kind == KIND_RAW:
+            item = item if item is not None else json.loads(row[6])
+            ms = duration_ms(item)
+            video = item.get("type", "video") == "video"
+            day = day_of(item.get("added_at", 0))
+            if not row[3] and item.get("id") not in (None, ""):
+                flags |= HIDDEN_IDS
+        else:
+            ms = int((dur or 0.0) * 1000 + 0.5)  # = aggregates.duration_ms
+            video = kind & TYPE_MASK == KIND_VIDEO
+            day = day_of(at)
+        total_ms += ms
+        if video:
+            videos += 1
+        else:
+            manual += 1
+        days[day] = days.get(day, 0) + ms
+
+    n = len(kinds)
+    # sorted es estable también con reverse: a igual added_at queda el orden de la lista
+    order = array("I", sorted(range(n), key=ats.__getitem__, reverse=True))
+    by_id = array("I", sorted(range(n), key=strings[0].__getitem__))
+    sorted_ids = list(map(strings[0].__getitem__, by_id))
+    del sorted_ids[:bisect_right(sorted_ids, "")]  # sin id no cuenta como repetido
+    if not any(map(str.__eq__, sorted_ids, sorted_ids[1:])):
+        flags |= UNIQUE_IDS
+    day_list = sorted(day for day, ms in days.items() if ms)
+    meta = {k: (None if k == "items" else v) for k, v in data.items()}
+    sections = {
+        "added_at": ats, "duration_sec": durs, "kind": kinds, "order": order, "by_id": by_id,
+        "day": array("q", day_list), "day_ms": array("q", map(days.__getitem__, day_list)),
+        "tz": local_tz().encode("utf-8"),
+        "meta": json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8", "surrogatepass"),
+    }
+    for name, column in zip(STRINGS, strings):
+        sections[name + "_at"], sections[name] = _text(column)
+
+    spans = []
+    offset = HEADER.size + SPANS.size
+    for name in SECTIONS:
+        offset += -offset % 8
+        size = len(memoryview(sections[name]).cast("B"))
+        spans += (offset, size)
+        offset += size
+    seq = data.get("seq", 0)
+    f.write(HEADER.pack(MAGIC, VERSION, len(SECTIONS), flags, n, seq if type(seq) is int else 0,
+                        total_ms, videos, manual))
+    f.write(SPANS.pack(*spans))
+    pos = HEADER.size + SPANS.size
+    for name, start in zip(SECTIONS, spans[::2]):
+        section = sections[name]
+        if sys.byteorder != "little" and isinstance(section, array):
+            section = array(section.typecode, section)
+            section.byteswap()
+        f.write(bytes(start - pos))
+        f.write(section)
+        pos = start + len(memoryview(section).cast("B"))
+
+
+def dumps(data: dict) -> bytes:
+    out = BytesIO()
+    dump(data, out)
+    return out.getvalue()
+
+
+# -------------------------
+# Lectura
+# -------------------------
+def _column(view: memoryview, typecode: str, name: str):
+    size = array(typecode).itemsize
+    if len(view) % size:
+        raise ValueError(f"snapshot section {name!r} is truncated")
+    if sys.byteorder == "little":
+        return view.cast(typecode)
+    swapped = array(typecode, view.tobytes())
+    swapped.byteswap()
+    return memoryview(swapped)
+
+
+class Snapshot:
+    """
+    Un data.snap abierto: cabecera y columnas (memoryviews sobre el archivo
+    mapeado) sin leer nada más. item(r) arma el item de la fila r una sola
+    vez; fill() arma todos los que faltan de una pasada.
+    """
+
+    def __init__(self, buf):
+        self.buf = memoryview(buf)
+        if len(self.buf) < HEADER.size + SPANS.size:
+            raise ValueError("not a snapshot file (too short)")
+        (magic, version, count, self.flags, self.n, self.seq,
+         self.total_ms, self.videos, self.manual) = HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError("not a snapshot file")
+        if version != VERSION or count != len(SECTIONS):
+            raise ValueError(f"unsupported snapshot version {version}")
+        spans = SPANS.unpack_from(buf, HEADER.size)
+        self.cols = {}
+        for i, (name, typecode) in enumerate(SECTIONS.items()):
+            start, size = spans[2 * i], spans[2 * i + 1]
+            if start + size > len(self.buf):
+                raise ValueError(f"snapshot section {name!r} is truncated")
+            view = self.buf[start:start + size]
+            self.cols[name] = view if typecode is None else _column(view, typecode, name)
+        for name in ("added_at", "duration_sec", "kind", "order", "by_id"):
+            if len(self.cols[name]) != self.n:
+                raise ValueError(f"snapshot section {name!r} has the wrong size")
+        for name in STRINGS:
+            at = self.cols[name + "_at"]
+            if len(at) != self.n + 1 or at[-1] != len(self.cols[name]):
+                raise ValueError(f"snapshot section {name!r} has the wrong size")
+
+        self.added_at = self.cols["added_at"]
+        self.duration_sec = self.cols["duration_sec"]
+        self.kind = self.cols["kind"]
+        self.order = self.cols["order"]
+        self.meta = json.loads(str(self.cols["meta"], "utf-8", "surrogatepass"))
+        self._cache = [None] * self.n
+        self._cached = 0
+        self._filled = False
+        self._ids = None
+        self._hidden = None
+        self._days = None
+
+    @classmethod
+    def open(cls, path: str):
+        with open(path, "rb") as f:
+            if os.name == "nt":
+                # Windows no deja reemplazar un archivo mapeado (la compactación lo pisa): se lee entero
+                return cls(f.read())
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def empty(cls):
+        return cls(dumps({"items": []}))
+
+    # -------------------------
+    # Filas
+    # -------------------------
+    def string(self, name: str, r: int) -> str:
+        at = self.cols[name + "_at"]
+        return str(self.cols[name][at[r]:at[r + 1] - 1], "utf-8", "surrogatepass")
+
+    def strings(self, name: str) -> list:
+        """Los textos de una columna para todas las filas, con un solo decode."""
+        out = str(self.cols[name], "utf-8", "surrogatepass").split("\0")
+        out.pop()
+        return out
+
+    def ids(self) -> list:
+        # Uno solo: la tabla y fill() comparten los mismos str
+        if self._ids is None:
+            self._ids = self.strings("id")
+        return self._ids
+
+    def hidden_ids(self) -> dict:
+        """Fila -> id de las filas crudas cuyo id quedó fuera de la columna id (ver HIDDEN_IDS)."""
+        if self._hidden is None:
+            self._hidden = {}
+            if self.flags & HIDDEN_IDS:
+                ids = self.ids()
+                for r, kind in enumerate(self.kind):
+                    if kind == KIND_RAW and not ids[r]:
+                        iid = json.loads(self.string("raw", r)).get("id")
+                        if iid is not None and iid != "":
+                            self._hidden[r] = iid
+        return self._hidden
+
+    def row(self, r: int) -> tuple:
+        """La fila r como la escribió dump(), sin armar el item."""
+        return (self.kind[r], self.added_at[r], self.duration_sec[r],
+                *(self.string(name, r) for name in STRINGS))
+
+    def _make(self, kind, iid, label, dur, at, path, raw):
+        if kind == KIND_RAW:
+            return json.loads(raw, object_hook=Item.from_dict)
+        return Item.from_parts(iid, KIND_TYPES[kind & TYPE_MASK], None if kind & LABEL_DERIVED else label,
+                               dur, at, None if kind & PATH_DERIVED else path)
+
+    def item(self, r: int):
+        it = self._cache[r]
+        if it is None:
+            kind = self.kind[r]
+            it = self._cache[r] = self._make(
+                kind, self.string("id", r), "" if kind & LABEL_DERIVED else self.string("label", r),
+                self.duration_sec[r], self.added_at[r], "" if kind & PATH_DERIVED else self.string("path", r),
+                self.string("raw", r) if kind == KIND_RAW else "")
+            self._cached += 1
+        return it
+
+    def fill(self):
+        """Arma de una vez todos los items que todavía no se leyeron."""
+        if self._filled:
+            return
+        fresh = map(self._make, self.kind, self.ids(), self.strings("label"), self.duration_sec, self.added_at,
+                    self.strings("path"), self.strings("raw"))
+        if self._cached:
+            self._cache = [old if old is not None else new for old, new in zip(self._cache, fresh)]
+        else:
+            self._cache = list(fresh)
+        self._cached = self.n
+        self._filled = True
+
+    def find(self, iid):
+        """Fila del item con ese id (la última si se repite), o None."""
+        if type(iid) is not str or "\0" in iid:
+            rows = [r for r, hidden in self.hidden_ids().items() if hidden == iid]
+            return rows[-1] if rows else None
+        by_id = self.cols["by_id"]
+        i = bisect_right(by_id, iid, key=lambda r: self.string("id", r))
+        if i and self.string("id", by_id[i - 1]) == iid:
+            return by_id[i - 1]
+        return None
+
+    def daily_ms(self) -> dict:
+        if self._days is None:
+            if str(self.cols["tz"], "utf-8") == local_tz():
+                self._days = dict(zip(self.cols["day"], self.cols["day_ms"]))
+            else:
+                self.fill()
+                self._days = {}
+                for it in self._cache:
+                    day = day_of(it.get("added_at", 0))
+                    self._days[day] = self._days.get(day, 0) + duration_ms(it)
+                self._days = {day: ms for day, ms in self._days.items() if ms}
+        return dict(self._days)
+
+    def to_data(self) -> dict:
+        """El snapshot completo como lo cargaría json.load (para volver a JSON)."""
+        self.fill()
+        data = dict(self.meta)
+        data["items"] = list(self._cache)
+        return data
+
+
+# -------------------------
+# data["items"] perezoso
+# -------------------------
+class SnapshotItems(MutableSequence):
+    """
+    data["items"] de un store con snapshot binario. Cada entrada es una fila
+    del snapshot (int) hasta que se reemplaza por un item; leer una fila la
+    arma una vez en Snapshot, así siempre sale el mismo objeto. Los totales
+    y los ms por día arrancan de la cabecera y se ajustan en cada alta y
+    baja, sin recorrer nada.
+    """
+
+    def __init__(self, snap: Snapshot, entries: list | None = None):
+        self.snap = snap
+        self.entries = list(range(snap.n)) if entries is None else entries
+        self.total_ms, self.videos, self.manual = snap.total_ms, snap.videos, snap.manual
+        self.days = snap.daily_ms()
+
+    @classmethod
+    def replay(cls, snap: Snapshot, records):
+        """
+        Aplica registros del journal como JournalStore._load, pero sobre
+        filas: los ids del snapshot se buscan en by_id y solo se arman los
+        items que el journal borra o reemplaza.
+        """
+        changed = {}  # fila -> item nuevo, o None si se borró
+        slots = {}    # slot (>= snap.n) -> item agregado por el journal
+        by_id = {}    # id -> fila o slot, para los ids que el journal tocó (None = borrado)
+        next_slot = snap.n
+
+        def locate(iid):
+            return by_id[iid] if iid in by_id else snap.find(iid)
+
+        def drop(loc):
+            if loc < snap.n:
+                changed[loc] = None
+            else:
+                del slots[loc]
+
+        for rec in records:
+            op = rec["op"]
+            if op == "add":
+                item = Item.from_dict(rec["item"])
+                iid = item.get("id")
+                old = locate(iid) if iid else None
+                if old is not None:
+                    drop(old)
+                slots[next_slot] = item
+                if iid:
+                    by_id[iid] = next_slot
+                next_slot += 1
+            elif op == "del":
+                loc = locate(rec["id"])
+                by_id[rec["id"]] = None
+                if loc is not None:
+                    drop(loc)
+            elif op == "put":
+                loc = locate(rec["id"])
+                by_id[rec["id"]] = None
+                if loc is not None:
+                    item = Item.from_dict(rec["item"])
+                    if loc < snap.n:
+                        changed[loc] = item
+                    else:
+                        slots[loc] = item
+                    by_id[item.get("id")] = loc
+
+        items = cls(snap)
+        entries = items.entries
+        for row, item in changed.items():
+            items._count(row, -1)
+            entries[row] = item
+            if item is not None:
+                items._count(item, 1)
+        if None in changed.values():
+            items.entries = entries = [e for e in entries if e is not None]
+        entries += slots.values()
+        for item in slots.values():
+            items._count(item, 1)
+        return items
+
+    def resolve(self, entry):
+        return self.snap.item(entry) if type(entry) is int else entry
+
+    def fill(self):
+        self.snap.fill()
+
+    def _count(self, entry, sign: int):
+        # Lo mismo que Aggregates.add, sobre los totales de la lista
+        it = self.resolve(entry)
+        ms = duration_ms(it) * sign
+        self.total_ms += ms
+        if it.get("type", "video") == "video":
+            self.videos += sign
+        else:
+            self.manual += sign
+        day = day_of(it.get("added_at", 0))
+        self.days[day] = self.days.get(day, 0) + ms
+        if not self.days[day]:
+            del self.days[day]
+
+    # -------------------------
+    # Secuencia
+    # -------------------------
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.resolve(e) for e in self.entries[i]]
+        return self.resolve(self.entries[i])
+
+    def __setitem__(self, i, value):
+        old = self.entries[i]
+        if isinstance(i, slice):
+            value = list(value)
+            self.entries[i] = value
+            for e in old:
+                self._count(e, -1)
+            for it in value:
+                self._count(it, 1)
+            return
+        self.entries[i] = value
+        self._count(old, -1)
+        self._count(value, 1)
+
+    def __delitem__(self, i):
+        old = self.entries[i]
+        del self.entries[i]
+        for e in (old if isinstance(i, slice) else (old,)):
+            self._count(e, -1)
+
+    def insert(self, i, value):
+        self.entries.insert(i, value)
+        self._count(value, 1)
+
+    def extend(self, values):
+        values = list(values)
+        self.entries.extend(values)
+        for it in values:
+            self._count(it, 1)
+
+    def __iter__(self):
+        # Recorrer todo arma todo: de una pasada es bastante más rápido que de a una fila
+        self.snap.fill()
+        item = self.snap.item
+        for e in self.entries:
+            yield item(e) if type(e) is int else e
+
+    def copy(self):
+        """Copia de la lista, no de los items (como list.copy; la usa la compactación)."""
+        other = SnapshotItems.__new__(SnapshotItems)
+        other.snap, other.entries = self.snap, self.entries.copy()
+        other.total_ms, other.videos, other.manual = self.total_ms, self.videos, self.manual
+        other.days = dict(self.days)
+        return other
+
+    def __repr__(self):
+        return f"SnapshotItems({len(self.entries)} items, {self.snap.n} in the snapshot)"
+
+    # -------------------------
+    # Consultas sin armar items
+    # -------------------------
+    def totals_ms(self):
+        return self.total_ms, self.videos, self.manual
+
+    def daily_ms(self) -> dict:
+        return dict(self.days)
+
+    def known_ids(self) -> set:
+        # Como JournalStore.known_ids: sin los ids vacíos (None, "", 0)
+        ids, hidden = self.snap.ids(), self.snap.hidden_ids()
+        return set(filter(None, ((ids[e] or hidden.get(e)) if type(e) is int else e.get("id")
+                                 for e in self.entries)))
+
+    def table_rows(self):
+        """
+        (entradas, ids, added_at) en el orden de HistoryTable: added_at
+        descendente; a igual added_at, primero las filas del snapshot en su
+        orden y después los items agregados o reemplazados, en el de la
+        lista. Las filas salen del índice order del archivo: solo se ordenan
+        los items que no son filas. Un id vacío queda "" (la tabla le pone
+        el suyo). None si hay ids repetidos o que no entran en la columna id.
+        """
+        snap = self.snap
+        entries = self.entries
+        extra = list(filterfalse(int.__instancecheck__, entries))  # los que no son filas, sin un for en Python
+        order = snap.order.tolist()
+        removed = len(entries) - len(extra) != snap.n
+        if removed:
+            present = set(filter(int.__instancecheck__, entries))
+            order = list(filter(present.__contains__, order))
+        extra_ids = [it.get("id") or "" for it in extra]
+        if snap.flags & HIDDEN_IDS or not snap.flags & UNIQUE_IDS or len(set(extra_ids) - {""}) != len(extra_ids) - extra_ids.count(""):
+            return None
+        for iid in extra_ids:
+            row = snap.find(iid) if iid else None
+            if row is not None and (not removed or row in present):
+                return None
+        ids = snap.ids()
+        added_at = snap.added_at.tolist()
+        base_ids = list(map(ids.__getitem__, order))
+        base_at = list(map(added_at.__getitem__, order))
+        if not extra:
+            return order, base_ids, base_at
+
+        def stamp(it):
+            return int(it.get("added_at", 0) or 0)
+
+        extra.sort(key=stamp, reverse=True)
+        out_rows, out_ids, out_at = [], [], []
+        prev = 0
+        for it in extra:
+            at = stamp(it)
+            # base_at es descendente: -added_at es ascendente y sirve para bisect
+            i = bisect_right(base_at, -at, lo=prev, key=int.__neg__)
+            out_rows += order[prev:i]
+            out_ids += base_ids[prev:i]
+            out_at += base_at[prev:i]
+            out_rows.append(it)
+            out_ids.append(it.get("id") or "")
+            out_at.append(at)
+            prev = i
+        out_rows += order[prev:]
+        out_ids += base_ids[prev:]
+        out_at += base_at[prev:]
+        return out_rows, out_ids, out_at
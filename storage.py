@@ -0,0 +1,805 @@
+import os
+import sys
+import gc
+import json
+import atexit
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from itertools import islice
+
+import snapshot
+from aggregates import day_of, duration_ms
+from items import Item, jsonable
+from snapshot import Snapshot, SnapshotItems
+
+SNAPSHOT_FORMAT = 2
+# A partir de este tamaño de journal se reescribe el snapshot en segundo plano
+COMPACT_BYTES = 1 << 20
+# Ediciones que llegan dentro de esta ventana van en una sola escritura (WriteBehindStore)
+WRITE_DEBOUNCE_SECS = 0.25
+# Líneas del journal que se serializan juntas antes de escribirlas (ver JournalStore._append)
+APPEND_CHUNK = 10_000
+
+
+# -------------------------
+# Files
+# -------------------------
+def atomic_write_json(path: str, obj):
+    """Escribe a un .tmp, fsync y rename: o queda el archivo viejo o el nuevo, nunca uno a medias."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, ensure_ascii=False, separators=(",", ":"), default=jsonable)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def atomic_write_snapshot(path: str, obj):
+    """Como atomic_write_json, en el formato binario de snapshot.py."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        snapshot.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def atomic_write_text(path: str, text: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def _fsync_dir(path: str):
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def _bulk_load():
+    """
+    Sin GC mientras se crean cientos de miles de objetos (cada umbral de
+    gen0 dispararía recorridos sobre todo lo ya cargado) y, al terminar,
+    gc.freeze(): el historial pasa a la generación permanente y las
+    colecciones de después no lo vuelven a recorrer.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+        gc.freeze()
+
+
+def load_data(path: str):
+    """Lee un data.json completo (formato viejo o snapshot), sin journal."""
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                data.setdefault("items", [])
+                return data
+        except Exception:
+            pass
+    return {"items": []}
+
+
+def _recent_first(items):
+    return sorted(items, key=lambda x: x.get("added_at", 0), reverse=True)
+
+
+def _totals_ms(items):
+    total_ms = 0
+    videos = 0
+    manual = 0
+    for it in items:
+        total_ms += duration_ms(it)
+        if it.get("type", "video") == "video":
+            videos += 1
+        else:
+            manual += 1
+    return total_ms, videos, manual
+
+
+def _daily_ms(items):
+    days = {}
+    for it in items:
+        day = day_of(it.get("added_at", 0))
+        days[day] = days.get(day, 0) + duration_ms(it)
+    # Sin los días en 0, como los deja Aggregates (y SnapshotItems al borrar)
+    return {day: ms for day, ms in days.items() if ms}
+
+
+# -------------------------
+# Journal store
+# -------------------------
+JOURNAL_RECORDS = {
+    "add": lambda items: ({"op": "add", "item": it} for it in items),
+    "delete": lambda ids: ({"op": "del", "id": i} for i in ids),
+    "update": lambda old_id, item: ({"op": "put", "id": old_id, "item": item},),
+}
+
+
+class JournalStore:
+    """
+    data.json es un snapshot compacto ({"format": 2, "seq": n, "items": [...]})
+    y data.json.journal tiene una línea JSON por cada alta o baja posterior:
+
+      {"seq": 12, "op": "add", "item": {...}}
+      {"seq": 13, "op": "del", "id": "..."}
+      {"seq": 14, "op": "put", "id": "...", "item": {...}}   (reemplazo en su lugar)
+
+    Al cargar se aplica el journal sobre el snapshot (solo seq > snapshot.seq).
+    Cuando el journal pasa COMPACT_BYTES se escribe un snapshot nuevo en un
+    hilo aparte y después se recorta el journal. El snapshot parte de una
+    copia de la lista de items: los items no se modifican en su lugar (ver
+    items.replaced), así que la copia no cambia mientras se escribe.
+    """
+
+    def __init__(self, path: str, compact_bytes: int = COMPACT_BYTES):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.compact_bytes = compact_bytes
+        self.data = {"items": []}
+        self.seq = 0
+        self.lock = threading.Lock()
+        self._journal = None
+        self._journal_bytes = 0
+        self._compactor = None
+
+    def load(self, readonly: bool = False):
+        with _bulk_load():
+            return self._load(readonly)
+
+    def _load(self, readonly: bool):
+        self.data = self._replay(readonly)
+        if readonly:
+            return self.data
+
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_bytes = self._journal.tell()
+        return self.data
+
+    def _replay(self, readonly: bool) -> dict:
+        """Snapshot + journal -> data. Deja self.seq en el último registro aplicado."""
+        snapshot = self._load_snapshot(migrate=not readonly)
+        self.seq = snapshot.get("seq", 0)
+
+        # slot -> item conserva el orden; id -> slot permite del/put sin recorrer
+        slots = dict(enumerate(snapshot["items"]))
+        by_id = {it.get("id"): slot for slot, it in slots.items() if it.get("id")}
+        next_slot = len(slots)
+        for rec in self._read_journal(repair=not readonly):
+            if rec["seq"] <= snapshot.get("seq", 0):
+                continue
+            self.seq = rec["seq"]
+            op = rec["op"]
+            if op == "add":
+                item = Item.from_dict(rec["item"])
+                old = by_id.get(item.get("id"))
+                if old is not None:
+                    del slots[old]
+                slots[next_slot] = item
+                if item.get("id"):
+                    by_id[item["id"]] = next_slot
+                next_slot += 1
+            elif op == "del":
+                slot = by_id.pop(rec["id"], None)
+                if slot is not None:
+                    del slots[slot]
+            elif op == "put":
+                slot = by_id.pop(rec["id"], None)
+                if slot is not None:
+                    slots[slot] = Item.from_dict(rec["item"])
+                    by_id[rec["item"].get("id")] = slot
+
+        data = {k: v for k, v in snapshot.items() if k not in ("format", "seq")}
+        data["items"] = list(slots.values())
+        return data
+
+    def _load_snapshot(self, migrate: bool):
+        if not os.path.exists(self.path):
+            return {"items": []}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f, object_hook=Item.from_dict)
+            snapshot.setdefault("items", [])
+        except Exception:
+            if migrate:
+                # No lo pisamos: queda apartado para recuperarlo a mano
+                os.replace(self.path, f"{self.path}.corrupt-{int(time.time())}")
+            return {"items": []}
+
+        if migrate and snapshot.get("format") != SNAPSHOT_FORMAT:
+            # Migración única desde el data.json indentado de siempre
+            backup = self.path + ".v1.bak"
+            if not os.path.exists(backup):
+                shutil.copy2(self.path, backup)
+            snapshot["format"] = SNAPSHOT_FORMAT
+            snapshot["seq"] = 0
+            self._write_snapshot(snapshot)
+        return snapshot
+
+    def _write_snapshot(self, snapshot: dict):
+        atomic_write_json(self.path, snapshot)
+
+    def _read_journal(self, repair: bool):
+        if not os.path.exists(self.journal_path):
+            return
+        good = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+                good += len(line)
+                yield rec
+            torn = f.seek(0, 2) > good
+        if torn and repair:
+            # Línea cortada por un crash: lo anterior vale, el resto se descarta
+            # para que los próximos appends no queden pegados a la basura
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def known_ids(self) -> set:
+        return {it.get("id") for it in self.data["items"] if it.get("id")}
+
+    def recent_items(self):
+        return _recent_first(self.data["items"])
+
+    def totals_ms(self):
+        return _totals_ms(self.data["items"])
+
+    def daily_ms(self):
+        return _daily_ms(self.data["items"])
+
+    # -------------------------
+    # Mutations
+    # -------------------------
+    def add(self, items):
+        self._append(JOURNAL_RECORDS["add"](items))
+
+    def delete(self, ids):
+        self._append(JOURNAL_RECORDS["delete"](ids))
+
+    def update(self, old_id: str, item):
+        self._append(JOURNAL_RECORDS["update"](old_id, item))
+
+    def apply(self, ops):
+        """Varias ediciones [(método, args)] en un solo append y un fsync (lo usa WriteBehindStore)."""
+        records = []
+        for op, args in ops:
+            if op == "reset":
+                self._append(records)
+                records = []
+                self.reset()
+            else:
+                records += JOURNAL_RECORDS[op](*args)
+        self._append(records)
+
+    def reset(self):
+        self._wait_compaction()
+        with self.lock:
+            self._write_snapshot({"format": SNAPSHOT_FORMAT, "seq": self.seq, "items": []})
+            self._journal.truncate(0)
+            self._journal_bytes = 0
+
+    def _append(self, records):
+        # De a APPEND_CHUNK líneas: un alta de millones de items (importer.py)
+        # no arma todo el texto en memoria. Un solo fsync al final
+        records = iter(records)
+        wrote = False
+        with self.lock:
+            while True:
+                lines = []
+                for rec in islice(records, APPEND_CHUNK):
+                    self.seq += 1
+                    lines.append(json.dumps({"seq": self.seq, **rec}, ensure_ascii=False, separators=(",", ":"),
+                                            default=jsonable))
+                if not lines:
+                    break
+                self._journal.write("\n".join(lines) + "\n")
+                wrote = True
+            if not wrote:
+                return
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal_bytes = self._journal.tell()
+        self._maybe_compact()
+
+    # -------------------------
+    # Compaction
+    # -------------------------
+    def _maybe_compact(self):
+        if self._journal_bytes < self.compact_bytes:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        # Copia de la lista tomada en este hilo (una copia en C, sin recorrer los items);
+        # serializar cada item corre en segundo plano
+        snapshot = {k: v for k, v in self.data.items() if k != "items"}
+        snapshot.update(format=SNAPSHOT_FORMAT, seq=self.seq, items=self.data["items"].copy())
+        offset = self._journal_bytes
+        self._compactor = threading.Thread(target=self._compact, args=(snapshot, offset), daemon=True)
+        self._compactor.start()
+
+    def _compact(self, snapshot, offset: int):
+        self._write_snapshot(snapshot)
+        # Si hubo crash acá, el journal viejo se reaplica y se ignora lo de seq <= snapshot
+        with self.lock:
+            with open(self.journal_path, "rb") as f:
+                f.seek(offset)
+                tail = f.read()
+            tmp = self.journal_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal.close()
+            os.replace(tmp, self.journal_path)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal_bytes = self._journal.tell()
+
+    def _wait_compaction(self):
+        if self._compactor is not None:
+            self._compactor.join()
+
+    def close(self):
+        self._wait_compaction()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class BinaryJournalStore(JournalStore):
+    """
+    JournalStore con el snapshot en el formato binario de snapshot.py
+    (data.snap + data.snap.journal, el mismo journal). Al cargar se mapea el
+    archivo y el journal se aplica sobre filas: data["items"] es un
+    SnapshotItems, que da los totales de la cabecera sin recorrer nada y arma
+    cada item recién cuando alguien lo lee. Con un millón de items, abrir y
+    mostrar los totales no depende del tamaño del historial.
+    """
+
+    def _replay(self, readonly: bool) -> dict:
+        snap = self._open_snapshot(migrate=not readonly)
+        self.seq = snap.seq
+
+        def records():
+            for rec in self._read_journal(repair=not readonly):
+                if rec["seq"] > snap.seq:
+                    self.seq = rec["seq"]
+                    yield rec
+
+        data = {k: v for k, v in snap.meta.items() if k not in ("format", "seq", "items")}
+        data["items"] = SnapshotItems.replay(snap, records())
+        return data
+
+    def _open_snapshot(self, migrate: bool) -> Snapshot:
+        if not os.path.exists(self.path):
+            return Snapshot.empty()
+        try:
+            return Snapshot.open(self.path)
+        except (OSError, ValueError):
+            if migrate:
+                os.replace(self.path, f"{self.path}.corrupt-{int(time.time())}")
+            return Snapshot.empty()
+
+    def _write_snapshot(self, snapshot: dict):
+        atomic_write_snapshot(self.path, snapshot)
+
+    def known_ids(self) -> set:
+        items = self.data["items"]
+        return items.known_ids() if isinstance(items, SnapshotItems) else super().known_ids()
+
+    def totals_ms(self):
+        items = self.data["items"]
+        return items.totals_ms() if isinstance(items, SnapshotItems) else super().totals_ms()
+
+    def daily_ms(self):
+        items = self.data["items"]
+        return items.daily_ms() if isinstance(items, SnapshotItems) else super().daily_ms()
+
+
+# -------------------------
+# SQLite store
+# -------------------------
+ITEM_COLUMNS = ("id", "type", "label", "duration_sec", "added_at", "path")
+
+
+class SqliteStore:
+    """
+    Misma interfaz que JournalStore pero sobre SQLite: id es PRIMARY KEY y hay
+    índices por added_at y path. Cada add/delete es una sola transacción.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = None
+
+    def load(self):
+        # Puede escribir desde el hilo de WriteBehindStore, que nunca la usa a la vez que otro
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                " id TEXT PRIMARY KEY,"
+                " type TEXT NOT NULL DEFAULT 'video',"
+                " label TEXT NOT NULL DEFAULT '',"
+                " duration_sec REAL NOT NULL DEFAULT 0,"
+                " added_at INTEGER NOT NULL DEFAULT 0,"
+                " path TEXT NOT NULL DEFAULT '')"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS items_added_at ON items(added_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS items_path ON items(path)")
+        with _bulk_load():
+            return {"items": self._select("ORDER BY rowid")}
+
+    def _select(self, tail: str):
+        # Mismo orden de columnas que items.KEYS
+        rows = self.conn.execute(f"SELECT {', '.join(ITEM_COLUMNS)} FROM items {tail}")
+        return [Item(*r) for r in rows]
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def known_ids(self) -> set:
+        return {r[0] for r in self.conn.execute("SELECT id FROM items")}
+
+    def recent_items(self):
+        return self._select("ORDER BY added_at DESC, rowid")
+
+    # Mismo redondeo que aggregates.duration_ms, para que SQL y Python coincidan
+    MS = "CAST(duration_sec * 1000 + 0.5 AS INTEGER)"
+
+    def totals_ms(self):
+        row = self.conn.execute(
+            f"SELECT COALESCE(SUM({self.MS}), 0),"
+            " COALESCE(SUM(type = 'video'), 0),"
+            " COALESCE(SUM(type != 'video'), 0) FROM items"
+        ).fetchone()
+        return int(row[0]), int(row[1]), int(row[2])
+
+    def daily_ms(self):
+        rows = self.conn.execute(
+            f"SELECT date(added_at, 'unixepoch', 'localtime') AS day, SUM({self.MS}) FROM items GROUP BY day"
+        )
+        return {date.fromisoformat(day).toordinal(): int(ms) for day, ms in rows if ms}
+
+    # -------------------------
+    # Mutations
+    # -------------------------
+    @staticmethod
+    def _row(it, i=0):
+        return (
+            it.get("id") or f"row-{time.time()}-{i}",
+            it.get("type", "video"),
+            it.get("label", ""),
+            float(it.get("duration_sec", 0.0) or 0.0),
+            int(it.get("added_at", 0) or 0),
+            it.get("path", "") or "",
+        )
+
+    def add(self, items):
+        with self.conn:
+            self._add(items)
+
+    def delete(self, ids):
+        with self.conn:
+            self._delete(ids)
+
+    def update(self, old_id: str, item):
+        with self.conn:
+            self._update(old_id, item)
+
+    def reset(self):
+        with self.conn:
+            self._reset()
+
+    def apply(self, ops):
+        """Varias ediciones [(método, args)] en una sola transacción (lo usa WriteBehindStore)."""
+        with self.conn:
+            for op, args in ops:
+                getattr(self, "_" + op)(*args)
+
+    # Sin transacción propia: las arman los métodos públicos y apply()
+    def _add(self, items):
+        if not items:
+            return
+        rows = (self._row(it, i) for i, it in enumerate(items))
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO items ({', '.join(ITEM_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+
+    def _delete(self, ids):
+        if ids:
+            self.conn.executemany("DELETE FROM items WHERE id = ?", [(i,) for i in ids])
+
+    def _update(self, old_id: str, item):
+        self.conn.execute(
+            f"UPDATE items SET {', '.join(c + ' = ?' for c in ITEM_COLUMNS)} WHERE id = ?",
+            self._row(item) + (old_id,)
+        )
+
+    def _reset(self):
+        self.conn.execute("DELETE FROM items")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# -------------------------
+# Write-behind
+# -------------------------
+class WriteBehindStore:
+    """
+    Va delante de un JournalStore o SqliteStore en la ventana: add, delete,
+    update y reset solo encolan y vuelven enseguida, y un hilo aparte los
+    aplica en orden con store.apply(). Lo que llega dentro de debounce_secs
+    desde la primera edición pendiente sale en una sola escritura (un append
+    + fsync del journal, una transacción de SQLite): el costo de una edición
+    en la ventana no depende del tamaño del historial ni del disco.
+
+    Las consultas esperan a que lo pendiente esté escrito, así SQLite ve lo
+    mismo que antes. flush() escribe ya, sin esperar la ventana; close()
+    escribe lo pendiente y cierra, y queda registrado en atexit. Un kill -9
+    pierde como mucho la última ventana. Si una escritura falla, esas
+    ediciones siguen pendientes para el próximo intento y el error sale en
+    la próxima llamada; a todos los flush() que esperaban esa escritura, no
+    solo al primero que se despierta.
+    """
+
+    def __init__(self, store, debounce_secs: float = WRITE_DEBOUNCE_SECS):
+        self.store = store
+        self.debounce_secs = debounce_secs
+        self.cond = threading.Condition()
+        self.io_lock = threading.Lock()  # un solo hilo a la vez dentro de store
+        self.pending = []  # (método, args) en orden
+        self.submitted = 0
+        self.written = 0
+        self.error = None      # sin informar todavía (lo levanta la próxima llamada)
+        self.last_error = None
+        self.failures = 0      # escrituras fallidas: flush() compara contra las que había al empezar
+        self._kick = False    # hay algo nuevo para el escritor
+        self._urgent = False  # flush()/close(): sin esperar la ventana
+        self._closed = False
+        self._thread = None
+
+    def load(self):
+        data = self.store.load()
+        self.start()
+        return data
+
+    def start(self):
+        """Arranca el hilo escritor sobre un store ya cargado (load() lo llama)."""
+        self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def _query(self, name: str):
+        self.flush()
+        with self.io_lock:
+            return getattr(self.store, name)()
+
+    def known_ids(self) -> set:
+        return self._query("known_ids")
+
+    def recent_items(self):
+        return self._query("recent_items")
+
+    def totals_ms(self):
+        return self._query("totals_ms")
+
+    def daily_ms(self):
+        return self._query("daily_ms")
+
+    # -------------------------
+    # Mutations
+    # -------------------------
+    def _submit(self, op: str, *args):
+        with self.cond:
+            self.pending.append((op, args))
+            self.submitted += 1
+            self._kick = True
+            self.cond.notify_all()
+            self._raise_error()
+
+    def _raise_error(self):
+        # Con self.cond tomado
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def add(self, items):
+        if items:
+            self._submit("add", list(items))
+
+    def delete(self, ids):
+        if ids:
+            self._submit("delete", list(ids))
+
+    def update(self, old_id: str, item):
+        self._submit("update", old_id, item)
+
+    def reset(self):
+        self._submit("reset")
+
+    def flush(self):
+        """Escribe todo lo encolado hasta ahora y espera a que esté en disco."""
+        with self.cond:
+            target = self.submitted
+            failures = self.failures
+            thread = self._thread
+            if self.written < target and thread is not None:
+                # También reintenta lo que quedó de una escritura fallida
+                self._kick = self._urgent = True
+                self.cond.notify_all()
+                while self.written < target and self.failures == failures and thread.is_alive():
+                    self.cond.wait()
+            if self.written < target and self.failures != failures:
+                # Falló lo que este flush esperaba: cada uno de los que esperaban lo ve
+                self.error = None
+                raise self.last_error
+            self._raise_error()
+
+    def close(self):
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            atexit.unregister(self.close)
+            with self.cond:
+                self._closed = True
+                self.cond.notify_all()
+            thread.join()
+        with self.io_lock:
+            self.store.close()
+        with self.cond:
+            self._raise_error()
+
+    # -------------------------
+    # Writer thread
+    # -------------------------
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self._kick and not self._closed:
+                    self.cond.wait()
+                if not self._urgent and not self._closed:
+                    # Ventana: lo que llegue mientras tanto sale en la misma escritura
+                    deadline = time.monotonic() + self.debounce_secs
+                    while not self._urgent and not self._closed:
+                        left = deadline - time.monotonic()
+                        if left <= 0:
+                            break
+                        self.cond.wait(left)
+                ops, self.pending = self.pending, []
+                self._kick = self._urgent = False
+                closing = self._closed
+
+            if ops:
+                try:
+                    with self.io_lock:
+                        self.store.apply(ops)
+                except Exception as e:
+                    # Quedan pendientes (el journal repite altas y bajas sin problema) hasta la próxima edición
+                    with self.cond:
+                        self.pending[:0] = ops
+                        self.error = self.last_error = e
+                        self.failures += 1
+                        self.cond.notify_all()
+                    if closing:
+                        return
+                    continue
+            with self.cond:
+                self.written += len(ops)
+                self.cond.notify_all()
+                if closing and not self.pending:
+                    return
+
+
+# -------------------------
+# Backend selection
+# -------------------------
+STORE_FILES = {
+    "json": "data.json",
+    "sqlite": "data.sqlite3",
+    "binary": "data.snap",
+}
+
+
+def open_store(kind: str, folder: str = ""):
+    """
+    Devuelve un store sin cargar. Si se pide SQLite o el snapshot binario y
+    todavía no existe, se importa el data.json de la misma carpeta una única
+    vez (el data.json queda como estaba).
+    """
+    if kind == "sqlite":
+        db_path = os.path.join(folder, STORE_FILES["sqlite"])
+        fresh = not os.path.exists(db_path)
+        store = SqliteStore(db_path)
+        if fresh:
+            json_path = os.path.join(folder, STORE_FILES["json"])
+            if os.path.exists(json_path) or os.path.exists(json_path + ".journal"):
+                import_json(json_path, store)
+        return store
+    if kind == "binary":
+        snap_path = os.path.join(folder, STORE_FILES["binary"])
+        json_path = os.path.join(folder, STORE_FILES["json"])
+        if not os.path.exists(snap_path) and (os.path.exists(json_path) or os.path.exists(json_path + ".journal")):
+            convert_snapshot(json_path, snap_path)
+        return BinaryJournalStore(snap_path)
+    return JournalStore(os.path.join(folder, STORE_FILES["json"]))
+
+
+def import_json(json_path: str, store) -> int:
+    """Copia todos los items de un data.json (+ journal, si hay) a otro store."""
+    items = JournalStore(json_path).load(readonly=True)["items"]
+
+    store.load()
+    store.add(items)
+    store.close()
+    return len(items)
+
+
+def convert_snapshot(src: str, dst: str) -> int:
+    """
+    data.json -> data.snap o al revés, según la extensión de dst. Convierte
+    el snapshot tal cual (mismo seq, mismas claves; ida y vuelta da el mismo
+    JSON) y copia el journal de al lado, que es igual en los dos formatos.
+    Sin snapshot (un store nuevo que todavía no compactó) solo se copia el
+    journal.
+    """
+    n = 0
+    if os.path.exists(src):
+        if dst.endswith(".snap"):
+            with open(src, "r", encoding="utf-8") as f:
+                data = json.load(f, object_hook=Item.from_dict)
+            data.setdefault("items", [])
+            atomic_write_snapshot(dst, data)
+        else:
+            data = Snapshot.open(src).to_data()
+            atomic_write_json(dst, data)
+        n = len(data["items"])
+    if os.path.exists(src + ".journal") and not os.path.exists(dst + ".journal"):
+        shutil.copy2(src + ".journal", dst + ".journal")
+    return n
+
+
+if __name__ == "__main__":
+    # python storage.py data.json data.sqlite3 | data.snap  (o data.snap data.json)
+    if len(sys.argv) != 3:
+        sys.exit("usage: python storage.py <data.json> <data.sqlite3 | data.snap>\n"
+                 "       python storage.py <data.snap> <data.json>")
+    src, dst = sys.argv[1], sys.argv[2]
+    if dst.endswith(".sqlite3"):
+        print(f"Imported {import_json(src, SqliteStore(dst))} items into {dst}")
+    else:
+        print(f"Converted {convert_snapshot(src, dst)} items to {dst}")
@@ -0,0 +1,623 @@
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from itertools import compress, islice
+
+from aggregates import duration_ms
+from search import SearchIndex, day_start_ts
+
+# Por encima de esto la tabla solo materializa las filas visibles
+VIRTUAL_THRESHOLD = 1000
+ROW_HEIGHT = 28
+HEADER_HEIGHT = 28
+BUFFER_ROWS = 2
+DEFAULT_VISIBLE_ROWS = 16
+# La clave de orden es un solo int: added_at en los bits altos, seq en los bajos
+SEQ_BITS = 32
+# Con menos candidatos que esto (por cada fila del rango) se ordenan aparte en vez de recorrer la tabla
+SORT_CANDIDATES_RATIO = 8
+# Items indexados por vuelta del loop de Tk al armar el índice de búsqueda
+INDEX_CHUNK = 2000
+
+
+class LazyItems(dict):
+    """
+    id -> item de una tabla cargada desde un snapshot binario: los valores
+    que todavía son filas del snapshot (int) se arman con resolve() al
+    leerlos. fill() arma todos de una vez antes de recorrerlos.
+    """
+
+    def __init__(self, pairs, resolve, fill):
+        super().__init__(pairs)
+        self.resolve = resolve
+        self.fill = fill
+
+    def __getitem__(self, iid):
+        it = dict.__getitem__(self, iid)
+        return self.resolve(it) if type(it) is int else it
+
+    def get(self, iid, default=None):
+        it = dict.get(self, iid, default)
+        return self.resolve(it) if type(it) is int else it
+
+    def pop(self, iid, *default):
+        it = dict.pop(self, iid, *default)
+        return self.resolve(it) if type(it) is int else it
+
+    def values(self):
+        return [v for _, v in self.items()]
+
+    def items(self):
+        self.fill()
+        resolve = self.resolve
+        return [(iid, resolve(it) if type(it) is int else it) for iid, it in dict.items(self)]
+
+
+class HistoryTable:
+    """
+    Mantiene el orden del historial (más nuevo arriba) fuera del Treeview y le
+    aplica solo diffs: insertar, borrar o actualizar filas puntuales.
+
+    Con historiales grandes pasa a modo virtual: el Treeview contiene solo la
+    ventana visible (+ unas filas de buffer) y el scrollbar/rueda mueven esa
+    ventana sobre la lista completa.
+
+    Con un filtro puesto se muestra una sublista (fkeys/fids) en el mismo
+    orden; el modelo completo sigue al día.
+
+    Si los items vienen de un snapshot binario (snapshot.SnapshotItems) el
+    orden ya viene del archivo: reset() arma solo ids y la ventana visible
+    lee sus filas por posición. keys, key_of e items se arman con el primer
+    cambio, filtro o búsqueda, no al abrir. El SearchIndex se arma con
+    start_indexing() de a pedazos (o de una, con el primer filtro) y desde
+    ahí se actualiza con cada alta y baja.
+    """
+
+    def __init__(self, tree, scrollbar, row_values, virtual_threshold: int = VIRTUAL_THRESHOLD):
+        self.tree = tree
+        self.sb = scrollbar
+        self.row_values = row_values
+        self.virtual_threshold = virtual_threshold
+
+        self._keys = []     # -(added_at << SEQ_BITS | seq), ordenado
+        self.ids = []       # ids en el mismo orden que keys
+        self._items = {}    # id -> item
+        self._key_of = {}   # id -> key
+        self.seq = 0
+        self._pending = None  # (resolve, fill, entradas, added_at) en el orden de ids, hasta armar el modelo
+
+        self.filter = None  # HistoryFilter activo, o None
+        self.index = None
+        self.fkeys = []     # sublista filtrada (misma forma que keys/ids)
+        self.fids = []
+        self.filtered_ms = 0
+        self.on_filtered = None     # callback cuando se aplica un filtro que esperaba al índice
+        self._pending_filter = None
+        self._index_job = None
+        self._auto_index = False
+
+        self.virtual = False
+        self.top = 0
+        self.shown = []     # ids materializados en el Treeview (modo virtual)
+        self.selected = set()
+        self._rendering = False
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.tree.bind("<Configure>", lambda e: self._render_window(), add="+")
+        for seq in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.tree.bind(seq, self._on_wheel, add="+")
+        for seq in ("<Up>", "<Down>", "<Prior>", "<Next>"):
+            self.tree.bind(seq, self._on_key, add="+")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def shown_ids(self) -> list:
+        """Filas en pantalla (todas o las filtradas), en orden."""
+        return self.ids if self.filter is None else self.fids
+
+    # -------------------------
+    # Model
+    # -------------------------
+    @property
+    def keys(self) -> list:
+        self._load_model()
+        return self._keys
+
+    @property
+    def key_of(self) -> dict:
+        self._load_model()
+        return self._key_of
+
+    @property
+    def items(self) -> dict:
+        self._load_model()
+        return self._items
+
+    def _load_model(self):
+        if self._pending is None:
+            return
+        resolve, fill, entries, stamps = self._pending
+        self._pending = None
+        n = len(entries)
+        # Mismas claves que daría reset(): seq decreciente en el orden en que se muestran
+        self._keys = [-(at << SEQ_BITS | n - j) for j, at in enumerate(stamps)]
+        self._key_of = dict(zip(self.ids, self._keys))
+        self._items = LazyItems(zip(self.ids, entries), resolve, fill)
+
+    def _row(self, pos: int, iid):
+        """Item de la fila pos de shown_ids(), sin armar el modelo si está pendiente."""
+        if self._pending is not None:
+            return self._pending[0](self._pending[2][pos])
+        return self.items[iid]
+
+    def _key(self, item):
+        # Un int en vez de una tupla de dos: menos memoria y las tuplas no van al GC
+        self.seq += 1
+        return -(int(item.get("added_at", 0) or 0) << SEQ_BITS | self.seq)
+
+    def _iid(self, item) -> str:
+        return item.get("id") or f"row-{id(item)}"
+
+    def _index(self, iid) -> int:
+        return bisect_left(self.keys, self.key_of[iid])
+
+    def _shown_index(self, iid) -> int | None:
+        """Posición en pantalla, o None si el filtro lo oculta."""
+        if self.filter is None:
+            return self._index(iid)
+        key = self.key_of[iid]
+        idx = bisect_left(self.fkeys, key)
+        if idx < len(self.fkeys) and self.fkeys[idx] == key:
+            return idx
+        return None
+
+    # -------------------------
+    # Public API
+    # -------------------------
+    def reset(self, items):
+        """
+        Carga completa (inicio / reset). Único camino O(n log n). items puede
+        venir en cualquier orden: a igual added_at queda arriba el primero.
+        Un SnapshotItems grande ya viene ordenado (ver _reset_lazy).
+        """
+        self._pending = None
+        lazy = hasattr(items, "table_rows") and len(items) > self.virtual_threshold
+        if not (lazy and self._reset_lazy(items)):
+            self._reset_model(items)
+        self.top = 0
+        # El filtro se vuelve a aplicar sobre los items nuevos (al terminar el índice, si se está armando)
+        flt = self.filter or self._pending_filter
+        self.filter = self._pending_filter = None
+        self.fkeys, self.fids, self.filtered_ms = [], [], 0
+        self._cancel_indexing()
+        self.index = None
+        if self._auto_index:
+            self.start_indexing()
+        self._rebuild()
+        if flt is not None:
+            self.set_filter(flt)
+
+    def _reset_model(self, items):
+        self._keys = []
+        self.ids = []
+        self._items = {}
+        self._key_of = {}
+        for it in reversed(list(items)):
+            iid = self._iid(it)
+            key = self._key(it)
+            self._items[iid] = it
+            self._key_of[iid] = key
+        pairs = sorted((key, iid) for iid, key in self._key_of.items())
+        self._keys = [k for k, _ in pairs]
+        self.ids = [iid for _, iid in pairs]
+        self.selected &= self._items.keys()
+
+    def _reset_lazy(self, items) -> bool:
+        """Solo ids y el orden, de un SnapshotItems; False si hay ids repetidos (van por _reset_model)."""
+        rows = items.table_rows()
+        if rows is None:
+            return False
+        entries, ids, stamps = rows
+        if "" in ids:
+            # Sin id: el de la tabla necesita el objeto
+            ids = [iid or self._iid(items.resolve(e)) for iid, e in zip(ids, entries)]
+        self.ids = ids
+        self.seq = len(ids)
+        self._pending = (items.resolve, items.fill, entries, stamps)
+        if self.selected:
+            self.selected &= set(ids)
+        return True
+
+    def insert(self, item):
+        self.insert_many([item])
+
+    def insert_many(self, items):
+        """Altas en lote: el modelo se actualiza de a una (bisect) y se redibuja una vez."""
+        rows = []
+        updates = []
+        for item in items:
+            iid = self._iid(item)
+            if iid in self.items:
+                updates.append((iid, item))
+                continue
+            key = self._key(item)
+            self.items[iid] = item
+            self.key_of[iid] = key
+            idx = bisect_left(self.keys, key)
+            self.keys.insert(idx, key)
+            self.ids.insert(idx, iid)
+            if self.index is not None:
+                self.index.add(iid, item)
+            if self.filter is not None:
+                if not self.filter.matches(item):
+                    continue
+                idx = bisect_left(self.fkeys, key)
+                self.fkeys.insert(idx, key)
+                self.fids.insert(idx, iid)
+                self.filtered_ms += duration_ms(item)
+            if self.virtual and idx < self.top:
+                self.top += 1  # que no se mueva lo que el usuario está mirando
+            rows.append((idx, iid, item))
+
+        if rows and not self._mode_changed():
+            if self.virtual:
+                self._render_window()
+            else:
+                # En el mismo orden en que entraron al modelo: cada idx vale con las anteriores ya puestas
+                for idx, iid, item in rows:
+                    self.tree.insert("", idx, iid=iid, values=self.row_values(item))
+        if updates:
+            self.update_many(updates)
+
+    def delete(self, ids):
+        removed = []
+        for iid in ids:
+            if iid not in self.items:
+                continue
+            shown = self._shown_index(iid)
+            idx = self._index(iid)
+            del self.keys[idx]
+            del self.ids[idx]
+            if self.index is not None:
+                self.index.remove(iid, self.items[iid])
+            if self.filter is not None and shown is not None:
+                del self.fkeys[shown]
+                del self.fids[shown]
+                self.filtered_ms -= duration_ms(self.items[iid])
+            del self.items[iid]
+            del self.key_of[iid]
+            self.selected.discard(iid)
+            if self.virtual and shown is not None and shown < self.top:
+                self.top -= 1
+            removed.append(iid)
+
+        if self._mode_changed():
+            return removed
+        if self.virtual:
+            self._render_window()
+        else:
+            existing = [iid for iid in removed if self.tree.exists(iid)]
+            if existing:
+                self.tree.delete(*existing)
+        return removed
+
+    def update(self, old_id, item):
+        """
+        Reemplaza un item (puede cambiar el id) manteniendo su posición. item
+        tiene que ser un objeto nuevo: el viejo se usa para sacarlo del índice.
+        """
+        self.update_many([(old_id, item)])
+
+    def update_many(self, pairs):
+        """Varios update() [(old_id, item)] con un solo redibujado al final."""
+        rebuild = rerender = False
+        for old_id, item in pairs:
+            iid = self._iid(item)
+            if old_id not in self.items:
+                self.insert(item)
+                continue
+            if self.filter is not None:
+                self._update_filtered(old_id, iid, item)
+                rebuild = True
+                continue
+            idx = self._index(old_id)
+            self._replace_model(old_id, iid, item)
+
+            if self.virtual:
+                if old_id != iid:
+                    rerender = True
+                elif iid in self.shown:
+                    self.tree.item(iid, values=self.row_values(item))
+            elif old_id == iid:
+                self.tree.item(iid, values=self.row_values(item))
+            else:
+                # Treeview no permite cambiar el iid: se reemplaza la fila en su lugar
+                self.tree.delete(old_id)
+                self.tree.insert("", idx, iid=iid, values=self.row_values(item))
+        if rebuild:
+            self._rebuild()
+        elif rerender:
+            self._render_window(force=True)
+
+    def _replace_model(self, old_id, iid, item):
+        key = self.key_of.pop(old_id)
+        idx = bisect_left(self.keys, key)
+        old = self.items.pop(old_id)
+        if self.index is not None:
+            self.index.remove(old_id, old)
+            self.index.add(iid, item)
+        self.items[iid] = item
+        self.key_of[iid] = key
+        self.ids[idx] = iid
+        if old_id in self.selected:
+            self.selected.discard(old_id)
+            self.selected.add(iid)
+
+    def _update_filtered(self, old_id, iid, item):
+        # Puede entrar o salir del filtro; si queda, conserva su lugar en el orden
+        shown = self._shown_index(old_id)
+        key = self.key_of[old_id]
+        if shown is not None:
+            del self.fkeys[shown]
+            del self.fids[shown]
+            self.filtered_ms -= duration_ms(self.items[old_id])
+        self._replace_model(old_id, iid, item)
+        if self.filter.matches(item):
+            idx = bisect_left(self.fkeys, key)
+            self.fkeys.insert(idx, key)
+            self.fids.insert(idx, iid)
+            self.filtered_ms += duration_ms(item)
+
+    # -------------------------
+    # Filter
+    # -------------------------
+    @property
+    def indexing(self) -> bool:
+        return self._index_job is not None
+
+    @property
+    def filter_pending(self) -> bool:
+        """Hay un filtro esperando a que termine el índice."""
+        return self._pending_filter is not None
+
+    def start_indexing(self, chunk: int = INDEX_CHUNK):
+        """
+        Arma el índice de búsqueda en segundo plano, de a chunk items por
+        vuelta del loop de Tk, para que la ventana no se congele con historiales
+        grandes. Las altas/bajas del medio ya van al índice nuevo; las que
+        quedan en la foto tomada al empezar se saltean si el item ya no está.
+        """
+        self._auto_index = True
+        self._cancel_indexing()
+        self.index = SearchIndex()
+        self.index.begin_bulk()
+        pending = iter(list(self.items.items()))
+
+        def step():
+            batch = list(islice(pending, chunk))
+            for iid, item in batch:
+                if self.items.get(iid) is item:
+                    self.index.add(iid, item)
+            if len(batch) == chunk:
+                self._index_job = self.tree.after(1, step)
+                return
+            self._index_job = None
+            self.index.end_bulk()
+            if self._pending_filter is not None:
+                flt, self._pending_filter = self._pending_filter, None
+                self.set_filter(flt)
+                if self.on_filtered is not None:
+                    self.on_filtered()
+
+        self._index_job = self.tree.after(1, step)
+
+    def _cancel_indexing(self):
+        if self._index_job is not None:
+            self.tree.after_cancel(self._index_job)
+            self._index_job = None
+
+    def set_filter(self, flt):
+        """
+        Muestra solo lo que cumple flt (HistoryFilter); vacío o None vuelve a
+        mostrar todo. Si el índice se está armando, se aplica al terminar.
+        """
+        if flt and self.indexing:
+            self._pending_filter = flt
+            return
+        self._pending_filter = None
+        self.filter = flt or None
+        self.top = 0
+        if self.filter is None:
+            self.fkeys, self.fids, self.filtered_ms = [], [], 0
+            self._rebuild()
+            return
+        if self.index is None:
+            self.index = SearchIndex.build(self.items)
+
+        # Las fechas son un rango contiguo del orden: se cortan por bisect
+        lo_key, hi_key = float("-inf"), float("inf")
+        lo, hi = 0, len(self.keys)
+        if flt.last:
+            lo_key = -(day_start_ts(flt.last + timedelta(days=1)) << SEQ_BITS)
+            lo = bisect_right(self.keys, lo_key)
+        if flt.first:
+            hi_key = -(day_start_ts(flt.first) << SEQ_BITS)
+            hi = bisect_right(self.keys, hi_key)
+
+        match = self.index.candidates(flt)
+        key_of = self.key_of
+        if match is None:
+            self.fids = self.ids[lo:hi]
+            self.fkeys = self.keys[lo:hi]
+        elif len(match) * SORT_CANDIDATES_RATIO < hi - lo:
+            self.fids = sorted((iid for iid in match if lo_key < key_of[iid] <= hi_key), key=key_of.__getitem__)
+            self.fkeys = list(map(key_of.__getitem__, self.fids))
+        else:
+            # Todo en C (map/compress): con cientos de miles de filas un for se nota al tipear
+            flags = list(map(match.__contains__, self.ids[lo:hi]))
+            self.fids = list(compress(self.ids[lo:hi], flags))
+            self.fkeys = list(compress(self.keys[lo:hi], flags))
+        self.filtered_ms = self.index.total_ms(self.fids)
+        self._rebuild()
+
+    def refresh_values(self, ids=None):
+        """Recalcula el texto de las filas materializadas (ej: cambio de idioma)."""
+        targets = self.shown if self.virtual else self.shown_ids()
+        if ids is not None:
+            ids = set(ids)
+            targets = [iid for iid in targets if iid in ids]
+        if self._pending is not None:
+            # Nada cambió desde reset(): las filas se leen por posición (ver _row)
+            for k, iid in enumerate(self.shown):
+                if ids is None or iid in ids:
+                    self.tree.item(iid, values=self.row_values(self._row(self.top + k, iid)))
+            return
+        for iid in targets:
+            self.tree.item(iid, values=self.row_values(self.items[iid]))
+
+    def select_all(self):
+        """Selecciona todas las filas en pantalla (con un filtro puesto, solo las filtradas)."""
+        rows = self.shown_ids()
+        self.selected = set(rows)
+        self._rendering = True
+        try:
+            self.tree.selection_set(self.shown if self.virtual else rows)
+        finally:
+            self._rendering = False
+
+    def selection(self) -> list:
+        if self.virtual:
+            return [iid for iid in self.shown_ids() if iid in self.selected] if self.selected else []
+        return list(self.tree.selection())
+
+    # -------------------------
+    # Rendering
+    # -------------------------
+    def _mode_changed(self) -> bool:
+        virtual = len(self.shown_ids()) > self.virtual_threshold
+        if virtual == self.virtual:
+            return False
+        self._rebuild()
+        return True
+
+    def _rebuild(self):
+        if not self.virtual:
+            sel = self.tree.selection()
+            self.selected = set(sel) & self.items.keys() if sel else set()
+        self._rendering = True
+        try:
+            children = self.tree.get_children()
+            if children:
+                self.tree.delete(*children)
+            self.shown = []
+            rows = self.shown_ids()
+            self.virtual = len(rows) > self.virtual_threshold
+            if self.virtual:
+                self.tree.configure(yscrollcommand="")
+                self.sb.configure(command=self._yview)
+            else:
+                self.tree.configure(yscrollcommand=self.sb.set)
+                self.sb.configure(command=self.tree.yview)
+                for iid in rows:
+                    self.tree.insert("", "end", iid=iid, values=self.row_values(self.items[iid]))
+                sel = [iid for iid in rows if iid in self.selected]
+                if sel:
+                    self.tree.selection_set(sel)
+        finally:
+            self._rendering = False
+        if self.virtual:
+            self._render_window(force=True)
+
+    def _visible_rows(self) -> int:
+        h = self.tree.winfo_height()
+        if h <= 1:
+            return DEFAULT_VISIBLE_ROWS
+        return max(1, (h - HEADER_HEIGHT) // ROW_HEIGHT)
+
+    def _render_window(self, force: bool = False):
+        if not self.virtual:
+            return
+        rows = self.shown_ids()
+        n = len(rows)
+        visible = self._visible_rows()
+        self.top = max(0, min(self.top, n - visible))
+        window = rows[self.top:self.top + visible + BUFFER_ROWS]
+
+        self._rendering = True
+        try:
+            if force:
+                if self.shown:
+                    self.tree.delete(*self.shown)
+                self.shown = []
+            # Diff de ventana: las filas que siguen visibles no se tocan
+            keep = set(window)
+            gone = [iid for iid in self.shown if iid not in keep]
+            if gone:
+                self.tree.delete(*gone)
+            present = set(self.shown) - set(gone)
+            for idx, iid in enumerate(window):
+                if iid not in present:
+                    self.tree.insert("", idx, iid=iid, values=self.row_values(self._row(self.top + idx, iid)))
+                elif self.tree.index(iid) != idx:
+                    self.tree.move(iid, "", idx)
+            self.shown = window
+            self.tree.yview_moveto(0)
+            self.tree.selection_set([iid for iid in window if iid in self.selected])
+        finally:
+            self._rendering = False
+
+        if n:
+            self.sb.set(self.top / n, min(1.0, (self.top + visible) / n))
+
+    def _scroll_to(self, top: int):
+        if top != self.top:
+            self.top = top
+            self._render_window()
+
+    # -------------------------
+    # Events
+    # -------------------------
+    def _on_select(self, _event=None):
+        if self._rendering or not self.virtual:
+            return
+        self.selected = (self.selected - set(self.shown)) | set(self.tree.selection())
+
+    def _yview(self, *args):
+        n = len(self.shown_ids())
+        visible = self._visible_rows()
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * n))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (visible if args[2] == "pages" else 1)
+            self._scroll_to(self.top + step)
+
+    def _on_wheel(self, event):
+        if not self.virtual:
+            return None
+        if getattr(event, "num", None) == 4:
+            delta = -3
+        elif getattr(event, "num", None) == 5:
+            delta = 3
+        else:
+            delta = -3 if event.delta > 0 else 3
+        self._scroll_to(self.top + delta)
+        return "break"
+
+    def _on_key(self, event):
+        if not self.virtual or not self.shown:
+            return None
+        visible = self._visible_rows()
+        focus = self.tree.focus()
+        pos = self.shown.index(focus) if focus in self.shown else 0
+        step = {"Up": -1, "Down": 1, "Prior": -visible, "Next": visible}[event.keysym]
+        rows = self.shown_ids()
+        target = min(max(self.top + pos + step, 0), len(rows) - 1)
+        if self.top <= target < self.top + visible:
+            return None  # dentro de la ventana: que lo maneje el Treeview
+        self._scroll_to(target - (visible - 1 if step > 0 else 0))
+        iid = rows[target]
+        if iid in self.shown:
+            self.tree.focus(iid)
+            self.tree.selection_set(iid)
+            self.selected = {iid}
+        return "break"
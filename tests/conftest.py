@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos están sueltos en la raíz del repo (como los importa main.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
@@ -0,0 +1,119 @@
+"""
+Aggregates mantenido alta por alta contra un recálculo completo, después de
+secuencias aleatorias (con semilla) de altas, bajas, updates y relabels.
+"""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from aggregates import Aggregates, DayIndex, day_of, duration_ms
+from items import Item, replaced
+
+TODAY = date(2024, 3, 4)  # lunes: la semana y el mes empiezan cerca, hay bordes de los dos lados
+DAYS = 70
+
+
+def _midnight(d: date) -> int:
+    return int(datetime(d.year, d.month, d.day).timestamp())
+
+
+def _random_ts(rng: random.Random) -> int:
+    d = TODAY - timedelta(days=rng.randrange(DAYS))
+    start = _midnight(d)
+    kind = rng.random()
+    if kind < 0.25:
+        return start          # justo a medianoche
+    if kind < 0.5:
+        return start - 1      # último segundo del día anterior
+    return start + rng.randrange(86400)
+
+
+def _random_item(rng: random.Random, n: int) -> Item:
+    type = rng.choice(("video", "manual"))
+    path = f"/videos/clip{n:05d}.mp4" if type == "video" else ""
+    iid = f"{path}|1000|{n}" if path else f"manual-{n}"
+    sec = rng.choice((0.0, 0.0005, 0.001, 1.5, 59.999, rng.uniform(0, 7200)))
+    return Item(iid, type, path.rsplit("/", 1)[-1] or "Manual input", sec, _random_ts(rng), path)
+
+
+def _range_sec(items, first: date, last: date) -> float:
+    lo, hi = first.toordinal(), last.toordinal()
+    return sum(duration_ms(it) for it in items if lo <= day_of(it["added_at"]) <= hi) / 1000
+
+
+def _assert_matches(agg: Aggregates, items: list, rng: random.Random):
+    full = Aggregates.from_items(items)
+    assert agg.total_ms == full.total_ms == sum(map(duration_ms, items))
+    assert agg.total_sec == full.total_sec
+    assert agg.videos == full.videos == sum(it["type"] == "video" for it in items)
+    assert agg.manual == full.manual == sum(it["type"] != "video" for it in items)
+    assert agg.today_sec(TODAY) == _range_sec(items, TODAY, TODAY)
+    assert agg.week_sec(TODAY) == _range_sec(items, TODAY - timedelta(days=TODAY.weekday()), TODAY)
+    assert agg.month_sec(TODAY) == _range_sec(items, TODAY.replace(day=1), TODAY)
+    for _ in range(3):
+        first = TODAY - timedelta(days=rng.randrange(-5, DAYS + 5))
+        last = first + timedelta(days=rng.randrange(0, 40))
+        assert agg.range_sec(first, last) == full.range_sec(first, last) == _range_sec(items, first, last)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_incremental_matches_full_recompute(seed):
+    rng = random.Random(seed)
+    agg = Aggregates()
+    items = []
+    n = 0
+    for _ in range(400):
+        op = rng.random()
+        if op < 0.45 or not items:
+            it = _random_item(rng, n)
+            n += 1
+            items.append(it)
+            agg.add(it)
+        elif op < 0.65:
+            it = items.pop(rng.randrange(len(items)))
+            agg.remove(it)
+        elif op < 0.85:
+            # update: como la ventana, saca el viejo y suma el nuevo
+            i = rng.randrange(len(items))
+            new = replaced(items[i], duration_sec=rng.uniform(0, 3600), added_at=_random_ts(rng),
+                           type=rng.choice(("video", "manual")))
+            agg.remove(items[i])
+            items[i] = new
+            agg.add(new)
+        else:
+            i = rng.randrange(len(items))
+            new = replaced(items[i], label=f"relabel {rng.randrange(1000)}")
+            agg.remove(items[i])
+            items[i] = new
+            agg.add(new)
+        _assert_matches(agg, items, rng)
+
+
+def test_day_boundaries():
+    agg = Aggregates()
+    midnight = _midnight(TODAY)
+    items = [Item("a", "manual", "a", 60.0, midnight, ""), Item("b", "manual", "b", 30.0, midnight - 1, "")]
+    for it in items:
+        agg.add(it)
+    assert agg.today_sec(TODAY) == 60.0
+    assert agg.range_sec(TODAY - timedelta(days=1), TODAY - timedelta(days=1)) == 30.0
+    agg.remove(items[0])
+    assert agg.today_sec(TODAY) == 0.0
+    assert agg.week_sec(TODAY) == 0.0  # lunes: el día anterior es de la otra semana
+    assert agg.month_sec(TODAY) == 30.0  # pero sí del mismo mes
+    assert agg.total_sec == 30.0
+
+
+def test_day_index_grows_both_ways():
+    rng = random.Random(1)
+    index = DayIndex()
+    days = {}
+    for _ in range(500):
+        day = rng.randrange(700_000, 700_000 + 2000)
+        ms = rng.randrange(-5000, 5000)
+        index.add(day, ms)
+        days[day] = days.get(day, 0) + ms
+        first = rng.randrange(699_900, 702_100)
+        last = first + rng.randrange(0, 500)
+        assert index.range_ms(first, last) == sum(v for d, v in days.items() if first <= d <= last)
@@ -0,0 +1,134 @@
+"""Validación de registros importados y re-importación sin duplicados."""
+import json
+from datetime import datetime
+
+import pytest
+
+from importer import Importer, _timestamp, record_item, stable_id
+
+
+# -------------------------
+# Fechas
+# -------------------------
+@pytest.mark.parametrize("value, expected", [
+    (1_700_000_000, 1_700_000_000),
+    (1_700_000_000.9, 1_700_000_000),
+    ("1700000000", 1_700_000_000),
+    (" 1700000000.5 ", 1_700_000_000),
+    ("2024-03-04T10:30:00", int(datetime(2024, 3, 4, 10, 30).timestamp())),  # sin zona: hora local
+    ("2024-03-04", int(datetime(2024, 3, 4).timestamp())),
+    ("2024-03-04T10:30:00+00:00", 1_709_548_200),
+])
+def test_timestamp_epoch_and_iso(value, expected):
+    assert _timestamp(value) == expected
+
+
+@pytest.mark.parametrize("value, error", [
+    (None, "missing date"),
+    (0, "invalid date"),
+    (-5, "invalid date"),
+    ("0", "invalid date"),
+    ("-1700000000", "invalid date"),
+    ("inf", "invalid date"),
+    ("nan", "invalid date"),
+    (float("inf"), "invalid date"),
+    ("yesterday", "invalid date"),
+    ("2024-13-01", "invalid date"),
+])
+def test_timestamp_rejects(value, error):
+    with pytest.raises(ValueError, match=error):
+        _timestamp(value)
+
+
+# -------------------------
+# Registros
+# -------------------------
+def test_durations():
+    base = {"date": 1_700_000_000, "label": "x"}
+    assert record_item({**base, "duration": "1:02:05"}).duration_sec == 3725.0
+    assert record_item({**base, "duration": "2:34"}).duration_sec == 154.0
+    assert record_item({**base, "duration": "25"}).duration_sec == 1500.0
+    assert record_item({**base, "seconds": "90.5"}).duration_sec == 90.5
+    # duration_sec gana sobre duration
+    assert record_item({**base, "duration_sec": 10, "duration": "1:00"}).duration_sec == 10.0
+
+
+@pytest.mark.parametrize("rec, error", [
+    ({}, "missing duration"),
+    ({"duration": "1:75"}, "invalid duration"),
+    ({"duration": "0:00"}, "invalid duration"),
+    ({"duration": "abc"}, "invalid duration"),
+    ({"duration_sec": 0}, "invalid duration_sec"),
+    ({"duration_sec": "nan"}, "invalid duration_sec"),
+    ({"duration_sec": "inf"}, "invalid duration_sec"),
+    ({"duration_sec": 60}, "missing date"),
+    ({"duration_sec": 60, "date": 1_700_000_000, "type": "audio"}, "unknown type"),
+])
+def test_record_rejects(rec, error):
+    with pytest.raises(ValueError, match=error):
+        record_item(rec)
+
+
+def test_record_defaults_and_aliases():
+    it = record_item({"seconds": 60, "start": "1700000000", "description": " Call "})
+    assert (it.type, it.label, it.path, it.added_at) == ("manual", "Call", "", 1_700_000_000)
+    assert record_item({"duration_sec": 60, "date": 1_700_000_000}).label == "Imported"
+    assert record_item({"duration_sec": 60, "date": 1_700_000_000, "type": "VIDEO "}).type == "video"
+    assert record_item({"duration_sec": 60, "date": 1_700_000_000, "id": " own-id "}).id == "own-id"
+
+
+def test_stable_id():
+    rec = {"duration": "1:00", "date": "2024-03-04T10:00:00", "label": "Edit"}
+    a, b = record_item(dict(rec)), record_item(dict(rec))
+    assert a.id == b.id == stable_id("manual", "Edit", 60.0, a.added_at, "")
+    assert a.id.startswith("import-")
+    assert record_item({**rec, "label": "Other"}).id != a.id
+    assert record_item({**rec, "date": "2024-03-04T10:00:01"}).id != a.id
+
+
+# -------------------------
+# Archivos
+# -------------------------
+# Con BOM, como los CSV que exporta Excel
+CSV = """\ufeffDate,Duration,Description,Type
+2024-03-04T09:00:00,1:30:00,Edit,manual
+1709560800,45,Review,
+bad-date,10,Broken,
+2024-03-05T09:00:00,0:00,Zero,
+2024-03-04T09:00:00,1:30:00,Edit,manual
+"""
+
+
+def _run(path, known_ids, **kw) -> tuple:
+    importer = Importer(str(path), known_ids, **kw)
+    items = [it for batch in importer.batches() for it in batch]
+    return importer, items
+
+
+def test_csv_import_and_reimport_is_noop(tmp_path):
+    path = tmp_path / "records.csv"
+    path.write_text(CSV, encoding="utf-8")
+    known = set()
+    first, items = _run(path, known, batch_size=1)
+    assert [it.label for it in items] == ["Edit", "Review"]
+    # La última fila repite la primera: entra una sola vez
+    assert (first.added, first.known, first.invalid) == (2, 1, 2)
+    assert [line for line, _ in first.errors] == [4, 5]
+    assert first.read_bytes == first.total_bytes
+
+    again, items = _run(path, known)
+    assert items == []
+    assert (again.added, again.known, again.invalid) == (0, 3, 2)
+
+
+def test_jsonl_import(tmp_path):
+    path = tmp_path / "records.jsonl"
+    lines = [json.dumps({"Duration_Sec": 60, "Added_At": 1_700_000_000, "Label": "a"}), "", "not json", "[1]",
+             json.dumps({"duration": "2:00", "date": "2024-03-04", "path": "/v/x.mp4", "type": "video"})]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    importer, items = _run(path, set())
+    assert [(it.label, it.duration_sec) for it in items] == [("a", 60.0), ("Imported", 120.0)]
+    assert items[1].path == "/v/x.mp4"
+    assert importer.invalid == 2
+    assert [line for line, _ in importer.errors] == [3, 4]
+
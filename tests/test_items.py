@@ -0,0 +1,88 @@
+"""Item guarda label/path como None cuando se derivan del id: to_dict() tiene que devolver lo cargado tal cual."""
+import json
+
+import pytest
+
+from items import KEYS, Item
+
+
+def _item(id, label, path, type="video", duration_sec=12.5, added_at=1_700_000_000):
+    return {"id": id, "type": type, "label": label, "duration_sec": duration_sec, "added_at": added_at,
+            "path": path}
+
+
+def _roundtrip(d):
+    it = Item.from_dict(d)
+    back = it.to_dict() if isinstance(it, Item) else it
+    assert back == d
+    assert list(back) == list(d)
+    assert [type(v) for v in back.values()] == [type(v) for v in d.values()]
+    return it
+
+
+CASES = {
+    "derived": _item("/v/clip.mp4|100|5", "clip.mp4", "/v/clip.mp4"),
+    "label not the basename": _item("/v/clip.mp4|100|5", "Client call", "/v/clip.mp4"),
+    "label is a suffix of the basename": _item("/v/myclip.mp4|100|5", "clip.mp4", "/v/myclip.mp4"),
+    "id without size|mtime": _item("/v/clip.mp4", "clip.mp4", "/v/clip.mp4"),
+    "id with one suffix": _item("/v/clip.mp4|100", "clip.mp4", "/v/clip.mp4"),
+    "id with extra |": _item("/v/a|b.mp4|100|5", "a|b.mp4", "/v/a|b.mp4"),
+    "path with | and extra suffix": _item("/v/a.mp4|x|100|5", "a.mp4", "/v/a.mp4"),
+    "id of another path": _item("/v/other.mp4|100|5", "clip.mp4", "/v/clip.mp4"),
+    "empty path": _item("manual-1700000000-3", "Manual input", "", type="manual"),
+    "empty path and label": _item("manual-1", "", "", type="manual"),
+    "path ending in a separator": _item("/v/folder/|100|5", "", "/v/folder/"),
+    "path ending in a separator, label set": _item("/v/folder/|100|5", "folder", "/v/folder/"),
+    "relative path": _item("clip.mp4|1|2", "clip.mp4", "clip.mp4"),
+    "int duration": _item("/v/clip.mp4|100|5", "clip.mp4", "/v/clip.mp4", duration_sec=60),
+    "unknown type": _item("/v/clip.mp4|100|5", "clip.mp4", "/v/clip.mp4", type="audio"),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_roundtrip(name):
+    it = _roundtrip(CASES[name])
+    assert isinstance(it, Item)
+    for k in KEYS:
+        assert it[k] == CASES[name][k]
+
+
+def test_compacts_when_derivable():
+    assert Item.from_dict(CASES["derived"]).parts()[2::3] == (None, None)
+    label, path = Item.from_dict(CASES["label not the basename"]).parts()[2::3]
+    assert label == "Client call" and path is None
+    assert Item.from_dict(CASES["id without size|mtime"]).parts()[5] == "/v/clip.mp4"
+
+
+@pytest.mark.parametrize("d", [
+    {**CASES["derived"], "note": "extra"},
+    {k: CASES["derived"][k] for k in reversed(KEYS)},
+    {k: v for k, v in CASES["derived"].items() if k != "path"},
+    {**CASES["derived"], "id": 123},
+    {**CASES["derived"], "label": None},
+    {**CASES["derived"], "path": None},
+])
+def test_other_dicts_stay_as_they_are(d):
+    it = Item.from_dict(d)
+    assert it is d
+
+
+def test_parts_roundtrip():
+    for d in CASES.values():
+        it = Item.from_dict(d)
+        assert Item.from_parts(*it.parts()).to_dict() == d
+
+
+def test_json_load_hook_keeps_bytes():
+    text = json.dumps({"items": list(CASES.values()) + [{**CASES["derived"], "note": 1}]})
+    data = json.loads(text, object_hook=Item.from_dict)
+    assert json.dumps(data, default=lambda o: o.to_dict()) == text
+
+
+def test_update_rederives():
+    it = Item.from_dict(CASES["derived"])
+    it.update(path="/w/new.mp4", id="/w/new.mp4|1|2", label="new.mp4")
+    assert it.parts()[2::3] == (None, None)
+    assert it.to_dict() == _item("/w/new.mp4|1|2", "new.mp4", "/w/new.mp4")
+    it.update(label="Renamed")
+    assert it.label == "Renamed" and it.path == "/w/new.mp4"
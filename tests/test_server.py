@@ -0,0 +1,58 @@
+"""Servicio HTTP (server.py): reenviar el mismo lote no duplica items."""
+import http.client
+import json
+import threading
+
+import pytest
+
+from server import IngestServer, IngestService
+from storage import JournalStore
+
+
+@pytest.fixture
+def server(tmp_path):
+    store = JournalStore(str(tmp_path / "data.json"))
+    service = IngestService(store, store.load())
+    httpd = IngestServer(("127.0.0.1", 0), service)
+    service.start()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+    service.close()
+    store.close()
+
+
+def _request(httpd, method: str, path: str, body=None) -> tuple:
+    conn = http.client.HTTPConnection(*httpd.server_address[:2], timeout=10)
+    try:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        conn.request(method, path, payload, {"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        return resp.status, json.loads(resp.read())
+    finally:
+        conn.close()
+
+
+def test_resending_a_batch_without_ids_adds_nothing(server):
+    batch = {"items": [{"duration_sec": 90, "label": "review", "added_at": 1_700_000_000},
+                       {"duration": "1:30", "description": "call", "date": "2024-03-01T10:00:00"}]}
+    status, first = _request(server, "POST", "/items", batch)
+    assert status == 200 and first["added"] == 2 and first["invalid"] == []
+
+    status, again = _request(server, "POST", "/items", batch)
+    assert status == 200 and again["added"] == 0 and again["known"] == 2
+    assert len(server.service.data["items"]) == 2
+    assert _request(server, "GET", "/totals")[1]["total_sec"] == 180
+
+
+def test_date_is_required_without_id(server):
+    status, result = _request(server, "POST", "/items", {"items": [
+        {"duration_sec": 60, "label": "no id, no date"},
+        {"duration_sec": 60, "label": "id, no date", "id": "client-1"},
+    ]})
+    assert status == 200
+    assert result["invalid"] == [{"index": 0, "error": "missing date"}]
+    assert result["ids"] == ["client-1"]
+    assert len(server.service.data["items"]) == 1
@@ -0,0 +1,133 @@
+"""
+Formato binario (snapshot.py): data.json -> data.snap -> data.json da el
+mismo texto, y BinaryJournalStore aplica el journal igual que JournalStore.
+"""
+import random
+
+import pytest
+
+from items import Item, ItemIndex
+from storage import BinaryJournalStore, JournalStore, atomic_write_json, convert_snapshot
+
+
+def _video(n: int, **fields) -> dict:
+    path = f"/videos/2024/clip{n:04d}.mp4"
+    d = {"id": f"{path}|{1000 + n}|{1_700_000_000 + n}", "type": "video", "label": f"clip{n:04d}.mp4",
+         "duration_sec": 10.0 + n / 7, "added_at": 1_700_000_000 + n * 3_600, "path": path}
+    d.update(fields)
+    return d
+
+
+ODD = [
+    _video(1, label="Not the file name"),
+    _video(2, duration_sec=60),                           # int, no float
+    _video(3, id="/videos/2024/clip0003.mp4"),            # id sin |size|mtime
+    _video(4, id="/videos/a|b.mp4|1|2", path="/videos/a|b.mp4", label="a|b.mp4"),
+    _video(5, path="/videos/folder/", label=""),
+    {"id": "manual-1", "type": "manual", "label": "ñandú 😀", "duration_sec": 1.5, "added_at": 1_700_000_001,
+     "path": ""},
+    {"id": "y\u0000z", "type": "manual", "label": "nul in the id", "duration_sec": 2.0, "added_at": 1_700_000_002,
+     "path": ""},
+    {"id": "odd-type", "type": "audio", "label": "q", "duration_sec": 2.0, "added_at": 1_700_000_003,
+     "path": "/a/b"},
+    {"id": "negative zero", "type": "manual", "label": "x", "duration_sec": -0.0, "added_at": 3, "path": "/x/"},
+    {"id": "", "type": "manual", "label": "empty id", "duration_sec": 3.0, "added_at": 1_700_000_004, "path": ""},
+    {"id": 123, "type": "manual", "label": "int id", "duration_sec": 1.0, "added_at": 1_700_000_005, "path": ""},
+    {"id": "extra", "type": "manual", "label": "x", "duration_sec": 1.0, "added_at": 1_700_000_006, "path": "",
+     "note": "extra key"},
+    {"path": "", "id": "reordered", "type": "manual", "label": "x", "duration_sec": 1.0, "added_at": 1_700_000_007},
+    {"id": "missing keys", "duration_sec": 4},
+    {"id": "float ts", "type": "manual", "label": "x", "duration_sec": 1.0, "added_at": 1.7e9, "path": ""},
+    {"id": "none", "type": "manual", "label": None, "duration_sec": None, "added_at": None, "path": None},
+]
+
+
+def _history() -> list:
+    return [_video(n) for n in range(10, 300)] + ODD
+
+
+def _plain(items) -> list:
+    return [it.to_dict() if isinstance(it, Item) else it for it in items]
+
+
+def test_json_snap_json_is_exact(tmp_path):
+    src, snap, back = tmp_path / "data.json", tmp_path / "data.snap", tmp_path / "back.json"
+    atomic_write_json(str(src), {"format": 2, "seq": 77, "other": [1, {"a": None}], "items": _history()})
+    (tmp_path / "data.json.journal").write_text('{"seq": 78, "op": "del", "id": "manual-1"}\n', encoding="utf-8")
+
+    assert convert_snapshot(str(src), str(snap)) == len(_history())
+    assert (tmp_path / "data.snap.journal").read_bytes() == (tmp_path / "data.json.journal").read_bytes()
+    assert convert_snapshot(str(snap), str(back)) == len(_history())
+    assert back.read_bytes() == src.read_bytes()
+
+
+def test_empty_snapshot_roundtrip(tmp_path):
+    src, snap, back = tmp_path / "data.json", tmp_path / "data.snap", tmp_path / "back.json"
+    atomic_write_json(str(src), {"format": 2, "seq": 0, "items": []})
+    convert_snapshot(str(src), str(snap))
+    convert_snapshot(str(snap), str(back))
+    assert back.read_bytes() == src.read_bytes()
+
+
+def _random_edits(rng: random.Random, store, items: list, ids: list, n: int, tag: str):
+    """Ediciones como las hace la app: data["items"] al día y el store con lo mismo."""
+    index = ItemIndex(items)
+    for k in range(n):
+        op = rng.random()
+        if op < 0.4 or not ids:
+            it = Item(f"{tag}-{k}", rng.choice(("manual", "video")), f"n{k}", rng.uniform(0, 3600),
+                      1_700_000_000 + rng.randrange(10**7), "")
+            items.append(it)
+            ids.append(it.id)
+            store.add([it])
+        elif op < 0.7:
+            iid = ids.pop(rng.randrange(len(ids)))
+            index.remove([iid])
+            store.delete([iid])
+        else:
+            i = rng.randrange(len(ids))
+            old_id = ids[i]
+            new = Item(old_id if rng.random() < 0.5 else f"{tag}-put-{k}", "manual", "put", 2.0,
+                       1_700_000_000 + rng.randrange(10**7), "")
+            index.replace(old_id, new)
+            ids[i] = new.id
+            store.update(old_id, new)
+
+
+def _state(store, data) -> tuple:
+    meta = {k: v for k, v in data.items() if k != "items"}
+    items = sorted(_plain(data["items"]), key=repr)
+    return meta, items, store.totals_ms(), store.daily_ms(), store.known_ids()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_binary_store_replays_like_json_store(tmp_path, seed):
+    rng = random.Random(seed)
+    atomic_write_json(str(tmp_path / "data.json"), {"format": 2, "seq": 5, "x": 1, "items": _history()})
+    ids = [d["id"] for d in _history() if isinstance(d.get("id"), str) and d["id"]]
+
+    # Journal escrito por el store JSON, después convertido: el .snap arranca con journal pendiente
+    js = JournalStore(str(tmp_path / "data.json"))
+    _random_edits(rng, js, js.load()["items"], ids, 400, "a")
+    js.close()
+    convert_snapshot(str(tmp_path / "data.json"), str(tmp_path / "data.snap"))
+
+    json_store = JournalStore(str(tmp_path / "data.json"))
+    bin_store = BinaryJournalStore(str(tmp_path / "data.snap"))
+    a, b = json_store.load(readonly=True), bin_store.load(readonly=True)
+    assert _state(bin_store, b) == _state(json_store, a)
+
+    # Las mismas ediciones sobre los dos, con compactación frecuente, y recarga
+    stores = [JournalStore(str(tmp_path / "data.json"), compact_bytes=4096),
+              BinaryJournalStore(str(tmp_path / "data.snap"), compact_bytes=4096)]
+    for store in stores:
+        _random_edits(random.Random(seed + 100), store, store.load()["items"], list(ids_after(a)), 600, "b")
+        store.close()
+    json_store = JournalStore(str(tmp_path / "data.json"))
+    bin_store = BinaryJournalStore(str(tmp_path / "data.snap"))
+    a, b = json_store.load(readonly=True), bin_store.load(readonly=True)
+    assert _state(bin_store, b) == _state(json_store, a)
+
+
+def ids_after(data) -> list:
+    return sorted(it.get("id") for it in data["items"] if isinstance(it.get("id"), str) and it.get("id"))
@@ -0,0 +1,92 @@
+"""WriteBehindStore cuando falla la escritura: ningún flush() queda colgado."""
+import threading
+import time
+
+import pytest
+
+from storage import WriteBehindStore
+
+
+class FlakyStore:
+    """Guarda en memoria lo que aplica; falla mientras failing sea True."""
+
+    def __init__(self):
+        self.failing = True
+        self.applied = []
+        self.attempts = 0
+        self.gate = threading.Event()  # apply() espera acá: los flush() llegan a esperar antes de la falla
+        self.gate.set()
+
+    def apply(self, ops):
+        self.gate.wait()
+        self.attempts += 1
+        if self.failing:
+            raise OSError("disk full")
+        self.applied += ops
+
+    def close(self):
+        pass
+
+
+def _flush_in_threads(store, n: int, gate=None) -> list:
+    results = [None] * n
+
+    def flush(i):
+        try:
+            store.flush()
+            results[i] = "ok"
+        except OSError as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=flush, args=(i,), daemon=True) for i in range(n)]
+    for t in threads:
+        t.start()
+    if gate is not None:
+        time.sleep(0.2)
+        gate.set()
+    for t in threads:
+        t.join(timeout=5)
+    assert not any(t.is_alive() for t in threads), "flush() still waiting after the write failed"
+    return results
+
+
+@pytest.fixture
+def flaky():
+    inner = FlakyStore()
+    store = WriteBehindStore(inner, debounce_secs=0.05)
+    store.start()
+    yield inner, store
+    inner.failing = False
+    store.close()
+
+
+def test_concurrent_flushes_all_see_the_failure(flaky):
+    inner, store = flaky
+    inner.gate.clear()
+    store.add(["a"])
+    results = _flush_in_threads(store, 2, inner.gate)
+    assert all(isinstance(r, OSError) for r in results)
+    assert inner.applied == []
+
+
+def test_flush_retries_after_failure(flaky):
+    inner, store = flaky
+    store.add(["a"])
+    with pytest.raises(OSError):
+        store.flush()
+    inner.failing = False
+    store.add(["b"])  # el error ya se informó: no vuelve a salir acá
+    assert _flush_in_threads(store, 3) == ["ok"] * 3
+    assert inner.applied == [("add", (["a"],)), ("add", (["b"],))]
+
+
+def test_flush_after_failure_without_new_edits_retries(flaky):
+    inner, store = flaky
+    store.add(["a"])
+    with pytest.raises(OSError):
+        store.flush()
+    attempts = inner.attempts
+    inner.failing = False
+    store.flush()
+    assert inner.attempts > attempts
+    assert inner.applied == [("add", (["a"],))]
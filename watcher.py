@@ -0,0 +1,278 @@
+import os
+import sys
+import time
+import queue
+import select
+import struct
+import threading
+
+from dedupe import find_duplicates, saved_video_sizes
+from scanner import DEFAULT_WORKERS, DirSnapshots, is_video_file, list_videos, make_fingerprint, probe_in_order
+
+# Un archivo se considera terminado cuando tamaño y mtime no cambian durante esto
+SETTLE_SECS = 3.0
+CHECK_SECS = 1.0
+POLL_SECS = 5.0
+BATCH_SIZE = 8
+
+
+# -------------------------
+# inotify (Linux)
+# -------------------------
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+# Sin IN_MODIFY: un export escribiendo generaría miles de eventos por segundo.
+# Lo que sigue creciendo se revisa por stat cada CHECK_SECS mientras esté pendiente.
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class InotifyBackend:
+    """Bloquea en select() hasta que el kernel avisa: sin eventos, CPU cero."""
+
+    def __init__(self, folders, wake_fd: int):
+        import ctypes
+        self.libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.wake_fd = wake_fd
+        self.dirs = {}  # wd -> (dirpath, recursive)
+        for root, recursive in folders:
+            self._add_tree(root, recursive)
+
+    def _add_watch(self, dirpath: str, recursive: bool):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = (dirpath, recursive)
+
+    def _add_tree(self, root: str, recursive: bool):
+        self._add_watch(root, recursive)
+        if recursive:
+            for dirpath, dirnames, _ in os.walk(root):
+                for d in dirnames:
+                    self._add_watch(os.path.join(dirpath, d), True)
+
+    def wait(self, timeout):
+        """Devuelve (paths tocados, necesita_rescan)."""
+        ready, _, _ = select.select([self.fd, self.wake_fd], [], [], timeout)
+        if self.fd not in ready:
+            return [], False
+
+        touched = []
+        rescan = False
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+        pos = 0
+        while pos + EVENT_HEADER.size <= len(buf):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(buf, pos)
+            name = buf[pos + EVENT_HEADER.size:pos + EVENT_HEADER.size + name_len].rstrip(b"\0")
+            pos += EVENT_HEADER.size + name_len
+
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if wd not in self.dirs or not name:
+                continue
+            dirpath, recursive = self.dirs[wd]
+            full = os.path.join(dirpath, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Carpeta nueva: vigilarla y levantar lo que ya tenga adentro
+                    self._add_tree(full, True)
+                    touched.extend(p for p, _, _ in list_videos(full, True))
+            elif is_video_file(full):
+                touched.append(full)
+        return touched, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Fallback: relista cada POLL_SECS usando los snapshots por carpeta (un stat por carpeta)."""
+
+    def __init__(self, folders, stop_event: threading.Event):
+        self.folders = folders
+        self.stop_event = stop_event
+        self.snapshots = DirSnapshots(path="")  # solo en memoria
+        self.seen = {}
+
+    def wait(self, timeout):
+        self.stop_event.wait(POLL_SECS if timeout is None else min(timeout, POLL_SECS))
+        touched = []
+        for root, recursive in self.folders:
+            for p, size, mtime in list_videos(root, recursive, self.snapshots):
+                if self.seen.get(p) != (size, mtime):
+                    self.seen[p] = (size, mtime)
+                    touched.append(p)
+        return touched, False
+
+    def close(self):
+        pass
+
+
+# -------------------------
+# Watcher
+# -------------------------
+class FolderWatcher(threading.Thread):
+    """
+    Vigila carpetas y agrega los videos nuevos cuando dejan de crecer.
+    Mismo protocolo de mensajes que ScanJob:
+
+      ("item", fid, path, dur)          video nuevo ya medido
+      ("quarantined", path, error)      no se pudo medir (queda en la cuarentena)
+      ("duplicate", path, original)     copia de un video ya guardado
+      ("error", message)                el watcher se detuvo por una excepción
+
+    probe(path) devuelve (duración, error | None), como en ScanJob.
+    """
+
+    def __init__(self, folders, known_ids: set, probe, workers: int = DEFAULT_WORKERS,
+                 settle_secs: float = SETTLE_SECS, use_inotify: bool = True, quarantine=None,
+                 duplicates=None):
+        super().__init__(daemon=True)
+        self.folders = [(os.path.abspath(root), recursive) for root, recursive in folders]
+        self.known_ids = set(known_ids)
+        self.probe = probe
+        self.workers = workers
+        self.settle_secs = settle_secs
+        self.quarantine = quarantine
+        self.duplicates = duplicates
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.queue = queue.Queue()
+        self.stop_event = threading.Event()
+        self.pending = {}  # path -> (size, mtime_ns, desde cuándo no cambia)
+        self._wake_r, self._wake_w = os.pipe()
+
+    def stop(self):
+        self.stop_event.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass  # el hilo ya terminó y cerró el pipe
+
+    def forget(self, ids):
+        """Ids borrados en la app: si el archivo vuelve a aparecer, se agrega de nuevo."""
+        self.known_ids.difference_update(ids)
+
+    def _backend(self):
+        if self.use_inotify:
+            try:
+                return InotifyBackend(self.folders, self._wake_r)
+            except (OSError, AttributeError):
+                pass
+        return PollingBackend(self.folders, self.stop_event)
+
+    def run(self):
+        backend = None
+        try:
+            backend = self._backend()
+            for root, recursive in self.folders:
+                for p, _, _ in list_videos(root, recursive):
+                    self._touch(p)
+
+            while not self.stop_event.is_set():
+                touched, rescan = backend.wait(CHECK_SECS if self.pending else None)
+                if rescan:
+                    touched = [p for root, recursive in self.folders for p, _, _ in list_videos(root, recursive)]
+                for p in touched:
+                    self._touch(p)
+                ready = self._collect_ready()
+                for i in range(0, len(ready), BATCH_SIZE):
+                    if self.stop_event.is_set():
+                        break
+                    self._ingest(ready[i:i + BATCH_SIZE])
+        except Exception as e:
+            self.queue.put(("error", str(e)))
+        finally:
+            if backend is not None:
+                backend.close()
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+
+    def _touch(self, path: str):
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        sig = (st.st_size, st.st_mtime_ns)
+        prev = self.pending.get(path)
+        if prev is None or prev[:2] != sig:
+            # Si ya estaba quieto desde antes (mtime viejo) no hace falta esperar
+            since = min(time.time(), st.st_mtime_ns / 1e9)
+            self.pending[path] = (*sig, since)
+
+    def _collect_ready(self):
+        now = time.time()
+        ready = []
+        for path, (size, mtime_ns, since) in list(self.pending.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                del self.pending[path]
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                self.pending[path] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.settle_secs and st.st_size > 0:
+                del self.pending[path]
+                ready.append(path)
+        return ready
+
+    def _ingest(self, paths):
+        new_files = []
+        for p in paths:
+            try:
+                st = os.stat(p)
+            except OSError:
+                continue
+            fid = make_fingerprint(p, st.st_size, st.st_mtime)
+            if fid in self.known_ids:
+                continue
+            if self.quarantine is not None and self.quarantine.blocks(p, st.st_size, st.st_mtime):
+                continue
+            if self.duplicates is not None and self.duplicates.blocks(p, st.st_size, st.st_mtime):
+                continue
+            new_files.append((fid, p, st))
+
+        if self.duplicates is not None and new_files:
+            sizes = {st.st_size for _, _, st in new_files}
+            dups = find_duplicates(((p, st.st_size) for _, p, st in new_files),
+                                   saved_video_sizes(list(self.known_ids), sizes))  # forget() corre en otro hilo
+            for _, p, st in new_files:
+                if p in dups:
+                    self.duplicates.add(p, dups[p], st.st_size, st.st_mtime)
+                    self.queue.put(("duplicate", p, dups[p]))
+            if dups:
+                self._save(self.duplicates)
+            new_files = [f for f in new_files if f[1] not in dups]
+        self.known_ids.update(fid for fid, _, _ in new_files)
+
+        results = probe_in_order((p for _, p, _ in new_files), self.probe, workers=self.workers)
+        for (fid, _, st), (p, (dur, error)) in zip(new_files, results):
+            if error is None:
+                self.queue.put(("item", fid, p, dur))
+                continue
+            # Si después se reescribe, cambia el fingerprint y se vuelve a intentar
+            self.known_ids.discard(fid)
+            if self.quarantine is not None:
+                self.quarantine.add(p, error, st.st_size, st.st_mtime)
+                self._save(self.quarantine)
+            self.queue.put(("quarantined", p, error))
+
+    @staticmethod
+    def _save(skip_list):
+        try:
+            skip_list.save()
+        except OSError:
+            pass  # queda en memoria; se guarda con el próximo escaneo